@@ -0,0 +1,206 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+from PIL import Image
+import config as cfg
+
+TEXTURE_FALLBACK_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.tga']
+MTL_TEXTURE_KEYWORDS = ('map_kd', 'map_ka', 'map_ks', 'map_bump', 'bump', 'map_d', 'map_pr', 'map_pm', 'norm')
+
+@dataclass
+class MeshAsset:
+    vertices: np.ndarray
+    normals: np.ndarray
+    indices: np.ndarray
+    bounds: np.ndarray
+    uvs: np.ndarray | None = None
+    texture_levels: list = field(default_factory=list)
+
+
+class AssetLoader:
+    def __init__(self, max_workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-loader")
+
+    def load_mesh(self, file_path):
+        return self.executor.submit(load_mesh_asset, file_path)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_mesh_asset(file_path, cache_dir=cfg.ASSET_CACHE_DIR):
+    source_paths = get_asset_source_paths(file_path)
+    if not source_paths:
+        print(f"Asset not found: {file_path}")
+        return None
+
+    source_hash = compute_source_hash(source_paths)
+    cache_path = Path(cache_dir) / f"{Path(file_path).stem}_{source_hash}.npz"
+    if cache_path.exists():
+        try:
+            return _read_mesh_asset(cache_path)
+        except Exception as exc:
+            print(f"Could not read asset cache {cache_path}: {exc}")
+
+    asset = _convert_mesh_asset(file_path)
+    if asset is None:
+        return None
+
+    try:
+        _write_mesh_asset(cache_path, asset)
+    except Exception as exc:
+        print(f"Could not write asset cache {cache_path}: {exc}")
+    return asset
+
+
+def get_asset_source_paths(file_path):
+    """Returns the model file plus every MTL and texture file its GPU data depends on."""
+    model_path = Path(file_path)
+    if not model_path.exists():
+        return []
+
+    source_paths = [model_path]
+    if model_path.suffix.lower() != '.obj':
+        return source_paths
+
+    material_paths = []
+    with open(model_path, 'r', errors='ignore') as f:
+        for line in f:
+            if line.startswith('mtllib'):
+                material_paths.extend(model_path.parent / name for name in line.split()[1:])
+
+    for material_path in material_paths:
+        if not material_path.exists():
+            continue
+        source_paths.append(material_path)
+        with open(material_path, 'r', errors='ignore') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].lower() in MTL_TEXTURE_KEYWORDS:
+                    texture_path = material_path.parent / parts[-1]
+                    if texture_path.exists():
+                        source_paths.append(texture_path)
+
+    source_paths.extend(_get_fallback_texture_paths(model_path))
+    return list(dict.fromkeys(source_paths))
+
+
+def compute_source_hash(source_paths):
+    digest = hashlib.sha1(f"asset-v{cfg.ASSET_CACHE_VERSION}".encode())
+    for source_path in source_paths:
+        digest.update(Path(source_path).name.encode())
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def build_mipmap_levels(image):
+    """Builds the full RGBA mip chain, bottom row first to match glTexImage2D."""
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+
+    levels = []
+    level_image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+    while True:
+        levels.append(np.asarray(level_image, dtype=np.uint8).copy())
+        if level_image.width == 1 and level_image.height == 1:
+            break
+        next_size = (max(1, level_image.width // 2), max(1, level_image.height // 2))
+        level_image = level_image.resize(next_size, Image.Resampling.BOX)
+    return levels
+
+
+def _convert_mesh_asset(file_path):
+    import trimesh
+
+    try:
+        # Use trimesh to load the scene. We use force='scene' to ensure we get a scene object.
+        scene = trimesh.load(file_path, force='scene')
+        # We'll take the first geometry from the scene. This is a simplification.
+        # For complex scenes, you might need to iterate through scene.geometry.
+        mesh_key = list(scene.geometry.keys())[0]
+        mesh = scene.geometry[mesh_key]
+    except Exception as e:
+        print(f"Error loading model with trimesh: {e}")
+        # As a fallback, try loading directly as a mesh
+        try:
+            mesh = trimesh.load(file_path, force='mesh')
+        except Exception as e2:
+            print(f"Secondary error loading as mesh: {e2}")
+            return None # Could not load the mesh
+
+    uvs = getattr(mesh.visual, 'uv', None)
+    asset = MeshAsset(
+        vertices=np.ascontiguousarray(mesh.vertices, dtype=np.float32),
+        normals=np.ascontiguousarray(mesh.vertex_normals, dtype=np.float32),
+        indices=np.ascontiguousarray(mesh.faces, dtype=np.uint32).reshape(-1),
+        bounds=np.asarray(mesh.bounds, dtype=np.float32),
+        uvs=np.ascontiguousarray(uvs, dtype=np.float32) if uvs is not None and len(uvs) > 0 else None,
+    )
+
+    try:
+        image = _find_texture_image(mesh, file_path)
+        if image is not None:
+            asset.texture_levels = build_mipmap_levels(image)
+    except Exception as e:
+        print(f"Could not load texture: {e}")
+    return asset
+
+
+def _find_texture_image(mesh, file_path):
+    material = getattr(mesh.visual, 'material', None)
+    if material is not None:
+        if getattr(material, 'baseColorTexture', None) is not None:
+            return material.baseColorTexture
+        if getattr(material, 'image', None) is not None:
+            return material.image
+
+    # Fallback for OBJ files that reference textures in the MTL file
+    if str(file_path).lower().endswith('.obj'):
+        for texture_path in _get_fallback_texture_paths(Path(file_path)):
+            return Image.open(texture_path)
+    return None
+
+
+def _get_fallback_texture_paths(model_path):
+    # Assume the texture is in the same dir with a common name
+    candidates = [model_path.with_suffix(ext) for ext in TEXTURE_FALLBACK_EXTENSIONS]
+    candidates.append(model_path.parent / 'PBR_Material.png')
+    return [candidate for candidate in candidates if candidate.exists()]
+
+
+def _write_mesh_asset(cache_path, asset):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "vertices": asset.vertices,
+        "normals": asset.normals,
+        "indices": asset.indices,
+        "bounds": asset.bounds,
+        "texture_level_count": np.array(len(asset.texture_levels), dtype=np.int32),
+    }
+    if asset.uvs is not None:
+        arrays["uvs"] = asset.uvs
+    for level_index, level in enumerate(asset.texture_levels):
+        arrays[f"texture_level_{level_index}"] = level
+
+    temp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, cache_path)
+
+
+def _read_mesh_asset(cache_path):
+    with np.load(cache_path) as data:
+        level_count = int(data["texture_level_count"])
+        return MeshAsset(
+            vertices=data["vertices"],
+            normals=data["normals"],
+            indices=data["indices"],
+            bounds=data["bounds"],
+            uvs=data["uvs"] if "uvs" in data.files else None,
+            texture_levels=[data[f"texture_level_{level_index}"] for level_index in range(level_count)],
+        )
@@ -0,0 +1,463 @@
+import math
+import numpy as np
+import config as cfg
+
+HEX_CORNER_ANGLES = np.radians(60.0 * np.arange(6) + 30.0)
+HEX_CORNER_OFFSETS = np.column_stack((np.cos(HEX_CORNER_ANGLES), np.sin(HEX_CORNER_ANGLES))).astype(np.float32)
+HEX_AREA_FACTOR = 1.5 * math.sqrt(3.0)
+# Axial (q, r) steps to the six neighbors, counter-clockwise from east.
+HEX_AXIAL_DIRECTIONS = np.array([(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)], dtype=np.int32)
+NO_HEX = -1
+FULL_COVERAGE_EPSILON = 1e-8
+MIN_CLIPPED_AREA = 1e-10
+
+
+def build_battle_field(polygon_2d):
+    polygon = np.asarray(polygon_2d, dtype=np.float32).reshape(-1, 2)
+    area = polygon_area_2d(polygon)
+    if len(polygon) < 3 or area <= 1e-12:
+        return empty_battle_field(polygon)
+
+    radius = choose_hex_radius(area, polygon_perimeter_2d(polygon))
+    origin = polygon.min(axis=0) - radius * 2.0
+    rows, cols, centers = hex_lattice_window(origin, radius, origin, polygon.max(axis=0) + radius * 2.0)
+    inside_mask = points_in_convex_polygon(centers, polygon)
+    centers = centers[inside_mask]
+    axial = np.column_stack(offset_to_axial(rows[inside_mask], cols[inside_mask]))
+    hex_polygons = make_hex_polygons(centers, radius)
+
+    # Hexes whose six corners are all inside the convex field are complete;
+    # only the remaining boundary ring goes through the clipper.
+    corners_inside = points_in_convex_polygon(hex_polygons.reshape(-1, 2), polygon).reshape(-1, 6)
+    coverage = np.ones(len(hex_polygons), dtype=np.float32)
+    boundary_indices = np.flatnonzero(~np.all(corners_inside, axis=1))
+    if len(boundary_indices) > 0:
+        clipped, counts = clip_polygons_to_convex_polygon(hex_polygons[boundary_indices], polygon)
+        clipped_area = padded_polygon_areas(clipped)
+        coverage[boundary_indices] = np.clip(clipped_area / (HEX_AREA_FACTOR * radius * radius), 0.0, 1.0)
+        coverage[boundary_indices[(counts < 3) | (clipped_area <= MIN_CLIPPED_AREA)]] = 0.0
+
+    keep_mask = coverage > 0.0
+    return {
+        "polygon": polygon,
+        "hex_polygons": hex_polygons[keep_mask],
+        "hex_centers": centers[keep_mask],
+        "hex_axial": axial[keep_mask].astype(np.int32),
+        "hex_coverage": coverage[keep_mask],
+        "hex_radius": float(radius),
+        "hex_origin": origin.astype(np.float32),
+    }
+
+
+class BattleHexGrid:
+    """Dense axial-coordinate index over the hexes of one battle field.
+
+    Hex indices match the rows of the battle field arrays. Lookups go through
+    a (q, r) -> index array covering the field's axial bounding box, so picking
+    and adjacency queries never scan the hex list.
+    """
+
+    def __init__(self, battle_field):
+        self.battle_field = battle_field
+        self.radius = float(battle_field.get("hex_radius", 0.0))
+        self.origin = np.asarray(battle_field.get("hex_origin", [0.0, 0.0]), dtype=np.float64)
+        self.axial = np.asarray(battle_field.get("hex_axial", np.zeros((0, 2))), dtype=np.int32).reshape(-1, 2)
+        self.hex_width = math.sqrt(3.0) * self.radius
+        self.row_height = 1.5 * self.radius
+
+        if len(self.axial) > 0:
+            self.axial_min = self.axial.min(axis=0)
+            shape = self.axial.max(axis=0) - self.axial_min + 1
+        else:
+            self.axial_min = np.zeros(2, dtype=np.int32)
+            shape = np.zeros(2, dtype=np.int32)
+        self.index = np.full(tuple(int(size) for size in shape), NO_HEX, dtype=np.int32)
+        local = self.axial - self.axial_min
+        self.index[local[:, 0], local[:, 1]] = np.arange(len(self.axial), dtype=np.int32)
+        self.neighbor_table = self.lookup(self.axial[:, None, :] + HEX_AXIAL_DIRECTIONS[None, :, :])
+
+    def __len__(self):
+        return len(self.axial)
+
+    def lookup(self, axial):
+        """Maps (..., 2) axial coordinates to hex indices, NO_HEX where absent."""
+        axial = np.asarray(axial, dtype=np.int64)
+        local = axial - self.axial_min
+        shape = np.asarray(self.index.shape)
+        valid_mask = np.all((local >= 0) & (local < shape), axis=-1)
+        indices = np.full(valid_mask.shape, NO_HEX, dtype=np.int32)
+        indices[valid_mask] = self.index[local[valid_mask][:, 0], local[valid_mask][:, 1]]
+        return indices
+
+    def point_to_axial(self, point):
+        if self.radius <= 0.0:
+            return None
+        relative = np.asarray(point, dtype=np.float64) - self.origin
+        r = relative[1] / self.row_height
+        q = relative[0] / self.hex_width - r * 0.5
+        return cube_round_axial(q, r)
+
+    def hex_at_point(self, point):
+        axial = self.point_to_axial(point)
+        if axial is None:
+            return NO_HEX
+        return int(self.lookup(axial))
+
+    def neighbors(self, hex_index):
+        neighbors = self.neighbor_table[hex_index]
+        return neighbors[neighbors != NO_HEX]
+
+    def distance(self, hex_a, hex_b):
+        return axial_distance(self.axial[hex_a], self.axial[hex_b])
+
+    def hexes_in_range(self, hex_index, distance):
+        distance = int(distance)
+        offsets = np.arange(-distance, distance + 1)
+        dq, dr = np.meshgrid(offsets, offsets, indexing="ij")
+        in_range = np.abs(dq + dr) <= distance
+        axial = self.axial[hex_index] + np.column_stack((dq[in_range], dr[in_range]))
+        indices = self.lookup(axial)
+        return indices[indices != NO_HEX]
+
+    def line(self, hex_a, hex_b):
+        """Hex indices along the straight line between two hexes, NO_HEX off the field."""
+        start = self.axial[hex_a].astype(np.float64)
+        end = self.axial[hex_b].astype(np.float64)
+        steps = int(axial_distance(start, end))
+        if steps == 0:
+            return np.array([hex_a], dtype=np.int32)
+
+        # Nudge off the exact midpoints so ties round consistently.
+        t = np.arange(steps + 1, dtype=np.float64)[:, None] / steps
+        points = start + 1e-6 + (end - start) * t
+        return self.lookup(cube_round_axial(points[:, 0], points[:, 1]))
+
+    def has_line_of_sight(self, hex_a, hex_b, blocked_mask=None):
+        path = self.line(hex_a, hex_b)
+        if np.any(path == NO_HEX):
+            return False
+        if blocked_mask is None:
+            return True
+        return not np.any(np.asarray(blocked_mask)[path[1:-1]])
+
+
+def cube_round_axial(q, r):
+    q = np.asarray(q, dtype=np.float64)
+    r = np.asarray(r, dtype=np.float64)
+    s = -q - r
+    rounded_q = np.round(q)
+    rounded_r = np.round(r)
+    rounded_s = np.round(s)
+    q_diff = np.abs(rounded_q - q)
+    r_diff = np.abs(rounded_r - r)
+    s_diff = np.abs(rounded_s - s)
+    fix_q = (q_diff > r_diff) & (q_diff > s_diff)
+    fix_r = ~fix_q & (r_diff > s_diff)
+    rounded_q = np.where(fix_q, -rounded_r - rounded_s, rounded_q)
+    rounded_r = np.where(fix_r, -rounded_q - rounded_s, rounded_r)
+    return np.stack((rounded_q, rounded_r), axis=-1).astype(np.int32)
+
+
+def axial_distance(axial_a, axial_b):
+    delta = np.asarray(axial_a, dtype=np.int64) - np.asarray(axial_b, dtype=np.int64)
+    return int((abs(delta[..., 0]) + abs(delta[..., 1]) + abs(delta[..., 0] + delta[..., 1])) // 2)
+
+
+def pack_battle_field(battle_field):
+    # Centers and hex polygons follow from axial coordinates, the lattice origin
+    # and the radius, so only those and the per-hex coverage are stored.
+    axial = np.asarray(battle_field.get("hex_axial", np.zeros((0, 2))), dtype=np.int32).reshape(-1, 2)
+    axial_dtype = np.int16 if len(axial) == 0 or np.abs(axial).max() < np.iinfo(np.int16).max else np.int32
+    return {
+        "polygon": np.asarray(battle_field.get("polygon", []), dtype=np.float32).reshape(-1, 2),
+        "hex_axial": axial.astype(axial_dtype),
+        "hex_coverage": np.asarray(battle_field.get("hex_coverage", []), dtype=np.float16).reshape(-1),
+        "hex_radius": float(battle_field.get("hex_radius", 0.0)),
+        "hex_origin": np.asarray(battle_field.get("hex_origin", [0.0, 0.0]), dtype=np.float32).reshape(2),
+    }
+
+
+def unpack_battle_field(packed):
+    radius = float(packed.get("hex_radius", 0.0))
+    origin = np.asarray(packed.get("hex_origin", [0.0, 0.0]), dtype=np.float64).reshape(2)
+    axial = np.asarray(packed.get("hex_axial", np.zeros((0, 2))), dtype=np.int32).reshape(-1, 2)
+    q = axial[:, 0].astype(np.float64)
+    r = axial[:, 1].astype(np.float64)
+    centers = np.column_stack((
+        origin[0] + math.sqrt(3.0) * radius * (q + r * 0.5),
+        origin[1] + 1.5 * radius * r,
+    )).astype(np.float32)
+    return {
+        "polygon": np.asarray(packed.get("polygon", []), dtype=np.float32).reshape(-1, 2),
+        "hex_polygons": make_hex_polygons(centers, radius),
+        "hex_centers": centers,
+        "hex_axial": axial,
+        "hex_coverage": np.asarray(packed.get("hex_coverage", []), dtype=np.float32).reshape(-1),
+        "hex_radius": radius,
+        "hex_origin": origin.astype(np.float32),
+    }
+
+
+def empty_battle_field(polygon):
+    return {
+        "polygon": np.asarray(polygon, dtype=np.float32).reshape(-1, 2),
+        "hex_polygons": np.zeros((0, 6, 2), dtype=np.float32),
+        "hex_centers": np.zeros((0, 2), dtype=np.float32),
+        "hex_axial": np.zeros((0, 2), dtype=np.int32),
+        "hex_coverage": np.zeros(0, dtype=np.float32),
+        "hex_radius": 0.0,
+        "hex_origin": np.zeros(2, dtype=np.float32),
+    }
+
+
+def choose_hex_radius(area, perimeter):
+    radius = max(cfg.BATTLE_FIELD_MIN_HEX_RADIUS, math.sqrt(area) * cfg.BATTLE_FIELD_HEX_RADIUS_FACTOR)
+
+    # Each lattice cell covers one hex area, so a field holds about
+    # area / (1.5 * sqrt(3) * r^2) hex centers, plus at most one extra row of
+    # cells along the perimeter. Solving that bound for 1 / r gives the smallest
+    # radius that stays under BATTLE_FIELD_MAX_HEXES without regenerating.
+    max_hexes = max(2, int(cfg.BATTLE_FIELD_MAX_HEXES))
+    a = area / HEX_AREA_FACTOR
+    b = perimeter / math.sqrt(3.0)
+    c = 1.0 - max_hexes
+    inverse_radius = (-b + math.sqrt(b * b - 4.0 * a * c)) / (2.0 * a)
+    return max(radius, 1.0 / inverse_radius)
+
+
+def hex_lattice_window(origin, radius, min_bounds, max_bounds):
+    # Pointy-top lattice anchored at origin: rows are 1.5 r apart and odd rows
+    # shift half a hex to the left. Returns the rows, columns and centers of
+    # every lattice cell whose center falls inside the given window.
+    hex_width = math.sqrt(3.0) * radius
+    row_height = 1.5 * radius
+    origin = np.asarray(origin, dtype=np.float64)
+    min_row = int(math.ceil((float(min_bounds[1]) - origin[1]) / row_height - 1e-9))
+    max_row = int(math.floor((float(max_bounds[1]) - origin[1]) / row_height + 1e-9))
+    min_col = int(math.floor((float(min_bounds[0]) - origin[0]) / hex_width))
+    max_col = int(math.floor((float(max_bounds[0]) - origin[0]) / hex_width)) + 1
+    if max_row < min_row:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros((0, 2), dtype=np.float32)
+
+    rows, cols = np.meshgrid(np.arange(min_row, max_row + 1), np.arange(min_col, max_col + 1), indexing="ij")
+    rows = rows.ravel()
+    cols = cols.ravel()
+    x = origin[0] - (rows % 2) * hex_width * 0.5 + cols * hex_width
+    y = origin[1] + rows * row_height
+    in_window = (x >= float(min_bounds[0]) - 1e-9 * hex_width) & (x <= float(max_bounds[0]))
+    centers = np.column_stack((x[in_window], y[in_window])).astype(np.float32)
+    return rows[in_window].astype(np.int32), cols[in_window].astype(np.int32), centers
+
+
+def offset_to_axial(rows, cols):
+    # Odd rows are shifted left, so a row's axial q starts ceil(row / 2) lower.
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    return (cols - (rows + (rows & 1)) // 2).astype(np.int32), rows.astype(np.int32)
+
+
+def make_hex_polygons(centers, radius):
+    return (np.asarray(centers, dtype=np.float32)[:, None, :] + HEX_CORNER_OFFSETS[None, :, :] * np.float32(radius)).astype(np.float32)
+
+
+def points_in_convex_polygon(points, polygon, epsilon=FULL_COVERAGE_EPSILON):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float64)
+    if len(polygon) < 3:
+        return np.zeros(len(points), dtype=bool)
+
+    edge_starts = polygon
+    edges = np.roll(polygon, -1, axis=0) - polygon
+    relative = points[:, None, :] - edge_starts[None, :, :]
+    crosses = edges[None, :, 0] * relative[:, :, 1] - edges[None, :, 1] * relative[:, :, 0]
+    if polygon_area_signed_2d(polygon) < 0:
+        crosses = -crosses
+    return np.all(crosses >= -epsilon, axis=1)
+
+
+def clip_polygons_to_convex_polygon(polygons, boundary, counts=None):
+    """Sutherland-Hodgman clip of a batch of padded polygons against convex boundaries.
+
+    boundary is either one (P, 2) polygon shared by the batch or an (N, P, 2)
+    stack with one boundary per polygon, padded by repeating its first vertex.
+    Returns (clipped, counts) where clipped is (N, K, 2) and rows are padded by
+    repeating their first vertex, so shoelace sums over the full width stay exact.
+    """
+    clipped = np.asarray(polygons, dtype=np.float64)
+    polygon_count, width = clipped.shape[:2]
+    counts = np.full(polygon_count, width, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+    boundary = np.asarray(boundary, dtype=np.float64)
+    if boundary.ndim == 2:
+        boundary = np.broadcast_to(boundary, (polygon_count,) + boundary.shape)
+    orientation = np.where(padded_polygon_signed_areas(boundary) >= 0, 1.0, -1.0)[:, None]
+    boundary_edges = np.roll(boundary, -1, axis=1) - boundary
+
+    for edge_index in range(boundary.shape[1]):
+        if polygon_count == 0 or not np.any(counts > 0):
+            break
+        # Padding repeats a vertex, which yields a zero edge that keeps everything.
+        edge_start = boundary[:, edge_index, None, :]
+        edge = boundary_edges[:, edge_index, None, :]
+
+        width = clipped.shape[1]
+        slots = np.arange(width)
+        valid = slots[None, :] < counts[:, None]
+        previous_slots = np.where(slots[None, :] == 0, counts[:, None] - 1, slots[None, :] - 1)
+        previous_slots = np.clip(previous_slots, 0, width - 1)
+        previous = np.take_along_axis(clipped, previous_slots[:, :, None], axis=1)
+
+        side = orientation * (
+            edge[:, :, 0] * (clipped[:, :, 1] - edge_start[:, :, 1]) -
+            edge[:, :, 1] * (clipped[:, :, 0] - edge_start[:, :, 0])
+        )
+        previous_side = np.take_along_axis(side, previous_slots, axis=1)
+        inside = side >= -FULL_COVERAGE_EPSILON
+        previous_inside = previous_side >= -FULL_COVERAGE_EPSILON
+
+        denominator = previous_side - side
+        t = np.clip(previous_side / np.where(np.abs(denominator) > 1e-20, denominator, 1.0), 0.0, 1.0)
+        intersections = previous + (clipped - previous) * t[:, :, None]
+
+        # Every input vertex emits an optional crossing point and then itself if inside.
+        emitted = np.stack((intersections, clipped), axis=2).reshape(polygon_count, width * 2, 2)
+        emitted_mask = np.stack(((inside != previous_inside) & valid, inside & valid), axis=2).reshape(polygon_count, width * 2)
+        clipped, counts = _compact_padded_polygons(emitted, emitted_mask)
+
+    return clipped.astype(np.float32), counts.astype(np.int32)
+
+
+def _compact_padded_polygons(points, mask):
+    counts = np.count_nonzero(mask, axis=1)
+    width = max(1, int(counts.max()) if len(counts) else 1)
+    order = np.argsort(~mask, axis=1, kind="stable")[:, :width]
+    compacted = np.take_along_axis(points, order[:, :, None], axis=1)
+    padding = np.arange(width)[None, :] >= counts[:, None]
+    compacted = np.where(padding[:, :, None], compacted[:, :1, :], compacted)
+    compacted[counts == 0] = 0.0
+    return compacted, counts
+
+
+def padded_polygon_signed_areas(polygons):
+    polygons = np.asarray(polygons, dtype=np.float64)
+    next_points = np.roll(polygons, -1, axis=1)
+    cross = polygons[:, :, 0] * next_points[:, :, 1] - next_points[:, :, 0] * polygons[:, :, 1]
+    return cross.sum(axis=1) * 0.5
+
+
+def padded_polygon_areas(polygons):
+    return np.abs(padded_polygon_signed_areas(polygons))
+
+
+def pad_polygons(polygons):
+    """Stacks ragged polygons into (N, K, 2), padding each with its first vertex."""
+    width = max((len(polygon) for polygon in polygons), default=0)
+    padded = np.zeros((len(polygons), max(width, 1), 2), dtype=np.float64)
+    for index, polygon in enumerate(polygons):
+        polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        if len(polygon) == 0:
+            continue
+        padded[index, :len(polygon)] = polygon
+        padded[index, len(polygon):] = polygon[0]
+    return padded
+
+
+def points_in_convex_polygons(points, padded_polygons, epsilon=FULL_COVERAGE_EPSILON):
+    """Returns an (M, N) containment mask of M points against N padded convex polygons."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygons = np.asarray(padded_polygons, dtype=np.float64)
+    orientation = np.where(padded_polygon_signed_areas(polygons) >= 0, 1.0, -1.0)
+    edges = np.roll(polygons, -1, axis=1) - polygons
+    relative_x = points[:, None, None, 0] - polygons[None, :, :, 0]
+    relative_y = points[:, None, None, 1] - polygons[None, :, :, 1]
+    crosses = (edges[None, :, :, 0] * relative_y - edges[None, :, :, 1] * relative_x) * orientation[None, :, None]
+    return np.all(crosses >= -epsilon, axis=2)
+
+
+def distances_to_polygon_edges(points, polygon):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if len(polygon) < 2:
+        return np.zeros(len(points), dtype=np.float64)
+
+    segment_starts = polygon
+    segments = np.roll(polygon, -1, axis=0) - polygon
+    segment_lengths_sq = np.maximum(np.einsum("ij,ij->i", segments, segments), 1e-16)
+    relative = points[:, None, :] - segment_starts[None, :, :]
+    t = np.clip(np.einsum("mpj,pj->mp", relative, segments) / segment_lengths_sq[None, :], 0.0, 1.0)
+    offsets = relative - segments[None, :, :] * t[:, :, None]
+    return np.sqrt(np.min(np.einsum("mpj,mpj->mp", offsets, offsets), axis=1))
+
+
+def build_context_hex_band(active_polygon, context_polygons, origin, radius, depth):
+    """Lattice hexes of the neighboring polygons that lie within depth of the active field.
+
+    All candidate centers are generated once over the active bounds grown by
+    depth, filtered by edge distance, tested against every context polygon and
+    clipped in one batch. Each lattice cell is owned by the context polygon
+    that covers most of it.
+    """
+    active_polygon = np.asarray(active_polygon, dtype=np.float64).reshape(-1, 2)
+    context_polygons = [polygon for polygon in context_polygons if len(polygon) >= 3]
+    empty = {
+        "hex_polygons": np.zeros((0, 6, 2), dtype=np.float32),
+        "hex_axial": np.zeros((0, 2), dtype=np.int32),
+        "distances": np.zeros(0, dtype=np.float32),
+        "coverage": np.zeros(0, dtype=np.float32),
+    }
+    if len(active_polygon) < 3 or not context_polygons or radius <= 1e-8:
+        return empty
+
+    margin = depth + radius
+    rows, cols, centers = hex_lattice_window(
+        origin,
+        radius,
+        active_polygon.min(axis=0) - margin,
+        active_polygon.max(axis=0) + margin
+    )
+    distances = distances_to_polygon_edges(centers, active_polygon)
+    band_mask = distances <= depth
+    rows, cols, centers, distances = rows[band_mask], cols[band_mask], centers[band_mask], distances[band_mask]
+
+    padded_context = pad_polygons(context_polygons)
+    center_indices, context_indices = np.nonzero(points_in_convex_polygons(centers, padded_context))
+    if len(center_indices) == 0:
+        return empty
+
+    hex_polygons = make_hex_polygons(centers[center_indices], radius)
+    clipped, counts = clip_polygons_to_convex_polygon(hex_polygons, padded_context[context_indices])
+    clipped_area = padded_polygon_areas(clipped)
+    valid_mask = (counts >= 3) & (clipped_area > MIN_CLIPPED_AREA)
+    center_indices = center_indices[valid_mask]
+    clipped_area = clipped_area[valid_mask]
+    hex_polygons = hex_polygons[valid_mask]
+
+    # Largest clipped area first, then the first row per axial cell wins.
+    q, r = offset_to_axial(rows[center_indices], cols[center_indices])
+    axial = np.column_stack((q, r))
+    order = np.lexsort((-clipped_area, r, q))
+    _, owner_positions = np.unique(axial[order], axis=0, return_index=True)
+    owners = order[owner_positions]
+
+    return {
+        "hex_polygons": hex_polygons[owners],
+        "hex_axial": axial[owners],
+        "distances": distances[center_indices[owners]].astype(np.float32),
+        "coverage": np.clip(clipped_area[owners] / (HEX_AREA_FACTOR * radius * radius), 0.0, 1.0).astype(np.float32),
+    }
+
+
+def polygon_area_signed_2d(polygon):
+    polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if len(polygon) < 3:
+        return 0.0
+    next_points = np.roll(polygon, -1, axis=0)
+    return float(np.sum(polygon[:, 0] * next_points[:, 1] - next_points[:, 0] * polygon[:, 1]) * 0.5)
+
+
+def polygon_area_2d(polygon):
+    return abs(polygon_area_signed_2d(polygon))
+
+
+def polygon_perimeter_2d(polygon):
+    polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    return float(np.sum(np.linalg.norm(np.roll(polygon, -1, axis=0) - polygon, axis=1)))
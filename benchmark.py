@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+import config as cfg
+
+DEFAULT_LEVELS = [2, 3, 4, 5, 6, 7]
+STAGE_CACHE_STAGES = ("geometry", "adjacency", "terrain", "rivers")
+
+
+def measure(results, level, name, func, repeat, setup=None, items=1):
+    """Times func `repeat` times and appends one result record.
+
+    setup runs untimed before every repetition and its return value is passed
+    to func, so benchmarks that consume their input can start fresh.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start_time = time.perf_counter()
+        if setup is not None:
+            func(state)
+        else:
+            func()
+        times.append(time.perf_counter() - start_time)
+
+    median = statistics.median(times)
+    result = {
+        "level": level,
+        "benchmark": name,
+        "items": items,
+        "repeat": repeat,
+        "times": times,
+        "min": min(times),
+        "median": median,
+        "mean": statistics.fmean(times),
+        "max": max(times),
+        "median_per_item": median / max(items, 1),
+    }
+    results.append(result)
+    print(f"  {name:<28} median {median * 1000:10.2f} ms  ({items} item(s), {repeat} run(s))")
+    return result
+
+
+def benchmark_level(level, repeat, subtile_sample, pick_samples, seed):
+    # Imported here so --help and --compare do not pay for the world modules.
+    from game_world import GameWorld
+    from picking import get_subtile_at_ray, get_tile_at_ray
+    from polyhedron_generator import PolyhedronGenerator
+    from river_generator import RiverGenerator
+    from river_mesh import build_river_mesh
+    from spatial_hash_grid import SpatialHashGrid
+    from world_pipeline import WorldPipeline
+
+    results = []
+    rng = np.random.default_rng(seed)
+    print(f"Level {level}:")
+
+    start_time = time.perf_counter()
+    world = GameWorld(subdivision_level=level, seed=cfg.WORLD_SEED, headless=True)
+    results.append(_single_run_result(level, "world_pipeline_generate", time.perf_counter() - start_time, len(world.tiles)))
+
+    measure(results, level, "create_goldberg_polyhedron",
+            lambda: PolyhedronGenerator().create_goldberg_polyhedron(level), repeat)
+
+    def reset_tiles():
+        world.tiles = []
+    measure(results, level, "create_geometry", lambda _: world._create_geometry(), repeat,
+            setup=reset_tiles, items=len(world.tiles))
+    tile_count = len(world.tiles)
+    measure(results, level, "build_neighbor_graph", world._build_neighbor_graph, repeat, items=tile_count)
+    measure(results, level, "build_vertex_neighbors", world._build_vertex_neighbors, repeat, items=len(world.vertices))
+    measure(results, level, "assign_terrain_and_heights", world._assign_terrain_and_heights, repeat, items=tile_count)
+
+    def new_river_generator():
+        return RiverGenerator(world.vertex_positions, world.vertex_tile_ids, world.vertex_neighbor_ids, world.tiles)
+    measure(results, level, "generate_rivers", lambda river_gen: river_gen.generate_rivers(cfg.RIVER_COUNT), repeat,
+            setup=new_river_generator, items=len(world.vertices))
+    world._generate_rivers()
+    measure(results, level, "build_river_mesh",
+            lambda: build_river_mesh(world.vertex_positions, world.river_segments, world.river_segment_flow), repeat,
+            items=len(world.river_segments))
+
+    measure(results, level, "spatial_hash_grid", lambda: SpatialHashGrid(world.tiles), repeat, items=tile_count)
+    world.spatial_hash_grid = SpatialHashGrid(world.tiles)
+
+    directions = _random_unit_vectors(rng, pick_samples)
+    measure(results, level, "pick_tile",
+            lambda: [get_tile_at_ray(direction * 3.0, -direction, world) for direction in directions], repeat,
+            items=pick_samples)
+
+    sample_tiles = [world.tiles[index] for index in np.linspace(0, tile_count - 1, min(subtile_sample, tile_count)).astype(int)]
+
+    def generate_sample_subtiles():
+        for tile in sample_tiles:
+            tile.generate_subtiles(
+                min_distance_factor=cfg.SUBTILE_MIN_DISTANCE_FACTOR,
+                edge_spacing_factor=cfg.SUBTILE_EDGE_POINT_SPACING_FACTOR,
+                max_interior_points=cfg.SUBTILE_MAX_INTERIOR_POINTS,
+                candidate_batch_size=cfg.SUBTILE_CANDIDATE_BATCH_SIZE,
+                max_stagnation=cfg.SUBTILE_MAX_STAGNATION
+            )
+    measure(results, level, "generate_subtiles", generate_sample_subtiles, repeat, items=len(sample_tiles))
+
+    sample_subtiles = [subtile for tile in sample_tiles for subtile in tile.subtiles]
+    measure(results, level, "build_battle_field",
+            lambda: [subtile._build_battle_field() for subtile in sample_subtiles], repeat,
+            items=len(sample_subtiles))
+
+    subtile_rays = [
+        tile.center * 3.0 for tile in sample_tiles
+        for _ in range(max(1, pick_samples // max(len(sample_tiles), 1)))
+    ]
+    measure(results, level, "pick_subtile",
+            lambda: [get_subtile_at_ray(origin, -origin / np.linalg.norm(origin), world) for origin in subtile_rays], repeat,
+            items=len(subtile_rays))
+
+    pipeline = WorldPipeline(world)
+    for stage in STAGE_CACHE_STAGES:
+        payload = getattr(pipeline, f"_export_{stage}")()
+        cache_filename = os.path.join(pipeline.cache_dir, f"{stage}_benchmark_level_{level}.pkl")
+        measure(results, level, f"stage_cache_save_{stage}",
+                lambda: pipeline._save_stage_payload(cache_filename, payload), repeat)
+        measure(results, level, f"stage_cache_load_{stage}",
+                lambda: pipeline._load_stage_payload(cache_filename), repeat)
+
+    world.subtile_cache = {tile.id: world._serialize_subtiles(tile) for tile in sample_tiles}
+    measure(results, level, "subtile_cache_save", world._save_subtile_cache, repeat, items=len(sample_tiles))
+    measure(results, level, "subtile_cache_load", world._load_subtile_cache, repeat, items=len(sample_tiles))
+
+    world.shutdown()
+    return results
+
+
+def _single_run_result(level, name, elapsed, items):
+    print(f"  {name:<28} {elapsed * 1000:17.2f} ms  ({items} item(s), 1 run(s))")
+    return {
+        "level": level,
+        "benchmark": name,
+        "items": items,
+        "repeat": 1,
+        "times": [elapsed],
+        "min": elapsed,
+        "median": elapsed,
+        "mean": elapsed,
+        "max": elapsed,
+        "median_per_item": elapsed / max(items, 1),
+    }
+
+
+def _random_unit_vectors(rng, count):
+    vectors = rng.normal(size=(count, 3))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_metadata(args):
+    return {
+        "commit": get_git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "levels": args.levels,
+        "repeat": args.repeat,
+        "subtile_sample": args.subtile_sample,
+        "pick_samples": args.pick_samples,
+        "seed": args.seed,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """Prints the per-item median ratio for every benchmark in both runs; returns the regressions."""
+    baseline_medians = {(r["level"], r["benchmark"]): r["median_per_item"] for r in baseline["results"]}
+    regressions = []
+    print(f"Compared against {baseline['metadata'].get('commit')}:")
+    for result in current["results"]:
+        key = (result["level"], result["benchmark"])
+        if key not in baseline_medians or baseline_medians[key] <= 0:
+            continue
+        ratio = result["median_per_item"] / baseline_medians[key]
+        marker = ""
+        if ratio > threshold:
+            marker = "  REGRESSION"
+            regressions.append((key, ratio))
+        print(f"  level {key[0]} {key[1]:<28} {ratio:6.2f}x{marker}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time every world generation, subtile, picking and cache stage.")
+    parser.add_argument("--levels", type=int, nargs="+", default=DEFAULT_LEVELS, help="Subdivision levels to benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark.")
+    parser.add_argument("--subtile-sample", type=int, default=16, help="Tiles per level to generate subtiles and battle fields for.")
+    parser.add_argument("--pick-samples", type=int, default=500, help="Rays per picking benchmark.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the picking rays.")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to.")
+    parser.add_argument("--compare", help="Earlier results JSON to compare per-item medians against.")
+    parser.add_argument("--regression-threshold", type=float, default=1.15, help="Median ratio reported as a regression.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_path = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = []
+    start_time = time.perf_counter()
+    original_cwd = os.getcwd()
+    # Caches go to a scratch directory so the benchmark neither reads nor
+    # clobbers the real ones.
+    with tempfile.TemporaryDirectory(prefix="worldbench_") as scratch_dir:
+        os.chdir(scratch_dir)
+        try:
+            for level in args.levels:
+                results.extend(benchmark_level(level, args.repeat, args.subtile_sample, args.pick_samples, args.seed))
+        finally:
+            os.chdir(original_cwd)
+
+    report = {"metadata": get_metadata(args), "results": results}
+    report["metadata"]["total_time"] = time.perf_counter() - start_time
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {output_path} in {report['metadata']['total_time']:.2f}s.")
+
+    if baseline is not None:
+        regressions = compare_results(baseline, report, args.regression_threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.regression_threshold:.2f}x.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,4 @@
+import json
 import math
 import numpy as np
 import config as cfg
@@ -32,6 +33,28 @@ class Camera:
         glRotatef(math.degrees(self.angle_x), 1, 0, 0)
         glRotatef(math.degrees(self.angle_y), 0, 1, 0)
 
+    def get_state(self):
+        return {
+            "angle_x": float(self.angle_x),
+            "angle_y": float(self.angle_y),
+            "zoom": float(self.zoom),
+        }
+
+    def apply_state(self, state):
+        # Jumps straight to the recorded view; no easing or leftover spin.
+        self.angle_x = state.get("angle_x", self.angle_x)
+        self.angle_y = state.get("angle_y", self.angle_y)
+        self.zoom = self.target_zoom = state.get("zoom", self.zoom)
+        self.angle_x_vel = self.angle_y_vel = 0.0
+
+    def get_view_direction(self):
+        """Unit vector from the globe's center towards the camera."""
+        return np.array([
+            -math.sin(self.angle_y) * math.cos(self.angle_x),
+            math.sin(self.angle_x),
+            math.cos(self.angle_y) * math.cos(self.angle_x),
+        ], dtype=np.float32)
+
     def get_distance_to_center(self):
         return self.base_distance * self.zoom
 
@@ -72,3 +95,15 @@ class Camera:
         z2 = y1 * sin_x + z1 * cos_x
 
         return np.column_stack((x1, y2, z2)).astype(np.float32, copy=False)
+
+
+def load_camera_path(file_path):
+    """Frames recorded with save_camera_path, or a bare JSON list of states."""
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    return data["frames"] if isinstance(data, dict) else data
+
+
+def save_camera_path(file_path, frames):
+    with open(file_path, 'w') as f:
+        json.dump({"frames": frames}, f)
@@ -26,6 +26,7 @@ SCREEN_HEIGHT = 600
 FULLSCREEN = True
 FPS = 60
 CAPTION = "Spherical World"
+OVERLAY_STREAM_BUFFER_BYTES = 1 << 20 # Ring VBO for per-frame overlays (selection, move range); doubles if a frame needs more
 
 # Colors
 EDGE_COLOR = (40, 40, 40)
@@ -43,15 +44,29 @@ MAX_ZOOM = 1.2
 MIN_ZOOM_STEP = 0.02
 MAX_ZOOM_STEP = 0.15
 INITIAL_SCALE_FACTOR = 250
+CAMERA_PATH_RECORD_FILE = None # e.g. "camera_path.json" to record a path for render_benchmark.py --camera-path
 
 # --- World Generation ---
 SUBDIVISION_LEVEL = 3
+WORLD_SEED = 0
+WORLD_CACHE_DIR = "world_cache"
+TERRAIN_LAND_NOISE_OCTAVES = 8
+TERRAIN_HEIGHT_NOISE_OCTAVES = 12
+TERRAIN_LAND_NOISE_SCALE = 0.5
+TERRAIN_HEIGHT_NOISE_SCALE = 2.0
+TERRAIN_LAND_THRESHOLD = 0.05
+TERRAIN_MOUNTAIN_HEIGHT = 0.8
+TERRAIN_HILL_HEIGHT = 0.6
 RIVER_COUNT = 150
+RIVER_MIN_ACCUMULATION_FRACTION = 0.006 # Share of all land vertices that must drain through a vertex before it carries a river
+RIVER_MIN_ACCUMULATION = 2 # Floor for that threshold, in land vertices, on coarse worlds
 RIVER_ELEVATION = 0.98
 RIVER_BASE_WIDTH = 0.002
 RIVER_WIDTH_FACTOR = 0.01
 RIVER_DELTA_LENGTH_FACTOR = 1.5 # Controls the length of the river delta, proportional to its width
-SUBTILE_CACHE_VERSION = 26
+RIVER_DELTA_FLARE_FACTOR = 2.5 # Width of the delta's seaward end relative to the river mouth
+RIVER_SURFACE_LIFT = 1.0015 # Radius river strips are drawn at, just above the tile surface
+SUBTILE_CACHE_VERSION = 29
 SUBTILE_MIN_DISTANCE_FACTOR = 0.16
 SUBTILE_EDGE_POINT_SPACING_FACTOR = 0.25
 SUBTILE_MAX_INTERIOR_POINTS = 96
@@ -76,6 +91,9 @@ SUBTILE_BACKGROUND_WORKERS = 0
 SUBTILE_RESERVED_CPU_CORES = 2
 SUBTILE_MAX_BACKGROUND_WORKERS = 8
 SUBTILE_MAX_IN_FLIGHT_TASKS = 18
+SUBTILE_MATERIALIZED_TILE_LIMIT = 2048 # Tiles whose subtiles are kept as SubTile objects; the rest stay serialized
+SUBTILE_METRICS_LOG_INTERVAL = 10.0 # Seconds between worker pool JSON log lines, 0 disables them
+SUBTILE_METRICS_LOG_FILE = None # Append the JSON lines to this file instead of printing them
 SUBTILE_PRECOMPUTE_ALL_ON_START = True
 SUBTILE_PRECOMPUTE_WORKERS = 0
 SUBTILE_PRECOMPUTE_PROGRESS_STEP = 500
@@ -84,6 +102,11 @@ SUBTILE_DEBUG_DRAW_POINTS = False
 SUBTILE_DEBUG_POINT_SIZE = 10.0
 SUBTILE_DEBUG_POINT_COLOR = (255, 245, 60)
 
+# --- Pathfinding ---
+PATHFINDING_CLUSTER_LEVEL_OFFSET = 3
+PATHFINDING_REFINE_CLUSTER_LOOKAHEAD = 2
+PATHFINDING_ABSTRACT_PATH_CACHE_SIZE = 512
+
 # --- Battle Field ---
 BATTLE_FIELD_VIEW_SCALE = 0.86
 BATTLE_FIELD_HEX_RADIUS_FACTOR = 0.016
@@ -108,6 +131,19 @@ BATTLE_FIELD_CONTEXT_RADIUS_FACTOR = 2.4
 BATTLE_FIELD_CONTEXT_HEX_DEPTH_RADIUS = 7.0
 BATTLE_FIELD_CONTEXT_HEX_MAX_ALPHA = 0.34
 BATTLE_FIELD_CONTEXT_HEX_MIN_ALPHA = 0.03
+BATTLE_FIELD_BACKGROUND_PRECOMPUTE = True
+BATTLE_FIELD_PRECOMPUTE_FOCUS_TILES = 3
+BATTLE_FIELD_MAX_IN_FLIGHT_TASKS = 6
+
+# --- Profiling ---
+PROFILER_ENABLED = True
+PROFILER_HISTORY_FRAMES = 240 # Frames of per-scope timings behind the F3 breakdown
+PROFILER_TRACE_EVENT_LIMIT = 200000 # Most recent scope events kept for the Chrome trace dump
+PROFILER_TRACE_DIR = "profiler_traces"
+
+# --- Assets ---
+ASSET_CACHE_DIR = "asset_cache"
+ASSET_CACHE_VERSION = 1
 
 # --- Lighting ---
 LIGHT_SOURCE_VECTOR = np.array([0.8, 0.5, -0.8])
@@ -0,0 +1,123 @@
+import functools
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import config as cfg
+
+
+class FrameProfiler:
+    """Scoped timers for the per-frame hot path.
+
+    Each scope's inclusive time is summed per frame into a ring buffer of the
+    last `history` frames, which feeds the F3 overlay. Every scope call is also
+    kept as a Chrome trace event (bounded by `trace_event_limit`), so a spike
+    can be dumped and opened in chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, history=cfg.PROFILER_HISTORY_FRAMES, trace_event_limit=cfg.PROFILER_TRACE_EVENT_LIMIT, enabled=cfg.PROFILER_ENABLED):
+        self.enabled = enabled
+        self.history = history
+        self.scope_history = {}
+        self.frame_history = np.zeros(history, dtype=np.float64)
+        self.frame_index = -1
+        self.frame_count = 0
+        self.frame_start = None
+        self.current_frame_times = {}
+        self.trace_events = deque(maxlen=trace_event_limit)
+        self.origin = time.perf_counter()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_index = (self.frame_index + 1) % self.history
+        self.frame_count += 1
+        self.current_frame_times = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end_time = time.perf_counter()
+        self.frame_history[self.frame_index] = (end_time - self.frame_start) * 1000.0
+        self._add_trace_event("frame", self.frame_start, end_time)
+
+        for name, times in self.scope_history.items():
+            times[self.frame_index] = self.current_frame_times.get(name, 0.0)
+        for name, elapsed_ms in self.current_frame_times.items():
+            if name not in self.scope_history:
+                times = np.zeros(self.history, dtype=np.float64)
+                times[self.frame_index] = elapsed_ms
+                self.scope_history[name] = times
+        self.frame_start = None
+
+    @contextmanager
+    def scope(self, name):
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter()
+            self.current_frame_times[name] = self.current_frame_times.get(name, 0.0) + (end_time - start_time) * 1000.0
+            self._add_trace_event(name, start_time, end_time)
+
+    def profiled(self, name):
+        """Decorator form of scope()."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.scope(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _add_trace_event(self, name, start_time, end_time):
+        self.trace_events.append((name, start_time - self.origin, end_time - start_time))
+
+    def get_frame_stats(self):
+        """Returns (last, mean, max) frame milliseconds over the recorded frames."""
+        frames = self._recorded(self.frame_history)
+        if frames.size == 0:
+            return 0.0, 0.0, 0.0
+        return float(self.frame_history[self.frame_index]), float(frames.mean()), float(frames.max())
+
+    def get_scope_stats(self):
+        """Returns (name, last, mean, max) milliseconds per scope, slowest mean first."""
+        stats = []
+        for name, times in self.scope_history.items():
+            recorded = self._recorded(times)
+            stats.append((name, float(times[self.frame_index]), float(recorded.mean()), float(recorded.max())))
+        stats.sort(key=lambda item: item[2], reverse=True)
+        return stats
+
+    def _recorded(self, ring):
+        return ring[:min(self.frame_count, self.history)]
+
+    def write_chrome_trace(self, file_path):
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": "frame" if name == "frame" else "scope",
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": 0,
+            }
+            for name, start, duration in self.trace_events
+        ]
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file_path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+profiler = FrameProfiler()
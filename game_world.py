@@ -3,37 +3,63 @@ from collections import defaultdict
 import numpy as np
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from geometry import Vertex
-from tile import Tile, generate_serialized_subtiles_for_tile
+from tile import Tile, generate_packed_battle_fields_for_tile, generate_serialized_subtiles_for_tile
 from config import TerrainType
 import pickle
 import os
 import time
+from contextlib import contextmanager
 from perlin_noise import PerlinNoise
 from river_generator import RiverGenerator
+from river_mesh import build_river_mesh
 import config as cfg
 from polyhedron_generator import PolyhedronGenerator
 from render_data import RenderData
 from spatial_hash_grid import SpatialHashGrid
-from unit import Unit
+from unit_registry import UnitRegistry
+from hierarchical_pathfinding import HierarchicalPathfinder
+from world_pipeline import WorldPipeline
+from tile_graph import TileGraph
+from frame_profiler import profiler
+from subtile_metrics import SubtileMetrics, run_timed_subtile_task
+from subtile_store import LazySubtiles, SubtileStore
+from subtile_batch import SubtileBatch
 
 class GameWorld:
-    def __init__(self, subdivision_level=cfg.SUBDIVISION_LEVEL):
+    def __init__(self, subdivision_level=cfg.SUBDIVISION_LEVEL, seed=cfg.WORLD_SEED, headless=False):
+        # Headless worlds (worldgen.py) skip the background worker pool, the
+        # start-up subtile precompute and the test unit.
         self.subdivision_level = subdivision_level
+        self.seed = seed
+        self.headless = headless
+        self.stage_timings = {}
         self.tiles = []
-        self.vertices = [] # Tile vertices, also used for river graph
-        self.units = []
-        self.vert_to_tiles = defaultdict(list)
-        self.vert_neighbors = defaultdict(list)
-        self.river_paths = []
-        self.river_flow = {}
+        self.vertices = [] # Tile vertices, also used for river graph; vertex.id indexes this list
+        self.vertex_positions = np.empty((0, 3), dtype=np.float64)
+        self.units = None
+        self.vertex_tile_ids = np.empty((0, 3), dtype=np.int32) # Tiles around each vertex, -1 padded
+        self.vertex_neighbor_ids = np.empty((0, 3), dtype=np.int32) # Vertices joined by a tile edge, -1 padded
+        self.tile_graph = TileGraph(np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32))
+        self.river_paths = [] # Vertex id lists from river head to mouth
+        self.river_flow = np.empty(0, dtype=np.float32) # Accumulated flow per vertex id, 0 off the rivers
+        self.river_segments = np.empty((0, 2), dtype=np.int32) # Downstream edges as indices into self.vertices
+        self.river_segment_flow = np.empty(0, dtype=np.float32)
         self.spatial_hash_grid = None
-        self.subtile_cache_filename = f"subtile_cache_level_{self.subdivision_level}_v{cfg.SUBTILE_CACHE_VERSION}.pkl"
+        self.stage_keys = {}
+        self.subtile_cache_filename = None
+        self.pathfinding_cache_filename = None
         self.subtile_cache = {}
+        self.subtile_store = SubtileStore(self._deserialize_subtiles)
         self.tile_centers = np.empty((0, 3), dtype=np.float32)
+        self.tile_normals = np.empty((0, 3), dtype=np.float32)
         self.tile_center_radius_sq = np.empty(0, dtype=np.float32)
+        self.tile_neighbor_ids = np.empty((0, 6), dtype=np.int32)
+        self.pathfinder = None
         self.pending_cache_save_count = 0
         self.subtile_executor = None
         self.subtile_futures = {}
+        self.battle_field_futures = {}
+        self.subtile_metrics = SubtileMetrics()
 
         # For testing, create one unit
         # This line needs to be placed after tiles are initialized and the world is loaded/generated.
@@ -42,45 +68,95 @@ class GameWorld:
         # A separate edit would be needed to add the `add_unit` method and place this call correctly.
         # self.add_unit(self.tiles[0], owner=None) # For testing
 
-        cache_filename = f"world_cache_level_{self.subdivision_level}.pkl"
-
-        if os.path.exists(cache_filename):
-            print(f"Loading world from cache: {cache_filename}")
-            with open(cache_filename, 'rb') as f:
-                data = pickle.load(f)
-                self.__dict__.update(data)
-            self._build_neighbor_graph()
-            self._build_vertex_neighbors()
-        else:
-            print("Generating new world geometry...")
-            self._create_geometry()
-            self._generate_terrain()
-            self._build_vertex_neighbors()
-            self.river_paths, self.river_flow = self._generate_rivers()
-
-            print(f"Saving world to cache: {cache_filename}")
-            transient_data = {"vert_to_tiles": self.vert_to_tiles}
-            del self.vert_to_tiles
-            with open(cache_filename, 'wb') as f:
-                pickle.dump(self.__dict__, f)
-            self.vert_to_tiles = transient_data["vert_to_tiles"]
+        # Geometry, adjacency, terrain and rivers are cached per stage under
+        # world_cache/; only stages whose inputs changed are regenerated.
+        pipeline = WorldPipeline(self)
+        self.stage_keys = pipeline.run()
+        self.subtile_cache_filename = pipeline.get_stage_cache_filename("subtiles")
+        self.pathfinding_cache_filename = pipeline.get_stage_cache_filename("pathfinding")
 
         self._load_subtile_cache()
         self._build_tile_centers()
-        if cfg.SUBTILE_PRECOMPUTE_ALL_ON_START:
-            self.precompute_all_subtiles()
-        self._start_subtile_executor()
+        self._build_tile_neighbor_ids()
+        self.units = UnitRegistry(self.tiles, self.tile_neighbor_ids, self.tile_centers)
+        if not headless:
+            if cfg.SUBTILE_PRECOMPUTE_ALL_ON_START:
+                self.precompute_all_subtiles()
+            self._start_subtile_executor()
 
         print(f"World created with {len(self.tiles)} tiles.")
 
-        print("Building spatial hash grid...")
-        self.spatial_hash_grid = SpatialHashGrid(self.tiles)
+        if not headless:
+            print("Building spatial hash grid...")
+            self.spatial_hash_grid = SpatialHashGrid(self.tiles)
 
-        self.add_unit(self.tiles[0], owner=None)
+            self.add_unit(self.tiles[0], owner=None)
+
+    @contextmanager
+    def _timed_stage(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_timings[name] = self.stage_timings.get(name, 0.0) + time.perf_counter() - start_time
 
     def add_unit(self, tile, owner):
-        unit = Unit(tile, owner)
-        self.units.append(unit)
+        return self.units.add_unit(tile.id, owner)
+
+    def get_unit_on_tile(self, tile):
+        return self.units.unit_at(tile.id)
+
+    def move_units(self, units, target_tiles):
+        return self.units.move_units(
+            [unit.id for unit in units],
+            [tile.id for tile in target_tiles]
+        )
+
+    def get_pathfinder(self):
+        if self.pathfinder is not None:
+            return self.pathfinder
+
+        cluster_level = max(0, self.subdivision_level - cfg.PATHFINDING_CLUSTER_LEVEL_OFFSET)
+        cache_filename = self.pathfinding_cache_filename
+        graph = None
+        if os.path.exists(cache_filename):
+            try:
+                with open(cache_filename, 'rb') as f:
+                    graph = pickle.load(f)
+            except Exception as exc:
+                print(f"Could not load pathfinding cache: {exc}")
+            if graph is not None and graph.get("tile_count") != len(self.tiles):
+                graph = None
+
+        start_time = time.perf_counter()
+        self.pathfinder = HierarchicalPathfinder(self.tile_centers, self.tile_neighbor_ids, cluster_level, graph)
+        if graph is None:
+            temp_filename = f"{cache_filename}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+                with open(temp_filename, 'wb') as f:
+                    pickle.dump(self.pathfinder.graph, f)
+                os.replace(temp_filename, cache_filename)
+            except Exception as exc:
+                print(f"Could not save pathfinding cache: {exc}")
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"Pathfinder ready: {self.pathfinder.cluster_count} clusters at level {cluster_level} "
+            f"in {elapsed:.2f}s."
+        )
+        return self.pathfinder
+
+    def find_path(self, start_tile, target_tile):
+        path = self.get_pathfinder().find_path(start_tile.id, target_tile.id)
+        if path is None:
+            return None
+        return [self.tiles[tile_id] for tile_id in path]
+
+    def move_unit_toward(self, unit, target_tile):
+        next_tile_id = self.get_pathfinder().get_next_step(unit.tile.id, target_tile.id)
+        if next_tile_id is None:
+            return False
+        return unit.move_to(self.tiles[next_tile_id])
 
     def get_render_data(self):
         tile_vertices, tile_colors, tile_normals, edge_vertices = [], [], [], []
@@ -103,16 +179,7 @@ class GameWorld:
                 v_end = tile.vertices[(j + 1) % len(tile.vertices)].to_np()
                 edge_vertices.extend([v_start, v_end])
 
-        river_vertices, river_colors = [], []
-        if self.river_paths:
-            base_color = cfg.RIVER_COLOR / 255.0
-            for path in self.river_paths:
-                if len(path) < 2: continue
-                for i in range(len(path) - 1):
-                    v1 = path[i]
-                    v2 = path[i+1]
-                    river_vertices.extend([v1.to_np(), v2.to_np()])
-                    river_colors.extend([base_color, base_color])
+        river_vertices, river_colors = build_river_mesh(self.vertex_positions, self.river_segments, self.river_segment_flow)
 
         return RenderData(
             tile_vertices=np.array(tile_vertices, dtype=np.float32),
@@ -126,39 +193,56 @@ class GameWorld:
             river_colors=np.array(river_colors, dtype=np.float32)
         )
 
-    def _generate_terrain(self):
-        self._build_neighbor_graph()
-        self._assign_terrain_and_heights()
-
     def _build_neighbor_graph(self):
         print("Building tile neighbor graph...")
-        self.vert_to_tiles.clear()
-        for tile in self.tiles:
-            for v in tile.vertices:
-                self.vert_to_tiles[v].append(tile)
+        ring_vertex_ids, ring_tile_ids, _ = self._get_tile_vertex_rings()
+        self.vertex_tile_ids = self._group_padded(ring_vertex_ids, ring_tile_ids, len(self.vertices))
+        self._attach_tile_graph(
+            TileGraph.from_tile_rings(ring_tile_ids, ring_vertex_ids, self.vertex_tile_ids, len(self.tiles))
+        )
 
+    def _attach_tile_graph(self, tile_graph):
+        tile_graph.tiles = self.tiles
+        self.tile_graph = tile_graph
         for tile in self.tiles:
-            tile.neighbors = []
-            for v in tile.vertices:
-                for neighbor in self.vert_to_tiles[v]:
-                    if neighbor != tile and neighbor not in tile.neighbors:
-                        tile.neighbors.append(neighbor)
+            tile.graph = tile_graph
+            tile._neighbors = None
 
     def _build_vertex_neighbors(self):
         print("Building vertex neighbor graph...")
-        vert_neighbors_sets = defaultdict(set)
-        for tile in self.tiles:
-            for i in range(len(tile.vertices)):
-                v1 = tile.vertices[i]
-                v2 = tile.vertices[(i + 1) % len(tile.vertices)]
-                vert_neighbors_sets[v1].add(v2)
-                vert_neighbors_sets[v2].add(v1)
-        self.vert_neighbors = {v: list(neighbors) for v, neighbors in vert_neighbors_sets.items()}
+        ring_vertex_ids, _, next_ring_positions = self._get_tile_vertex_rings()
+        edge_starts = ring_vertex_ids.astype(np.int64)
+        edge_ends = ring_vertex_ids[next_ring_positions].astype(np.int64)
+        vertex_count = len(self.vertices)
+        edge_keys = np.unique(np.concatenate((edge_starts * vertex_count + edge_ends, edge_ends * vertex_count + edge_starts)))
+        self.vertex_neighbor_ids = self._group_padded(edge_keys // vertex_count, edge_keys % vertex_count, vertex_count)
+
+    def _get_tile_vertex_rings(self):
+        """Every tile's vertex ring concatenated: vertex ids, owning tile ids and the position of the next ring vertex."""
+        ring_lengths = np.array([len(tile.vertex_ids) for tile in self.tiles], dtype=np.int64)
+        ring_vertex_ids = np.concatenate([tile.vertex_ids for tile in self.tiles])
+        ring_tile_ids = np.repeat(np.arange(len(self.tiles), dtype=np.int32), ring_lengths)
+        ring_ends = np.cumsum(ring_lengths) - 1
+        next_ring_positions = np.arange(len(ring_vertex_ids)) + 1
+        next_ring_positions[ring_ends] = ring_ends - ring_lengths + 1
+        return ring_vertex_ids, ring_tile_ids, next_ring_positions
+
+    def _group_padded(self, keys, values, key_count):
+        """Groups values by integer key into a (key_count, max group size) array padded with -1."""
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        counts = np.bincount(keys, minlength=key_count)
+        group_starts = np.cumsum(counts) - counts
+        columns = np.arange(len(keys)) - group_starts[keys]
+        padded = np.full((key_count, max(1, int(counts.max(initial=0)))), -1, dtype=np.int32)
+        padded[keys, columns] = values
+        return padded
 
     def _generate_rivers(self, num_rivers=cfg.RIVER_COUNT):
         print(f"Generating rivers...")
-        river_gen = RiverGenerator(self.vertices, self.vert_to_tiles, self.vert_neighbors)
-        return river_gen.generate_rivers(num_rivers)
+        river_gen = RiverGenerator(self.vertex_positions, self.vertex_tile_ids, self.vertex_neighbor_ids, self.tiles)
+        self.river_paths, self.river_flow = river_gen.generate_rivers(num_rivers)
+        self.river_segments, self.river_segment_flow = river_gen.get_river_segments()
 
     def precompute_all_subtiles(self):
         start_time = time.perf_counter()
@@ -236,6 +320,42 @@ class GameWorld:
             f"{completed_count} generated, {failed_count} failed, total time {elapsed:.2f}s."
         )
 
+    def precompute_all_battle_fields(self):
+        start_time = time.perf_counter()
+        tiles = [
+            tile for tile in self.tiles
+            if tile.subtiles and not self._has_all_battle_fields(tile)
+        ]
+        print(f"Precomputing battle fields for {len(tiles)} tiles...")
+        if not tiles:
+            return
+
+        completed_count = 0
+        progress_step = max(1, int(cfg.SUBTILE_PRECOMPUTE_PROGRESS_STEP))
+        worker_count = self._get_subtile_precompute_worker_count(len(tiles))
+        with ProcessPoolExecutor(max_workers=worker_count) as executor:
+            futures = {}
+            for tile in tiles:
+                vertex_snapshot = self._get_subtile_vertex_snapshot(tile)
+                future = executor.submit(generate_packed_battle_fields_for_tile, tile.id, vertex_snapshot)
+                futures[future] = vertex_snapshot
+
+            for future in as_completed(futures):
+                try:
+                    tile_id, packed_battle_fields = future.result()
+                except Exception as exc:
+                    print(f"Could not precompute battle fields: {exc}")
+                    continue
+
+                self._apply_packed_battle_fields(self.tiles[tile_id], futures[future], packed_battle_fields)
+                completed_count += 1
+                if completed_count % progress_step == 0 or completed_count == len(tiles):
+                    elapsed = time.perf_counter() - start_time
+                    print(f"Battle field precompute: {completed_count}/{len(tiles)} tiles in {elapsed:.2f}s.")
+
+        self._save_subtile_cache()
+        self.pending_cache_save_count = 0
+
     def _get_subtile_precompute_worker_count(self, task_count):
         if cfg.SUBTILE_PRECOMPUTE_WORKERS > 0:
             return max(1, min(int(cfg.SUBTILE_PRECOMPUTE_WORKERS), task_count))
@@ -245,8 +365,11 @@ class GameWorld:
         usable_cores = max(1, cpu_count - reserved_cores)
         return max(1, min(usable_cores, task_count))
 
+    @profiler.profiled("ensure_subtiles_generated")
     def ensure_subtiles_generated(self, tiles):
         self._collect_completed_subtile_tasks()
+        metrics = self.subtile_metrics
+        metrics.record_queue_depth(len(self.subtile_futures))
         submitted_tile_ids = set()
 
         for tile in tiles:
@@ -255,6 +378,7 @@ class GameWorld:
 
             cached_subtiles = self.subtile_cache.get(tile.id)
             if cached_subtiles is not None:
+                metrics.count("cache_hits")
                 self._apply_serialized_subtiles(tile, cached_subtiles)
                 self._polish_tile_edges_with_generated_neighbors(tile)
                 continue
@@ -262,14 +386,87 @@ class GameWorld:
             if tile.id in self.subtile_futures:
                 continue
             if len(self.subtile_futures) >= cfg.SUBTILE_MAX_IN_FLIGHT_TASKS:
+                metrics.count("throttled")
                 break
 
             if any(neighbor.id in self.subtile_futures or neighbor.id in submitted_tile_ids for neighbor in tile.neighbors):
+                metrics.count("deferred_for_neighbors")
                 continue
 
+            metrics.count("cache_misses")
             self._submit_subtile_task(tile)
             submitted_tile_ids.add(tile.id)
 
+        metrics.log_if_due()
+
+    def request_battle_fields(self, tiles):
+        # Battle fields for subtiles around the selection and camera focus are
+        # built by the subtile workers, so entering battle mode only unpacks them.
+        self._collect_completed_battle_field_tasks()
+        if self.subtile_executor is None:
+            return
+
+        missing_subtile_tiles = [tile for tile in tiles if not tile.subtiles]
+        if missing_subtile_tiles:
+            self.ensure_subtiles_generated(missing_subtile_tiles)
+
+        for tile in tiles:
+            if len(self.battle_field_futures) >= cfg.BATTLE_FIELD_MAX_IN_FLIGHT_TASKS:
+                break
+            if not tile.subtiles or tile.id in self.battle_field_futures or tile.id in self.subtile_futures:
+                continue
+            if self._has_all_battle_fields(tile):
+                continue
+            self._submit_battle_field_task(tile)
+
+    def _has_all_battle_fields(self, tile):
+        subtiles = tile.subtiles
+        if isinstance(subtiles, LazySubtiles) and not subtiles.is_materialized():
+            return bool(np.all(subtiles.source.battle_field_ids >= 0))
+        return all(subtile.has_battle_field() for subtile in subtiles)
+
+    def _submit_battle_field_task(self, tile):
+        vertex_snapshot = self._get_subtile_vertex_snapshot(tile)
+        future = self.subtile_executor.submit(generate_packed_battle_fields_for_tile, tile.id, vertex_snapshot)
+        self.battle_field_futures[tile.id] = (future, vertex_snapshot)
+
+    def _collect_completed_battle_field_tasks(self):
+        if not self.battle_field_futures:
+            return
+
+        completed_tile_ids = [
+            tile_id
+            for tile_id, (future, _) in self.battle_field_futures.items()
+            if future.done()
+        ]
+        for tile_id in completed_tile_ids:
+            future, vertex_snapshot = self.battle_field_futures.pop(tile_id)
+            try:
+                _, packed_battle_fields = future.result()
+            except Exception as exc:
+                print(f"Could not generate battle fields for tile {tile_id}: {exc}")
+                continue
+            self._apply_packed_battle_fields(self.tiles[tile_id], vertex_snapshot, packed_battle_fields)
+
+    def _apply_packed_battle_fields(self, tile, vertex_snapshot, packed_battle_fields):
+        # Edge polishing may have moved subtile vertices while the task ran;
+        # those subtiles keep building their battle field on demand.
+        if len(tile.subtiles) != len(vertex_snapshot):
+            return
+
+        applied_count = 0
+        for subtile, vertices, packed_battle_field in zip(tile.subtiles, vertex_snapshot, packed_battle_fields):
+            if subtile.has_battle_field():
+                continue
+            if not np.array_equal(np.asarray(subtile.vertices, dtype=np.float32), vertices):
+                continue
+            subtile.packed_battle_field = packed_battle_field
+            applied_count += 1
+
+        if applied_count > 0:
+            self._store_tile_subtiles(tile)
+
+    @profiler.profiled("get_visible_tiles_for_subtiles")
     def get_visible_tiles_for_subtiles(
         self,
         camera,
@@ -336,12 +533,26 @@ class GameWorld:
         if not isinstance(cache_data, dict):
             return
 
+        legacy_tile_ids = [
+            tile_id for tile_id, entry in cache_data.items()
+            if not isinstance(entry, SubtileBatch)
+        ]
+        for tile_id in legacy_tile_ids:
+            cache_data[tile_id] = SubtileBatch.from_serialized(cache_data[tile_id])
+        if legacy_tile_ids:
+            print(f"Converted {len(legacy_tile_ids)} subtile cache entries to subtile batches.")
+            self.pending_cache_save_count += len(legacy_tile_ids)
+
         self.subtile_cache = cache_data
 
     def _save_subtile_cache(self):
+        # Written through a temp file so parallel worldgen jobs sharing a
+        # level never leave a half-written cache behind.
+        temp_filename = f"{self.subtile_cache_filename}.{os.getpid()}.tmp"
         try:
-            with open(self.subtile_cache_filename, 'wb') as f:
-                pickle.dump(self.subtile_cache, f)
+            with open(temp_filename, 'wb') as f:
+                pickle.dump(self.subtile_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_filename, self.subtile_cache_filename)
         except Exception as exc:
             print(f"Could not save subtile cache: {exc}")
 
@@ -353,10 +564,10 @@ class GameWorld:
 
     def shutdown(self):
         if self.subtile_executor is not None:
-            remaining_futures = list(self.subtile_futures.values())
-            for future in remaining_futures:
+            for tile_id, future in list(self.subtile_futures.items()):
                 try:
-                    tile_id, serialized_subtiles = future.result()
+                    (_, serialized_subtiles), start_time, compute_seconds, payload_bytes = future.result()
+                    self.subtile_metrics.record_complete(tile_id, start_time, compute_seconds, payload_bytes)
                     self.subtile_cache[tile_id] = serialized_subtiles
                     self._apply_serialized_subtiles(self.tiles[tile_id], serialized_subtiles)
                     self._polish_tile_edges_with_generated_neighbors(self.tiles[tile_id])
@@ -364,6 +575,13 @@ class GameWorld:
                 except Exception as exc:
                     print(f"Could not finish subtile task during shutdown: {exc}")
             self.subtile_futures.clear()
+            for tile_id, (future, vertex_snapshot) in list(self.battle_field_futures.items()):
+                try:
+                    _, packed_battle_fields = future.result()
+                    self._apply_packed_battle_fields(self.tiles[tile_id], vertex_snapshot, packed_battle_fields)
+                except Exception as exc:
+                    print(f"Could not finish battle field task during shutdown: {exc}")
+            self.battle_field_futures.clear()
             self.subtile_executor.shutdown(wait=True, cancel_futures=False)
             self.subtile_executor = None
         self.flush_subtile_cache()
@@ -371,15 +589,21 @@ class GameWorld:
     def _build_tile_centers(self):
         if not self.tiles:
             self.tile_centers = np.empty((0, 3), dtype=np.float32)
+            self.tile_normals = np.empty((0, 3), dtype=np.float32)
             self.tile_center_radius_sq = np.empty(0, dtype=np.float32)
             return
         self.tile_centers = np.array([tile.center for tile in self.tiles], dtype=np.float32)
+        self.tile_normals = np.array([tile.normal for tile in self.tiles], dtype=np.float32)
         self.tile_center_radius_sq = np.einsum("ij,ij->i", self.tile_centers, self.tile_centers).astype(np.float32)
 
+    def _build_tile_neighbor_ids(self):
+        self.tile_neighbor_ids = self.tile_graph.to_padded(6)
+
     def _start_subtile_executor(self):
         worker_count = self._get_subtile_worker_count()
         print(f"Starting subtile executor with {worker_count} worker(s).")
         self.subtile_executor = ProcessPoolExecutor(max_workers=worker_count)
+        self.subtile_metrics.worker_count = worker_count
 
     def _get_subtile_worker_count(self):
         if cfg.SUBTILE_BACKGROUND_WORKERS > 0:
@@ -395,6 +619,7 @@ class GameWorld:
             return
 
         future = self.subtile_executor.submit(
+            run_timed_subtile_task,
             generate_serialized_subtiles_for_tile,
             tile.id,
             [vertex.to_np() for vertex in tile.vertices],
@@ -407,6 +632,7 @@ class GameWorld:
             []
         )
         self.subtile_futures[tile.id] = future
+        self.subtile_metrics.record_submit(tile.id)
 
     def _get_neighbor_subtile_edge_points(self, tile):
         forced_points = []
@@ -480,6 +706,7 @@ class GameWorld:
         closest = segment_start + segment * t
         return float(np.sum((point - closest) * (point - closest)))
 
+    @profiler.profiled("collect_completed_subtile_tasks")
     def _collect_completed_subtile_tasks(self):
         if not self.subtile_futures:
             return
@@ -490,10 +717,12 @@ class GameWorld:
                 continue
             completed_tile_ids.append(tile_id)
             try:
-                _, serialized_subtiles = future.result()
+                (_, serialized_subtiles), start_time, compute_seconds, payload_bytes = future.result()
             except Exception as exc:
+                self.subtile_metrics.record_failure(tile_id)
                 print(f"Could not generate subtiles for tile {tile_id}: {exc}")
                 continue
+            self.subtile_metrics.record_complete(tile_id, start_time, compute_seconds, payload_bytes)
 
             self.subtile_cache[tile_id] = serialized_subtiles
             self._apply_serialized_subtiles(self.tiles[tile_id], serialized_subtiles)
@@ -507,148 +736,66 @@ class GameWorld:
         if hasattr(tile_or_subtiles, "subtiles"):
             subtiles = tile_or_subtiles.subtiles
             seed_points = getattr(tile_or_subtiles, "subtile_seed_points", [])
+            tile_ring = [vertex.to_np() for vertex in tile_or_subtiles.vertices]
         else:
             subtiles = tile_or_subtiles
             seed_points = []
+            tile_ring = None
+        return SubtileBatch.from_subtiles(subtiles, seed_points, tile_ring)
+
+    def _apply_serialized_subtiles(self, tile, subtile_batch):
+        # SubTile objects are only built once something iterates the tile's
+        # subtiles; see SubtileStore.
+        tile.subtiles = self.subtile_store.wrap(tile.id, subtile_batch, len(subtile_batch))
+        tile.subtile_seed_points = subtile_batch.seed_points
+
+    def _store_tile_subtiles(self, tile):
+        # The live SubTile objects stay resident; the new cache entry is what
+        # they are rebuilt from once the store evicts them.
+        subtiles = list(tile.subtiles)
+        subtile_batch = self._serialize_subtiles(tile)
+        self.subtile_cache[tile.id] = subtile_batch
+        tile.subtiles = self.subtile_store.wrap(tile.id, subtile_batch, len(subtiles), subtiles)
+        self.pending_cache_save_count += 1
 
-        return {
-            "subtiles": [
-                self._serialize_subtile(subtile)
-                for subtile in subtiles
-            ],
-            "seed_points": [
-                np.asarray(point, dtype=np.float32)
-                for point in seed_points
-            ],
-        }
-
-    def _serialize_subtile(self, subtile):
-        return {
-            "vertices": [
-                np.asarray(vertex, dtype=np.float32)
-                for vertex in subtile.vertices
-            ],
-            "battle_field": self._serialize_battle_field(subtile.battle_field),
-        }
-
-    def _serialize_battle_field(self, battle_field):
-        if battle_field is None:
-            return None
-
-        return {
-            "polygon": [
-                np.asarray(point, dtype=np.float32)
-                for point in battle_field.get("polygon", [])
-            ],
-            "hexes": [
-                self._serialize_battle_hex(hex_entry)
-                for hex_entry in battle_field.get("hexes", [])
-            ],
-            "hex_radius": float(battle_field.get("hex_radius", 0.0)),
-        }
-
-    def _serialize_battle_hex(self, hex_entry):
-        if isinstance(hex_entry, dict):
-            return {
-                "polygon": [
-                    np.asarray(point, dtype=np.float32)
-                    for point in hex_entry.get("polygon", [])
-                ],
-                "clipped_polygon": [
-                    np.asarray(point, dtype=np.float32)
-                    for point in hex_entry.get("clipped_polygon", [])
-                ],
-                "center": np.asarray(hex_entry.get("center", [0.0, 0.0]), dtype=np.float32),
-                "coverage": float(hex_entry.get("coverage", 1.0)),
-            }
-
-        return [
-            np.asarray(point, dtype=np.float32)
-            for point in hex_entry
-        ]
-
-    def _apply_serialized_subtiles(self, tile, serialized_subtiles):
-        tile.subtiles = self._deserialize_subtiles(serialized_subtiles)
-        tile.subtile_seed_points = self._deserialize_subtile_seed_points(serialized_subtiles)
-
-    def _get_serialized_subtile_polygons(self, serialized_subtiles):
-        if isinstance(serialized_subtiles, dict):
-            return serialized_subtiles.get("subtiles", [])
-        return serialized_subtiles
-
-    def _deserialize_subtile_seed_points(self, serialized_subtiles):
-        if not isinstance(serialized_subtiles, dict):
-            return []
-
-        return [
-            np.asarray(point, dtype=np.float32)
-            for point in serialized_subtiles.get("seed_points", [])
-        ]
-
-    def _deserialize_subtiles(self, serialized_subtiles):
+    def get_subtile_batch(self, tile):
+        """The tile's subtiles as a SubtileBatch, without materializing SubTile objects."""
+        subtiles = tile.subtiles
+        if isinstance(subtiles, LazySubtiles):
+            # Resident subtiles have the same polygons as their source: every
+            # edit is stored back through _store_tile_subtiles.
+            return subtiles.source
+        return SubtileBatch.from_subtiles(subtiles)
+
+    def get_subtile_edge_vertices(self, tile):
+        """The tile's subtile edge buffer in GL_LINES layout, built once and kept in the cache entry."""
+        subtile_batch = self.get_subtile_batch(tile)
+        if subtile_batch.edge_vertices is None:
+            subtile_batch.build_edge_vertices([vertex.to_np() for vertex in tile.vertices])
+            if self.subtile_cache.get(tile.id) is subtile_batch:
+                self.pending_cache_save_count += 1
+        return subtile_batch.edge_vertices
+
+    def _get_subtile_vertex_snapshot(self, tile):
+        subtile_batch = self.get_subtile_batch(tile)
+        return [polygon.copy() for polygon in subtile_batch.get_polygons()]
+
+    def _deserialize_subtiles(self, subtile_batch):
         from tile import SubTile
 
-        subtiles = []
-        for serialized_subtile in self._get_serialized_subtile_polygons(serialized_subtiles):
-            if isinstance(serialized_subtile, dict):
-                polygon = serialized_subtile.get("vertices", [])
-                battle_field = self._deserialize_battle_field(serialized_subtile.get("battle_field"))
-            else:
-                polygon = serialized_subtile
-                battle_field = None
-
-            subtiles.append(
-                SubTile(
-                    vertices=[
-                        np.asarray(vertex, dtype=np.float32)
-                        for vertex in polygon
-                    ],
-                    color=np.array([0, 0, 0], dtype=np.float32),
-                    battle_field=battle_field
-                )
-            )
-
-        return subtiles
-
-    def _deserialize_battle_field(self, battle_field):
-        if battle_field is None:
-            return None
-
-        return {
-            "polygon": [
-                np.asarray(point, dtype=np.float32)
-                for point in battle_field.get("polygon", [])
-            ],
-            "hexes": [
-                self._deserialize_battle_hex(hex_entry)
-                for hex_entry in battle_field.get("hexes", [])
-            ],
-            "hex_radius": float(battle_field.get("hex_radius", 0.0)),
-        }
-
-    def _deserialize_battle_hex(self, hex_entry):
-        if isinstance(hex_entry, dict):
-            return {
-                "polygon": [
-                    np.asarray(point, dtype=np.float32)
-                    for point in hex_entry.get("polygon", [])
-                ],
-                "clipped_polygon": [
-                    np.asarray(point, dtype=np.float32)
-                    for point in hex_entry.get("clipped_polygon", [])
-                ],
-                "center": np.asarray(hex_entry.get("center", [0.0, 0.0]), dtype=np.float32),
-                "coverage": float(hex_entry.get("coverage", 1.0)),
-            }
-
+        # Vertices and packed battle fields are views into the batch arrays;
+        # edits replace list items, so the batch itself is never written to.
         return [
-            np.asarray(point, dtype=np.float32)
-            for point in hex_entry
+            SubTile(
+                vertices=list(polygon),
+                color=subtile_batch.colors[index],
+                packed_battle_field=subtile_batch.get_packed_battle_field(index)
+            )
+            for index, polygon in enumerate(subtile_batch.get_polygons())
         ]
 
     def persist_tile_subtiles(self, tile):
-        self.subtile_cache[tile.id] = self._serialize_subtiles(tile)
-        self.pending_cache_save_count += 1
+        self._store_tile_subtiles(tile)
         self._save_subtile_cache()
         self.pending_cache_save_count = 0
 
@@ -685,14 +832,14 @@ class GameWorld:
 
         for changed_tile in changed_tiles:
             changed_tile.subtile_version = getattr(changed_tile, "subtile_version", 0) + 1
-            self.subtile_cache[changed_tile.id] = self._serialize_subtiles(changed_tile)
-            self.pending_cache_save_count += 1
+            self._store_tile_subtiles(changed_tile)
 
     def _regenerate_tile_subtiles_from_generated_neighbors(self, tile):
         forced_edge_points = self._get_neighbor_subtile_edge_points(tile)
         if not forced_edge_points:
             return
 
+        start_time = time.perf_counter()
         tile.generate_subtiles(
             min_distance_factor=cfg.SUBTILE_MIN_DISTANCE_FACTOR,
             edge_spacing_factor=cfg.SUBTILE_EDGE_POINT_SPACING_FACTOR,
@@ -701,9 +848,9 @@ class GameWorld:
             max_stagnation=cfg.SUBTILE_MAX_STAGNATION,
             forced_edge_points=forced_edge_points
         )
+        self.subtile_metrics.record_regeneration(time.perf_counter() - start_time)
         tile.subtile_version = getattr(tile, "subtile_version", 0) + 1
-        self.subtile_cache[tile.id] = self._serialize_subtiles(tile)
-        self.pending_cache_save_count += 1
+        self._store_tile_subtiles(tile)
 
     def _shared_subtile_edge_is_mismatched(self, tile, neighbor, shared_edge):
         edge_start, edge_end = shared_edge
@@ -882,20 +1029,20 @@ class GameWorld:
 
     def _assign_terrain_and_heights(self):
         print("Assigning terrain and heights...")
-        land_noise = PerlinNoise(octaves=8, seed=1)
-        height_noise = PerlinNoise(octaves=12, seed=2)
+        land_noise = PerlinNoise(octaves=cfg.TERRAIN_LAND_NOISE_OCTAVES, seed=1 + 2 * self.seed)
+        height_noise = PerlinNoise(octaves=cfg.TERRAIN_HEIGHT_NOISE_OCTAVES, seed=2 + 2 * self.seed)
 
         for tile in self.tiles:
             tile_center = tile.center
-            is_land = land_noise((tile_center * 0.5).tolist()) > 0.05
+            is_land = land_noise((tile_center * cfg.TERRAIN_LAND_NOISE_SCALE).tolist()) > cfg.TERRAIN_LAND_THRESHOLD
             lat = math.asin(tile_center[1]) * 180 / math.pi
 
             if is_land:
-                tile.height = (height_noise((tile_center * 2.0).tolist()) + 1) / 2
+                tile.height = (height_noise((tile_center * cfg.TERRAIN_HEIGHT_NOISE_SCALE).tolist()) + 1) / 2
                 if abs(lat) > 75: tile.terrain_type = TerrainType.SNOW
                 elif abs(lat) > 60: tile.terrain_type = TerrainType.TUNDRA
-                elif tile.height > 0.8: tile.terrain_type = TerrainType.MOUNTAINS
-                elif tile.height > 0.6: tile.terrain_type = TerrainType.HILLS
+                elif tile.height > cfg.TERRAIN_MOUNTAIN_HEIGHT: tile.terrain_type = TerrainType.MOUNTAINS
+                elif tile.height > cfg.TERRAIN_HILL_HEIGHT: tile.terrain_type = TerrainType.HILLS
                 elif abs(lat) > 45: tile.terrain_type = TerrainType.FOREST
                 elif abs(lat) > 30: tile.terrain_type = TerrainType.GRASSLAND
                 elif abs(lat) > 15: tile.terrain_type = TerrainType.SAVANNA
@@ -910,10 +1057,10 @@ class GameWorld:
 
     def _create_geometry(self):
         poly_gen = PolyhedronGenerator()
-        self.vertices, vert_to_face_idx_map, face_centroid_map = poly_gen.create_goldberg_polyhedron(self.subdivision_level)
+        self.vertices, geodesic_vertex_faces, face_centroid_map = poly_gen.create_goldberg_polyhedron(self.subdivision_level)
 
         tile_id_counter = 0
-        for geo_vert, face_indices in vert_to_face_idx_map.items():
+        for geo_vert, face_indices in geodesic_vertex_faces:
             new_face_verts_unsorted = [face_centroid_map[i] for i in face_indices]
             normal = geo_vert.to_np()
             u_axis = np.cross(normal, [0, 1, 0])
@@ -932,3 +1079,11 @@ class GameWorld:
 
             self.tiles.append(Tile(tile_id_counter, new_face_verts_sorted, face_normal))
             tile_id_counter += 1
+        self._index_vertices()
+
+    def _index_vertices(self):
+        for index, vertex in enumerate(self.vertices):
+            vertex.id = index
+        self.vertex_positions = np.array([(v.x, v.y, v.z) for v in self.vertices], dtype=np.float64).reshape(-1, 3)
+        for tile in self.tiles:
+            tile.vertex_ids = np.array([vertex.id for vertex in tile.vertices], dtype=np.int32)
@@ -1,10 +1,40 @@
 import math
 import numpy as np
 
+KEY_SCALE = 100000.0 # Coordinates are compared at 5 decimal places
+KEY_BITS = 21
+KEY_OFFSET = 1 << (KEY_BITS - 1)
+
+def quantize_key(x, y, z, scale=KEY_SCALE, offset=KEY_OFFSET, floor=math.floor):
+    """Packs the coordinates, rounded to 5 decimals, into one 63-bit integer.
+
+    Exact for coordinates within +-10, which covers every point on the unit sphere.
+    """
+    return (
+        (floor(x * scale + 0.5) + offset) << (2 * KEY_BITS) |
+        (floor(y * scale + 0.5) + offset) << KEY_BITS |
+        (floor(z * scale + 0.5) + offset)
+    )
+
+def unit_vertex(x, y, z, id=-1):
+    """Vertex for the direction (x, y, z), normalized before its key is computed."""
+    length = math.sqrt(x**2 + y**2 + z**2)
+    if length > 0:
+        x, y, z = x / length, y / length, z / length
+    return Vertex(x, y, z, id)
+
 class Vertex:
-    def __init__(self, x, y, z):
+    """A point on the sphere. World vertices also carry their index in GameWorld.vertices.
+
+    Equality and hashing use the precomputed quantized key, so vertices that
+    agree to 5 decimal places are the same dict key.
+    """
+    __slots__ = ("x", "y", "z", "id", "key")
+
+    def __init__(self, x, y, z, id=-1):
         self.x, self.y, self.z = float(x), float(y), float(z)
-        self._hash = None
+        self.id = id
+        self.key = quantize_key(self.x, self.y, self.z)
 
     def to_np(self):
         return np.array([self.x, self.y, self.z])
@@ -15,15 +45,18 @@ class Vertex:
             self.x /= length
             self.y /= length
             self.z /= length
-        self._hash = None # Invalidate hash after normalization
+        self.key = quantize_key(self.x, self.y, self.z)
 
     def __hash__(self):
-        if self._hash is None:
-            self._hash = hash((round(self.x, 5), round(self.y, 5), round(self.z, 5)))
-        return self._hash
+        return self.key
 
     def __eq__(self, other):
-        return isinstance(other, Vertex) and \
-               round(self.x, 5) == round(other.x, 5) and \
-               round(self.y, 5) == round(other.y, 5) and \
-               round(self.z, 5) == round(other.z, 5)
+        return isinstance(other, Vertex) and self.key == other.key
+
+    def __reduce__(self):
+        return Vertex, (self.x, self.y, self.z, self.id)
+
+    def __setstate__(self, state):
+        # Caches written before Vertex had slots pickled its __dict__.
+        self.x, self.y, self.z, self.id = state["x"], state["y"], state["z"], -1
+        self.key = quantize_key(self.x, self.y, self.z)
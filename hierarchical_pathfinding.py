@@ -0,0 +1,246 @@
+import heapq
+import math
+from collections import OrderedDict
+import numpy as np
+import config as cfg
+from polyhedron_generator import PolyhedronGenerator
+
+CLUSTER_ASSIGNMENT_CHUNK_ELEMENTS = 4_000_000
+
+
+def build_cluster_graph(tile_centers, tile_neighbor_ids, cluster_level):
+    # Every fine tile is clustered under the closest vertex of the coarse geodesic
+    # sphere, which is the coarse Goldberg tile (its ancestor) containing it.
+    directions = _normalize_rows(np.asarray(tile_centers, dtype=np.float64))
+    coarse_sphere = PolyhedronGenerator().create_geodesic_sphere(cluster_level)
+    coarse_centers = np.array([[v.x, v.y, v.z] for v in coarse_sphere.vertices], dtype=np.float64)
+
+    raw_cluster_of_tile = np.empty(len(directions), dtype=np.int64)
+    chunk_size = max(1, CLUSTER_ASSIGNMENT_CHUNK_ELEMENTS // max(1, len(coarse_centers)))
+    for start in range(0, len(directions), chunk_size):
+        chunk = directions[start:start + chunk_size]
+        raw_cluster_of_tile[start:start + chunk_size] = np.argmax(chunk @ coarse_centers.T, axis=1)
+
+    _, cluster_of_tile = np.unique(raw_cluster_of_tile, return_inverse=True)
+    cluster_of_tile = cluster_of_tile.astype(np.int32)
+    cluster_count = int(cluster_of_tile.max()) + 1 if len(cluster_of_tile) else 0
+
+    cluster_centers = np.zeros((cluster_count, 3), dtype=np.float64)
+    for axis in range(3):
+        cluster_centers[:, axis] = np.bincount(cluster_of_tile, weights=directions[:, axis], minlength=cluster_count)
+    cluster_centers = _normalize_rows(cluster_centers)
+
+    neighbor_ids = np.asarray(tile_neighbor_ids, dtype=np.int64)
+    from_tiles = np.repeat(np.arange(len(neighbor_ids), dtype=np.int64), neighbor_ids.shape[1])
+    to_tiles = neighbor_ids.ravel()
+    valid_mask = to_tiles >= 0
+    from_tiles = from_tiles[valid_mask]
+    to_tiles = to_tiles[valid_mask]
+
+    from_clusters = cluster_of_tile[from_tiles].astype(np.int64)
+    to_clusters = cluster_of_tile[to_tiles].astype(np.int64)
+    portal_mask = from_clusters != to_clusters
+    portal_keys = from_clusters[portal_mask] * cluster_count + to_clusters[portal_mask]
+    order = np.argsort(portal_keys, kind="stable")
+    portal_keys = portal_keys[order]
+    portal_tiles = np.column_stack((from_tiles[portal_mask][order], to_tiles[portal_mask][order])).astype(np.int32)
+
+    edge_keys, portal_starts = np.unique(portal_keys, return_index=True)
+    edge_sources = edge_keys // max(cluster_count, 1)
+    edge_targets = (edge_keys % max(cluster_count, 1)).astype(np.int32)
+    edge_offsets = np.searchsorted(edge_sources, np.arange(cluster_count + 1)).astype(np.int32)
+    portal_offsets = np.append(portal_starts, len(portal_keys)).astype(np.int32)
+    edge_costs = _angles_between(cluster_centers[edge_sources], cluster_centers[edge_targets]).astype(np.float32)
+
+    return {
+        "cluster_level": int(cluster_level),
+        "tile_count": int(len(directions)),
+        "cluster_of_tile": cluster_of_tile,
+        "cluster_centers": cluster_centers.astype(np.float32),
+        "edge_offsets": edge_offsets,
+        "edge_targets": edge_targets,
+        "edge_costs": edge_costs,
+        "portal_offsets": portal_offsets,
+        "portal_tiles": portal_tiles,
+    }
+
+
+def _normalize_rows(points):
+    lengths = np.linalg.norm(points, axis=1, keepdims=True)
+    return points / np.maximum(lengths, 1e-12)
+
+
+def _angles_between(directions_a, directions_b):
+    dots = np.einsum("ij,ij->i", directions_a, directions_b)
+    return np.arccos(np.clip(dots, -1.0, 1.0))
+
+
+class HierarchicalPathfinder:
+    def __init__(self, tile_centers, tile_neighbor_ids, cluster_level, graph=None):
+        self.cluster_level = cluster_level
+        if graph is None:
+            graph = build_cluster_graph(tile_centers, tile_neighbor_ids, cluster_level)
+        self.graph = graph
+        self.cluster_of_tile = graph["cluster_of_tile"]
+        self.cluster_count = len(graph["cluster_centers"])
+        self._abstract_path_cache = OrderedDict()
+        self._prepare_search_tables(tile_centers, tile_neighbor_ids)
+
+    def _prepare_search_tables(self, tile_centers, tile_neighbor_ids):
+        # The searches below run per query in pure Python, so the graph is
+        # unpacked once into nested lists, which index much faster than arrays.
+        directions = _normalize_rows(np.asarray(tile_centers, dtype=np.float64))
+        neighbor_ids = np.asarray(tile_neighbor_ids, dtype=np.int64)
+        safe_neighbor_ids = np.where(neighbor_ids >= 0, neighbor_ids, 0)
+        fine_costs = np.arccos(np.clip(
+            np.einsum("ij,ikj->ik", directions, directions[safe_neighbor_ids]),
+            -1.0,
+            1.0
+        ))
+
+        self._directions = directions.tolist()
+        self._tile_clusters = self.cluster_of_tile.tolist()
+        self._tile_neighbors = []
+        for neighbors, costs in zip(neighbor_ids.tolist(), fine_costs.tolist()):
+            self._tile_neighbors.append([
+                (neighbor, cost)
+                for neighbor, cost in zip(neighbors, costs)
+                if neighbor >= 0
+            ])
+
+        cluster_centers = self.graph["cluster_centers"].astype(np.float64)
+        edge_offsets = self.graph["edge_offsets"].tolist()
+        edge_targets = self.graph["edge_targets"].tolist()
+        edge_costs = self.graph["edge_costs"].tolist()
+        self._cluster_centers = cluster_centers.tolist()
+        self._cluster_neighbors = [
+            list(zip(edge_targets[edge_offsets[c]:edge_offsets[c + 1]], edge_costs[edge_offsets[c]:edge_offsets[c + 1]]))
+            for c in range(self.cluster_count)
+        ]
+
+    def find_path(self, start_id, goal_id):
+        if start_id == goal_id:
+            return [start_id]
+
+        corridor = self.find_cluster_path(self._tile_clusters[start_id], self._tile_clusters[goal_id])
+        if corridor is None:
+            return None
+
+        path = self._search_fine(start_id, goal_id, set(corridor))
+        if path is None:
+            path = self._search_fine(start_id, goal_id, self._widen_corridor(corridor))
+        if path is None:
+            path = self._search_fine(start_id, goal_id, None)
+        return path
+
+    def find_path_prefix(self, start_id, goal_id, cluster_lookahead=cfg.PATHFINDING_REFINE_CLUSTER_LOOKAHEAD):
+        # Only the first few corridor clusters are refined at the fine level, which
+        # is all a unit moving a handful of tiles per turn needs.
+        if start_id == goal_id:
+            return [start_id]
+
+        corridor = self.find_cluster_path(self._tile_clusters[start_id], self._tile_clusters[goal_id])
+        if corridor is None:
+            return None
+        if len(corridor) <= cluster_lookahead + 1:
+            return self.find_path(start_id, goal_id)
+
+        prefix = corridor[:cluster_lookahead + 1]
+        path = self._search_fine(start_id, goal_id, set(prefix), target_cluster=prefix[-1])
+        if path is None:
+            path = self._search_fine(start_id, goal_id, self._widen_corridor(prefix), target_cluster=prefix[-1])
+        if path is None:
+            path = self.find_path(start_id, goal_id)
+        return path
+
+    def get_next_step(self, start_id, goal_id):
+        path = self.find_path_prefix(start_id, goal_id)
+        if not path or len(path) < 2:
+            return None
+        return path[1]
+
+    def find_cluster_path(self, start_cluster, goal_cluster):
+        cache_key = (start_cluster, goal_cluster)
+        cached_path = self._abstract_path_cache.get(cache_key)
+        if cached_path is not None:
+            self._abstract_path_cache.move_to_end(cache_key)
+            return cached_path
+
+        path = self._search_clusters(start_cluster, goal_cluster)
+        if path is not None:
+            self._abstract_path_cache[cache_key] = path
+            while len(self._abstract_path_cache) > cfg.PATHFINDING_ABSTRACT_PATH_CACHE_SIZE:
+                self._abstract_path_cache.popitem(last=False)
+        return path
+
+    def _search_clusters(self, start_cluster, goal_cluster):
+        if start_cluster == goal_cluster:
+            return [start_cluster]
+
+        centers = self._cluster_centers
+        goal_center = centers[goal_cluster]
+        open_heap = [(self._angle(centers[start_cluster], goal_center), 0.0, start_cluster)]
+        best_cost = {start_cluster: 0.0}
+        came_from = {}
+
+        while open_heap:
+            _, cost, cluster = heapq.heappop(open_heap)
+            if cluster == goal_cluster:
+                return self._reconstruct_path(came_from, cluster)
+            if cost > best_cost[cluster]:
+                continue
+
+            for neighbor, edge_cost in self._cluster_neighbors[cluster]:
+                new_cost = cost + edge_cost
+                if new_cost >= best_cost.get(neighbor, math.inf):
+                    continue
+                best_cost[neighbor] = new_cost
+                came_from[neighbor] = cluster
+                heapq.heappush(open_heap, (new_cost + self._angle(centers[neighbor], goal_center), new_cost, neighbor))
+
+        return None
+
+    def _search_fine(self, start_id, goal_id, allowed_clusters, target_cluster=None):
+        directions = self._directions
+        tile_clusters = self._tile_clusters
+        goal_direction = directions[goal_id]
+        open_heap = [(self._angle(directions[start_id], goal_direction), 0.0, start_id)]
+        best_cost = {start_id: 0.0}
+        came_from = {}
+
+        while open_heap:
+            _, cost, tile_id = heapq.heappop(open_heap)
+            if tile_id == goal_id or (target_cluster is not None and tile_clusters[tile_id] == target_cluster):
+                return self._reconstruct_path(came_from, tile_id)
+            if cost > best_cost[tile_id]:
+                continue
+
+            for neighbor, edge_cost in self._tile_neighbors[tile_id]:
+                if allowed_clusters is not None and tile_clusters[neighbor] not in allowed_clusters:
+                    continue
+                new_cost = cost + edge_cost
+                if new_cost >= best_cost.get(neighbor, math.inf):
+                    continue
+                best_cost[neighbor] = new_cost
+                came_from[neighbor] = tile_id
+                heapq.heappush(open_heap, (new_cost + self._angle(directions[neighbor], goal_direction), new_cost, neighbor))
+
+        return None
+
+    def _widen_corridor(self, corridor):
+        widened = set(corridor)
+        for cluster in corridor:
+            widened.update(neighbor for neighbor, _ in self._cluster_neighbors[cluster])
+        return widened
+
+    def _reconstruct_path(self, came_from, node):
+        path = [node]
+        while node in came_from:
+            node = came_from[node]
+            path.append(node)
+        path.reverse()
+        return path
+
+    def _angle(self, direction_a, direction_b):
+        dot = direction_a[0] * direction_b[0] + direction_a[1] * direction_b[1] + direction_a[2] * direction_b[2]
+        return math.acos(min(1.0, max(-1.0, dot)))
@@ -46,6 +46,8 @@ class InputHandler:
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_F3:
                 self.renderer.debug_mode = not self.renderer.debug_mode
+            elif event.key == pygame.K_F4:
+                self.renderer.dump_frame_trace()
             elif event.key == pygame.K_b:
                 self.renderer.toggle_battle_mode()
         elif event.type == pygame.MOUSEBUTTONDOWN:
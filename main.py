@@ -1,6 +1,7 @@
 import pygame
 from game_world import GameWorld
 from renderer import Renderer
+from camera import save_camera_path
 import config as cfg
 
 if __name__ == "__main__":
@@ -16,9 +17,17 @@ if __name__ == "__main__":
     renderer = Renderer(render_data, game_world)
     
     # 4. Run the main loop
+    recorded_frames = []
     running = True
     while running:
         running = renderer.run_frame()
+        if cfg.CAMERA_PATH_RECORD_FILE:
+            recorded_frames.append(renderer.capture_camera_state())
 
+    if cfg.CAMERA_PATH_RECORD_FILE:
+        save_camera_path(cfg.CAMERA_PATH_RECORD_FILE, recorded_frames)
+        print(f"Recorded {len(recorded_frames)} camera frames to {cfg.CAMERA_PATH_RECORD_FILE}")
+
+    renderer.asset_loader.shutdown()
     game_world.shutdown()
     pygame.quit()
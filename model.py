@@ -1,123 +1,277 @@
 
-import trimesh
+import ctypes
 from OpenGL.GL import *
-from OpenGL.GLU import *
-from PIL import Image
+from OpenGL.GL import shaders
 import numpy as np
+from asset_cache import load_mesh_asset
 
-def load_gl_texture(image):
-    """Converts a PIL image to an OpenGL texture."""
-    if image.mode != 'RGBA':
-        image = image.convert('RGBA')
+INSTANCE_FLOAT_COUNT = 17 # Column-major 4x4 transform followed by the highlight weight
+INSTANCE_STRIDE = INSTANCE_FLOAT_COUNT * 4
+INSTANCE_MATRIX_LOCATION = 10 # Keeps clear of the aliased gl_Vertex/gl_Normal/gl_MultiTexCoord0 slots
+INSTANCE_HIGHLIGHT_LOCATION = 14
 
-    img_data = image.tobytes("raw", "RGBA", 0, -1)
-    
+INSTANCED_VERTEX_SHADER = """
+#version 120
+attribute vec4 instance_column0;
+attribute vec4 instance_column1;
+attribute vec4 instance_column2;
+attribute vec4 instance_column3;
+attribute float instance_highlight;
+varying vec3 v_normal;
+varying vec2 v_uv;
+varying float v_highlight;
+
+void main() {
+    mat4 instance_matrix = mat4(instance_column0, instance_column1, instance_column2, instance_column3);
+    gl_Position = gl_ModelViewProjectionMatrix * (instance_matrix * gl_Vertex);
+    v_normal = gl_NormalMatrix * (mat3(instance_matrix) * gl_Normal);
+    v_uv = gl_MultiTexCoord0.xy;
+    v_highlight = instance_highlight;
+}
+"""
+
+INSTANCED_FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D diffuse_texture;
+uniform int use_texture;
+uniform vec3 highlight_emission;
+varying vec3 v_normal;
+varying vec2 v_uv;
+varying float v_highlight;
+
+void main() {
+    vec4 base_color = use_texture != 0 ? texture2D(diffuse_texture, v_uv) : vec4(1.0);
+    vec3 light_direction = normalize(gl_LightSource[0].position.xyz);
+    float diffuse = max(dot(normalize(v_normal), light_direction), 0.0);
+    vec3 lighting = gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb + gl_LightSource[0].diffuse.rgb * diffuse;
+    gl_FragColor = vec4(base_color.rgb * lighting + highlight_emission * v_highlight, base_color.a);
+}
+"""
+
+def build_alignment_matrices(positions, up_vectors, scale):
+    """Builds per-instance transforms that scale a Y-up model and rotate it onto up_vectors."""
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    up_vectors = np.asarray(up_vectors, dtype=np.float64).reshape(-1, 3)
+    up_vectors = up_vectors / np.maximum(np.linalg.norm(up_vectors, axis=1, keepdims=True), 1e-6)
+    count = len(up_vectors)
+
+    # Rodrigues' rotation taking +Y onto each target vector.
+    axes = np.column_stack((up_vectors[:, 2], np.zeros(count), -up_vectors[:, 0]))
+    cosines = up_vectors[:, 1]
+    skew = np.zeros((count, 3, 3), dtype=np.float64)
+    skew[:, 0, 1], skew[:, 0, 2] = -axes[:, 2], axes[:, 1]
+    skew[:, 1, 0], skew[:, 1, 2] = axes[:, 2], -axes[:, 0]
+    skew[:, 2, 0], skew[:, 2, 1] = -axes[:, 1], axes[:, 0]
+    rotations = np.broadcast_to(np.eye(3), (count, 3, 3)).copy()
+    aligned_mask = cosines > -1.0 + 1e-6
+    factors = 1.0 / (1.0 + cosines[aligned_mask])
+    rotations[aligned_mask] += skew[aligned_mask] + (skew[aligned_mask] @ skew[aligned_mask]) * factors[:, None, None]
+    rotations[~aligned_mask] = np.diag([1.0, -1.0, -1.0])
+
+    matrices = np.zeros((count, 4, 4), dtype=np.float32)
+    matrices[:, :3, :3] = rotations * scale
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+def load_gl_texture_levels(levels):
+    """Uploads a prebuilt RGBA mip chain as an OpenGL texture."""
     texture_id = glGenTextures(1)
     glBindTexture(GL_TEXTURE_2D, texture_id)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    
-    gluBuild2DMipmaps(GL_TEXTURE_2D, GL_RGBA, image.width, image.height, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    for level_index, level in enumerate(levels):
+        height, width = level.shape[:2]
+        glTexImage2D(GL_TEXTURE_2D, level_index, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, level)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
     
     return texture_id
 
 class Model:
-    def __init__(self, file_path):
-        self.mesh = None
+    def __init__(self, file_path, asset_loader=None):
+        self.file_path = file_path
+        self.asset = None
         self.texture_id = None
         self.vbo_verts = None
         self.vbo_normals = None
         self.vbo_uvs = None
         self.ibo_faces = None
         self.face_count = 0
+        self.instance_vbo = None
+        self.instance_count = 0
+        self.instance_program = None
+        self.instancing_supported = None
+
+        # Parsing happens on the loader thread; only the GL upload runs here.
+        if asset_loader is not None:
+            self.asset_future = asset_loader.load_mesh(file_path)
+        else:
+            self.asset_future = None
+            self._upload_asset(load_mesh_asset(file_path))
 
-        self._load_model(file_path)
+    @property
+    def bounds(self):
+        return self.asset.bounds if self.asset is not None else np.zeros((2, 3), dtype=np.float32)
 
-    def _load_model(self, file_path):
+    def ensure_uploaded(self):
+        if self.asset is not None:
+            return True
+        if self.asset_future is None or not self.asset_future.done():
+            return False
+
+        future, self.asset_future = self.asset_future, None
         try:
-            # Use trimesh to load the scene. We use force='scene' to ensure we get a scene object.
-            scene = trimesh.load(file_path, force='scene')
-            # We'll take the first geometry from the scene. This is a simplification.
-            # For complex scenes, you might need to iterate through scene.geometry.
-            mesh_key = list(scene.geometry.keys())[0]
-            self.mesh = scene.geometry[mesh_key]
-        except Exception as e:
-            print(f"Error loading model with trimesh: {e}")
-            # As a fallback, try loading directly as a mesh
-            try:
-                self.mesh = trimesh.load(file_path, force='mesh')
-            except Exception as e2:
-                print(f"Secondary error loading as mesh: {e2}")
-                return # Could not load the mesh
+            asset = future.result()
+        except Exception as exc:
+            print(f"Could not load model {self.file_path}: {exc}")
+            return False
+        self._upload_asset(asset)
+        return self.asset is not None
+
+    def _upload_asset(self, asset):
+        if asset is None:
+            return # Could not load the mesh
 
         # Prepare VBOs
         self.vbo_verts = glGenBuffers(1)
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo_verts)
-        glBufferData(GL_ARRAY_BUFFER, self.mesh.vertices.astype(np.float32).tobytes(), GL_STATIC_DRAW)
+        glBufferData(GL_ARRAY_BUFFER, asset.vertices, GL_STATIC_DRAW)
 
         self.vbo_normals = glGenBuffers(1)
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo_normals)
-        glBufferData(GL_ARRAY_BUFFER, self.mesh.vertex_normals.astype(np.float32).tobytes(), GL_STATIC_DRAW)
+        glBufferData(GL_ARRAY_BUFFER, asset.normals, GL_STATIC_DRAW)
 
-        if self.mesh.visual.uv is not None and len(self.mesh.visual.uv) > 0:
+        if asset.uvs is not None:
             self.vbo_uvs = glGenBuffers(1)
             glBindBuffer(GL_ARRAY_BUFFER, self.vbo_uvs)
-            glBufferData(GL_ARRAY_BUFFER, self.mesh.visual.uv.astype(np.float32).tobytes(), GL_STATIC_DRAW)
+            glBufferData(GL_ARRAY_BUFFER, asset.uvs, GL_STATIC_DRAW)
 
-        self.face_count = len(self.mesh.faces.flatten())
+        self.face_count = len(asset.indices)
         self.ibo_faces = glGenBuffers(1)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo_faces)
-        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.mesh.faces.flatten().astype(np.uint32).tobytes(), GL_STATIC_DRAW)
-
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, asset.indices, GL_STATIC_DRAW)
 
-        # --- Load Texture ---
-        try:
-            image = None
-            if hasattr(self.mesh.visual, 'material'):
-                if hasattr(self.mesh.visual.material, 'baseColorTexture') and self.mesh.visual.material.baseColorTexture is not None:
-                    image = self.mesh.visual.material.baseColorTexture
-                elif hasattr(self.mesh.visual.material, 'image') and self.mesh.visual.material.image is not None:
-                    image = self.mesh.visual.material.image
-
-            if image is not None:
-                self.texture_id = load_gl_texture(image)
-            else:
-                # Fallback for OBJ files that reference textures in the MTL file
-                if file_path.lower().endswith('.obj'):
-                    try:
-                        # A bit of a hack: assume texture is in the same dir with a common name
-                        from pathlib import Path
-                        p = Path(file_path)
-                        # Try to find a texture file in the same directory
-                        for ext in ['.png', '.jpg', '.jpeg', '.bmp', '.tga']:
-                            tex_path = p.with_suffix(ext)
-                            if tex_path.exists():
-                                image = Image.open(tex_path)
-                                self.texture_id = load_gl_texture(image)
-                                break
-                        if not self.texture_id:
-                             # Try to find PBR_Material.png in the same directory
-                            pbr_tex_path = p.parent / 'PBR_Material.png'
-                            if pbr_tex_path.exists():
-                                image = Image.open(pbr_tex_path)
-                                self.texture_id = load_gl_texture(image)
-
-                    except Exception as e:
-                        print(f"Could not manually load texture for OBJ: {e}")
+        if asset.texture_levels:
+            try:
+                self.texture_id = load_gl_texture_levels(asset.texture_levels)
+            except Exception as e:
+                print(f"Could not load texture: {e}")
 
-        except Exception as e:
-            print(f"Could not load texture: {e}")
+        self.asset = asset
 
     def draw(self):
-        if not self.mesh:
+        if not self.ensure_uploaded():
             return
 
         if self.texture_id and self.vbo_uvs is not None:
             glEnable(GL_TEXTURE_2D)
             glBindTexture(GL_TEXTURE_2D, self.texture_id)
 
+        self._bind_mesh_arrays()
+        glDrawElements(GL_TRIANGLES, self.face_count, GL_UNSIGNED_INT, None)
+        self._unbind_mesh_arrays()
+
+        if self.texture_id and self.vbo_uvs is not None:
+            glDisable(GL_TEXTURE_2D)
+
+    def set_instances(self, instance_matrices, highlights):
+        matrices = np.asarray(instance_matrices, dtype=np.float32).reshape(-1, 4, 4)
+        self.instance_count = len(matrices)
+        instance_data = np.empty((self.instance_count, INSTANCE_FLOAT_COUNT), dtype=np.float32)
+        instance_data[:, :16] = matrices.transpose(0, 2, 1).reshape(-1, 16)
+        instance_data[:, 16] = np.asarray(highlights, dtype=np.float32).reshape(-1)
+        self._instance_data = instance_data
+        if self.instance_count == 0 or not self._ensure_instancing():
+            return
+
+        if self.instance_vbo is None:
+            self.instance_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, instance_data, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw_instanced(self, highlight_emission=(0.6, 0.3, 0.0)):
+        if not self.ensure_uploaded() or self.instance_count == 0:
+            return
+        if not self._ensure_instancing():
+            self._draw_instances_fallback(highlight_emission)
+            return
+
+        use_texture = bool(self.texture_id and self.vbo_uvs is not None)
+        glUseProgram(self.instance_program)
+        glUniform1i(glGetUniformLocation(self.instance_program, "use_texture"), 1 if use_texture else 0)
+        glUniform3f(glGetUniformLocation(self.instance_program, "highlight_emission"), *highlight_emission)
+        if use_texture:
+            glActiveTexture(GL_TEXTURE0)
+            glBindTexture(GL_TEXTURE_2D, self.texture_id)
+            glUniform1i(glGetUniformLocation(self.instance_program, "diffuse_texture"), 0)
+
+        self._bind_mesh_arrays()
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for column in range(4):
+            location = INSTANCE_MATRIX_LOCATION + column
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(column * 16))
+            glVertexAttribDivisor(location, 1)
+        glEnableVertexAttribArray(INSTANCE_HIGHLIGHT_LOCATION)
+        glVertexAttribPointer(INSTANCE_HIGHLIGHT_LOCATION, 1, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(64))
+        glVertexAttribDivisor(INSTANCE_HIGHLIGHT_LOCATION, 1)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo_faces)
+        glDrawElementsInstanced(GL_TRIANGLES, self.face_count, GL_UNSIGNED_INT, None, self.instance_count)
+
+        for location in range(INSTANCE_MATRIX_LOCATION, INSTANCE_HIGHLIGHT_LOCATION + 1):
+            glVertexAttribDivisor(location, 0)
+            glDisableVertexAttribArray(location)
+        self._unbind_mesh_arrays()
+        glUseProgram(0)
+
+    def _draw_instances_fallback(self, highlight_emission):
+        # Fixed-function path for contexts without GLSL instancing support.
+        for instance in self._instance_data:
+            glPushMatrix()
+            glMultMatrixf(instance[:16])
+            emission = [value * float(instance[16]) for value in highlight_emission]
+            glMaterialfv(GL_FRONT, GL_EMISSION, emission + [1.0])
+            self.draw()
+            glPopMatrix()
+        glMaterialfv(GL_FRONT, GL_EMISSION, [0.0, 0.0, 0.0, 1.0])
+
+    def _ensure_instancing(self):
+        if self.instancing_supported is not None:
+            return self.instancing_supported
+
+        try:
+            vertex_shader = shaders.compileShader(INSTANCED_VERTEX_SHADER, GL_VERTEX_SHADER)
+            fragment_shader = shaders.compileShader(INSTANCED_FRAGMENT_SHADER, GL_FRAGMENT_SHADER)
+            program = glCreateProgram()
+            glAttachShader(program, vertex_shader)
+            glAttachShader(program, fragment_shader)
+            for column in range(4):
+                glBindAttribLocation(program, INSTANCE_MATRIX_LOCATION + column, f"instance_column{column}")
+            glBindAttribLocation(program, INSTANCE_HIGHLIGHT_LOCATION, "instance_highlight")
+            glLinkProgram(program)
+            if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+                raise RuntimeError(glGetProgramInfoLog(program))
+            glDeleteShader(vertex_shader)
+            glDeleteShader(fragment_shader)
+            if not bool(glDrawElementsInstanced) or not bool(glVertexAttribDivisor):
+                raise RuntimeError("glDrawElementsInstanced is not available")
+        except Exception as e:
+            print(f"Instanced model rendering unavailable, using per-instance draws: {e}")
+            self.instancing_supported = False
+            return False
+
+        self.instance_program = program
+        self.instancing_supported = True
+        return True
+
+    def _bind_mesh_arrays(self):
         glEnableClientState(GL_VERTEX_ARRAY)
         glEnableClientState(GL_NORMAL_ARRAY)
         if self.texture_id and self.vbo_uvs is not None:
@@ -134,17 +288,21 @@ class Model:
             glTexCoordPointer(2, GL_FLOAT, 0, None)
 
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo_faces)
-        glDrawElements(GL_TRIANGLES, self.face_count, GL_UNSIGNED_INT, None)
 
+    def _unbind_mesh_arrays(self):
         glDisableClientState(GL_VERTEX_ARRAY)
         glDisableClientState(GL_NORMAL_ARRAY)
         if self.texture_id and self.vbo_uvs is not None:
             glDisableClientState(GL_TEXTURE_COORD_ARRAY)
-            glDisable(GL_TEXTURE_2D)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
 
     def __del__(self):
         # Destructor to clean up OpenGL buffers
-        buffers = [self.vbo_verts, self.vbo_normals, self.vbo_uvs, self.ibo_faces]
-        glDeleteBuffers(len(buffers), [b for b in buffers if b is not None])
+        buffers = [b for b in (self.vbo_verts, self.vbo_normals, self.vbo_uvs, self.ibo_faces, self.instance_vbo) if b is not None]
+        if buffers:
+            glDeleteBuffers(len(buffers), buffers)
+        if self.instance_program:
+            glDeleteProgram(self.instance_program)
         if self.texture_id:
             glDeleteTextures(1, [self.texture_id])
@@ -0,0 +1,130 @@
+import ctypes
+from OpenGL.GL import *
+import numpy as np
+import config as cfg
+
+VERTEX_FLOAT_COUNT = 7 # Position xyz followed by colour rgba
+VERTEX_STRIDE = VERTEX_FLOAT_COUNT * 4
+COLOR_OFFSET = 3 * 4
+
+
+class OverlayStream:
+    """Per-frame overlay geometry streamed through one ring-buffer VBO.
+
+    Overlays queue line loops and filled polygons during the frame. draw()
+    packs everything into one interleaved array, uploads it with a single
+    glBufferSubData into the next free range of the ring and issues one
+    glDrawArrays per primitive type (and line width). When a frame no longer
+    fits behind the previous ones the buffer is orphaned, so the driver hands
+    out fresh storage instead of waiting for draws still reading the old one.
+    """
+
+    def __init__(self, capacity=cfg.OVERLAY_STREAM_BUFFER_BYTES):
+        self.capacity = int(capacity)
+        self.vbo = None
+        self.offset = 0
+        self.batches = {}
+        self.orphan_count = 0
+        self.last_vertex_count = 0
+        self.last_draw_count = 0
+
+    def add_line_loop(self, vertices, color, line_width=1.0):
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        if len(vertices) < 2:
+            return
+        segments = np.empty((len(vertices) * 2, 3), dtype=np.float32)
+        segments[0::2] = vertices
+        segments[1::2] = np.roll(vertices, -1, axis=0)
+        self._add(GL_LINES, float(line_width), segments, color)
+
+    def add_polygons(self, centers, vertices, sizes, color):
+        """Queues filled polygons as triangle fans around their centers.
+
+        vertices holds every polygon's ring back to back, sizes[i] vertices
+        for polygon i. The fans are split into separate triangles so all
+        polygons share one draw.
+        """
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        sizes = np.asarray(sizes, dtype=np.int64).reshape(-1)
+        if len(vertices) == 0:
+            return
+        starts = np.cumsum(sizes) - sizes
+        next_indices = np.arange(1, len(vertices) + 1)
+        next_indices[starts + sizes - 1] = starts
+        triangles = np.empty((len(vertices) * 3, 3), dtype=np.float32)
+        triangles[0::3] = np.repeat(centers, sizes, axis=0)
+        triangles[1::3] = vertices
+        triangles[2::3] = vertices[next_indices]
+        self._add(GL_TRIANGLES, 1.0, triangles, color)
+
+    def _add(self, mode, line_width, positions, color):
+        vertices = np.empty((len(positions), VERTEX_FLOAT_COUNT), dtype=np.float32)
+        vertices[:, :3] = positions
+        vertices[:, 3:] = color
+        self.batches.setdefault((mode, line_width), []).append(vertices)
+
+    def draw(self):
+        """Uploads and draws everything queued this frame, then clears the queue."""
+        self.last_vertex_count = 0
+        self.last_draw_count = 0
+        if not self.batches:
+            return
+
+        keys = list(self.batches)
+        batch_arrays = [np.concatenate(self.batches[key]) for key in keys]
+        self.batches = {}
+        vertices = np.concatenate(batch_arrays)
+        offset = self._reserve(vertices.nbytes)
+        glBufferSubData(GL_ARRAY_BUFFER, offset, vertices.nbytes, vertices)
+
+        glDisable(GL_LIGHTING)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glColorPointer(4, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(COLOR_OFFSET))
+
+        first = offset // VERTEX_STRIDE
+        for (mode, line_width), batch in zip(keys, batch_arrays):
+            if mode == GL_LINES:
+                glLineWidth(line_width)
+            glDrawArrays(mode, first, len(batch))
+            first += len(batch)
+
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glLineWidth(1.0)
+        glDisable(GL_BLEND)
+        glEnable(GL_LIGHTING)
+        self.last_vertex_count = len(vertices)
+        self.last_draw_count = len(keys)
+
+    def _reserve(self, nbytes):
+        # Leaves the ring bound and returns the byte offset for this frame.
+        if self.vbo is None or nbytes > self.capacity:
+            while nbytes > self.capacity:
+                self.capacity *= 2
+            if self.vbo is None:
+                self.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+            self.offset = 0
+        else:
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            if self.offset + nbytes > self.capacity:
+                glBufferData(GL_ARRAY_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+                self.orphan_count += 1
+                self.offset = 0
+
+        offset = self.offset
+        self.offset += nbytes
+        return offset
+
+    def get_overlay_line(self):
+        return (
+            f"Overlay stream: {self.last_vertex_count} vertices in {self.last_draw_count} draw(s), "
+            f"ring {self.offset // 1024}/{self.capacity // 1024} KiB, {self.orphan_count} orphaned"
+        )
@@ -59,6 +59,9 @@ def get_tile_at_pos(x, y, width, height, camera, game_world):
 
 def get_subtile_at_pos(x, y, width, height, camera, game_world):
     ray_origin, ray_dir = get_ray(x, y, width, height, camera)
+    return get_subtile_at_ray(ray_origin, ray_dir, game_world)
+
+def get_subtile_at_ray(ray_origin, ray_dir, game_world):
     tile = get_tile_at_ray(ray_origin, ray_dir, game_world)
     if tile is None or not tile.subtiles:
         return tile, None
@@ -70,16 +73,16 @@ def get_subtile_at_pos(x, y, width, height, camera, game_world):
     basis_origin, basis_u, basis_v = _make_tile_projection_basis(tile)
     point_2d = _project_point_to_2d(hit_point, basis_origin, basis_u, basis_v)
 
-    for subtile in tile.subtiles:
-        subtile_polygon_2d = [
-            _project_point_to_2d(vertex, basis_origin, basis_u, basis_v)
-            for vertex in subtile.vertices
-        ]
-        if _point_in_polygon_2d(point_2d, subtile_polygon_2d):
-            return tile, subtile
-
-    closest_subtile = _get_closest_subtile_by_center(hit_point, tile.subtiles)
-    return tile, closest_subtile
+    # The hit test runs on the tile's subtile batch; only the picked tile's
+    # SubTile objects are materialized.
+    subtile_batch = game_world.get_subtile_batch(tile)
+    vertices_2d = _project_points_to_2d(subtile_batch.vertices, basis_origin, basis_u, basis_v)
+    subtile_index = _get_polygon_containing_point_2d(point_2d, vertices_2d, subtile_batch)
+    if subtile_index is None:
+        subtile_index = _get_closest_polygon_by_center(hit_point, subtile_batch)
+    if subtile_index is None:
+        return tile, None
+    return tile, tile.subtiles[subtile_index]
 
 def get_tile_at_ray(ray_origin, ray_dir, game_world):
     intersection_point = ray_sphere_intersection(ray_origin, ray_dir)
@@ -132,33 +135,33 @@ def _project_point_to_2d(point, basis_origin, basis_u, basis_v):
     offset = np.asarray(point, dtype=np.float32) - basis_origin
     return np.array([np.dot(offset, basis_u), np.dot(offset, basis_v)], dtype=np.float32)
 
-def _point_in_polygon_2d(point, polygon):
-    if len(polygon) < 3:
-        return False
-
-    inside = False
-    j = len(polygon) - 1
-    for i in range(len(polygon)):
-        pi = polygon[i]
-        pj = polygon[j]
-        intersects = ((pi[1] > point[1]) != (pj[1] > point[1])) and (
-            point[0] < (pj[0] - pi[0]) * (point[1] - pi[1]) / ((pj[1] - pi[1]) + 1e-12) + pi[0]
+def _project_points_to_2d(points, basis_origin, basis_u, basis_v):
+    offsets = np.asarray(points, dtype=np.float32) - basis_origin
+    return np.column_stack((offsets @ basis_u, offsets @ basis_v)).astype(np.float32)
+
+def _get_polygon_containing_point_2d(point, vertices_2d, subtile_batch):
+    """Index of the first batch polygon containing point, by even-odd crossings, or None."""
+    next_indices = subtile_batch.get_next_vertex_indices()
+    previous_indices = np.empty_like(next_indices)
+    previous_indices[next_indices] = np.arange(len(next_indices), dtype=next_indices.dtype)
+
+    pi = vertices_2d
+    pj = vertices_2d[previous_indices]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossings = ((pi[:, 1] > point[1]) != (pj[:, 1] > point[1])) & (
+            point[0] < (pj[:, 0] - pi[:, 0]) * (point[1] - pi[:, 1]) / ((pj[:, 1] - pi[:, 1]) + 1e-12) + pi[:, 0]
         )
-        if intersects:
-            inside = not inside
-        j = i
-
-    return inside
-
-def _get_closest_subtile_by_center(point, subtiles):
-    closest_subtile = None
-    min_dist_sq = float("inf")
-    for subtile in subtiles:
-        if not subtile.vertices:
-            continue
-        center = np.mean(np.asarray(subtile.vertices, dtype=np.float32), axis=0)
-        dist_sq = float(np.sum((center - point) ** 2))
-        if dist_sq < min_dist_sq:
-            min_dist_sq = dist_sq
-            closest_subtile = subtile
-    return closest_subtile
+
+    sizes = subtile_batch.get_polygon_sizes()
+    crossing_counts = np.bincount(subtile_batch.get_polygon_ids(), weights=crossings, minlength=len(sizes))
+    inside = np.flatnonzero((crossing_counts % 2 == 1) & (sizes >= 3))
+    return int(inside[0]) if len(inside) else None
+
+def _get_closest_polygon_by_center(point, subtile_batch):
+    if len(subtile_batch) == 0:
+        return None
+    centers = subtile_batch.get_centers()
+    dist_sq = np.sum((centers - point) ** 2, axis=1)
+    if np.all(np.isnan(dist_sq)):
+        return None
+    return int(np.nanargmin(dist_sq))
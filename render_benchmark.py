@@ -0,0 +1,306 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+import config as cfg
+
+DRAW_CALLS = (
+    "glDrawArrays",
+    "glDrawElements",
+    "glDrawElementsInstanced",
+    "glDrawPixels",
+    "glBegin",
+)
+UPLOAD_CALLS = ("glBufferData", "glBufferSubData", "glTexImage2D")
+FRAME_PERCENTILES = (50, 90, 95, 99)
+
+
+class _CountedGLCall:
+    """Stands in for one GL entry point and reports every call to the counter.
+
+    Truthiness is forwarded so `bool(glDrawElementsInstanced)` availability
+    checks keep working.
+    """
+
+    def __init__(self, counter, name, function):
+        self.counter = counter
+        self.name = name
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        self.counter.record(self.name, args)
+        return self.function(*args, **kwargs)
+
+    def __bool__(self):
+        return bool(self.function)
+
+
+class GLCallCounter:
+    """Counts draw calls and uploaded bytes by patching GL names in the render modules."""
+
+    def __init__(self, modules):
+        self.modules = modules
+        self.patched = []
+        self.draw_calls = 0
+        self.upload_bytes = 0
+        self.total_upload_bytes = 0
+
+    def install(self):
+        for module in self.modules:
+            for name in DRAW_CALLS + UPLOAD_CALLS:
+                function = getattr(module, name, None)
+                if function is None or isinstance(function, _CountedGLCall):
+                    continue
+                setattr(module, name, _CountedGLCall(self, name, function))
+                self.patched.append((module, name, function))
+
+    def uninstall(self):
+        for module, name, function in self.patched:
+            setattr(module, name, function)
+        self.patched = []
+
+    def record(self, name, args):
+        if name in DRAW_CALLS:
+            self.draw_calls += 1
+            return
+        upload_bytes = _get_upload_bytes(name, args)
+        self.upload_bytes += upload_bytes
+        self.total_upload_bytes += upload_bytes
+
+    def take_frame(self):
+        frame = (self.draw_calls, self.upload_bytes)
+        self.draw_calls = 0
+        self.upload_bytes = 0
+        return frame
+
+
+def _get_upload_bytes(name, args):
+    for arg in args[1:]:
+        if hasattr(arg, "nbytes"):
+            return int(arg.nbytes)
+        if isinstance(arg, (bytes, bytearray)):
+            return len(arg)
+    # glBufferData(target, size, None, usage) / glBufferSubData(target, offset, size, data)
+    size_index = {"glBufferData": 1, "glBufferSubData": 2}.get(name)
+    if size_index is not None and len(args) > size_index and isinstance(args[size_index], int):
+        return args[size_index]
+    return 0
+
+
+def orbit_path(frame_count):
+    return [
+        {"angle_x": 0.35, "angle_y": 2.0 * math.pi * index / frame_count, "zoom": 1.0}
+        for index in range(frame_count)
+    ]
+
+
+def zoom_in_path(frame_count):
+    zooms = np.geomspace(1.0, cfg.MIN_ZOOM, frame_count)
+    return [
+        {"angle_x": 0.2, "angle_y": 0.5 * math.pi * index / frame_count, "zoom": float(zoom)}
+        for index, zoom in enumerate(zooms)
+    ]
+
+
+def battle_path(frame_count):
+    """Zoomed-in globe, into the battle view for the middle half, then back out."""
+    quarter = max(1, frame_count // 4)
+    battle_frames = max(1, frame_count - 2 * quarter)
+    battle_zooms = np.geomspace(1.0, min(4.0, cfg.BATTLE_FIELD_MAX_ZOOM), battle_frames)
+    globe_state = {"angle_x": 0.2, "angle_y": 0.0, "zoom": cfg.MIN_ZOOM}
+    return (
+        [dict(globe_state) for _ in range(quarter)]
+        + [dict(globe_state, battle=True, battle_zoom=float(zoom)) for zoom in battle_zooms]
+        + [dict(globe_state) for _ in range(quarter)]
+    )
+
+
+def selection_path(frame_count):
+    """Slow pan over the globe with a unit selected, so the selection and move overlays draw every frame."""
+    return [
+        {"angle_x": 0.2, "angle_y": 0.25 * math.pi * index / frame_count, "zoom": 0.6, "select_unit": True}
+        for index in range(frame_count)
+    ]
+
+
+SCRIPTED_PATHS = {
+    "orbit": orbit_path,
+    "zoom_in": zoom_in_path,
+    "battle": battle_path,
+    "selection": selection_path,
+}
+
+
+def replay_path(renderer, counter, states, warmup_frames, gl_finish):
+    selects_unit = bool(states) and bool(states[0].get("select_unit"))
+    spawned_unit = _select_unit_facing_camera(renderer, states[0]) if selects_unit else None
+    for state in states[:warmup_frames]:
+        _render_frame(renderer, state, gl_finish)
+    counter.take_frame()
+
+    frame_times, draw_calls, upload_bytes = [], [], []
+    for state in states:
+        frame_time = _render_frame(renderer, state, gl_finish)
+        frame_draw_calls, frame_upload_bytes = counter.take_frame()
+        frame_times.append(frame_time)
+        draw_calls.append(frame_draw_calls)
+        upload_bytes.append(frame_upload_bytes)
+
+    if renderer.battle_mode:
+        renderer.toggle_battle_mode()
+    if spawned_unit is not None:
+        renderer.game_world.units.remove_units([spawned_unit.id])
+    if selects_unit:
+        renderer.selected_unit = renderer.selected_tile = None
+    return summarize_frames(frame_times, draw_calls, upload_bytes)
+
+
+def _select_unit_facing_camera(renderer, state):
+    """Selects a unit on the tile facing the camera, spawning one if the tile is empty; returns the spawned unit."""
+    renderer.apply_camera_state(state)
+    game_world = renderer.game_world
+    tile = game_world.tiles[int(np.argmax(game_world.tile_centers @ renderer.camera.get_view_direction()))]
+    unit = game_world.get_unit_on_tile(tile)
+    spawned_unit = None
+    if unit is None:
+        unit = spawned_unit = game_world.add_unit(tile, 0)
+    renderer.selected_unit = unit
+    renderer.selected_tile = tile
+    return spawned_unit
+
+
+def _render_frame(renderer, state, gl_finish):
+    import pygame
+
+    pygame.event.pump()
+    renderer.apply_camera_state(state)
+    start_time = time.perf_counter()
+    renderer.update()
+    renderer.draw()
+    gl_finish()
+    return time.perf_counter() - start_time
+
+
+def summarize_frames(frame_times, draw_calls, upload_bytes):
+    frame_ms = np.asarray(frame_times, dtype=np.float64) * 1000.0
+    draw_calls = np.asarray(draw_calls, dtype=np.int64)
+    upload_bytes = np.asarray(upload_bytes, dtype=np.int64)
+    summary = {
+        "frames": len(frame_ms),
+        "frame_ms_mean": float(frame_ms.mean()),
+        "frame_ms_max": float(frame_ms.max()),
+        "fps_mean": float(1000.0 / frame_ms.mean()),
+        "draw_calls_mean": float(draw_calls.mean()),
+        "draw_calls_max": int(draw_calls.max()),
+        "upload_bytes_mean": float(upload_bytes.mean()),
+        "upload_bytes_max": int(upload_bytes.max()),
+        "upload_bytes_total": int(upload_bytes.sum()),
+    }
+    for percentile, value in zip(FRAME_PERCENTILES, np.percentile(frame_ms, FRAME_PERCENTILES)):
+        summary[f"frame_ms_p{percentile}"] = float(value)
+    return summary
+
+
+def print_path_report(name, summary):
+    percentiles = "  ".join(f"p{p} {summary[f'frame_ms_p{p}']:7.2f}" for p in FRAME_PERCENTILES)
+    print(
+        f"  {name:<16} {summary['frames']:5d} frames  mean {summary['frame_ms_mean']:7.2f} ms  {percentiles}  "
+        f"max {summary['frame_ms_max']:7.2f}  draws/frame {summary['draw_calls_mean']:7.1f}  "
+        f"upload/frame {summary['upload_bytes_mean'] / 1024:9.1f} KiB"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay camera paths through the renderer uncapped and report frame times."
+    )
+    parser.add_argument("--level", type=int, default=cfg.SUBDIVISION_LEVEL, help="Subdivision level of the world.")
+    parser.add_argument("--paths", nargs="*", default=list(SCRIPTED_PATHS), choices=list(SCRIPTED_PATHS), help="Scripted camera paths to replay.")
+    parser.add_argument("--camera-path", action="append", default=[], help="Recorded camera path JSON to replay (repeatable).")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per scripted path.")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed frames before each path.")
+    parser.add_argument("--width", type=int, default=cfg.SCREEN_WIDTH)
+    parser.add_argument("--height", type=int, default=cfg.SCREEN_HEIGHT)
+    parser.add_argument("--offscreen", action="store_true", help="Render through SDL's offscreen driver and EGL; no display needed.")
+    parser.add_argument("--no-finish", action="store_true", help="Do not glFinish after each frame (measures CPU submit time only).")
+    parser.add_argument("--skip-subtile-precompute", action="store_true", help="Do not generate every subtile before rendering.")
+    parser.add_argument("--output", default="render_benchmark_results.json", help="JSON file the results are written to.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.offscreen:
+        # Both must be set before pygame and PyOpenGL are imported.
+        os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+        os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+
+    import pygame
+    from OpenGL.GL import GL_RENDERER, GL_VERSION, glFinish, glGetString
+    import model
+    import overlay_stream
+    import renderer as renderer_module
+    from benchmark import get_git_commit
+    from camera import load_camera_path
+    from game_world import GameWorld
+
+    cfg.FULLSCREEN = False
+    cfg.SCREEN_WIDTH, cfg.SCREEN_HEIGHT = args.width, args.height
+    if args.skip_subtile_precompute:
+        cfg.SUBTILE_PRECOMPUTE_ALL_ON_START = False
+
+    paths = [(name, SCRIPTED_PATHS[name](args.frames)) for name in args.paths]
+    paths.extend((os.path.basename(path), load_camera_path(path)) for path in args.camera_path)
+
+    pygame.init()
+    game_world = GameWorld(subdivision_level=args.level)
+    counter = GLCallCounter([renderer_module, model, overlay_stream])
+    counter.install()
+    renderer = renderer_module.Renderer(game_world.get_render_data(), game_world, hidden=True)
+    # Uncapped: Clock.tick(0) never sleeps.
+    renderer.fps = 0
+    setup_upload_bytes = counter.total_upload_bytes
+    counter.take_frame()
+    gl_finish = (lambda: None) if args.no_finish else glFinish
+
+    print(f"Rendering {len(paths)} camera path(s) at {args.width}x{args.height} on {glGetString(GL_RENDERER).decode()}:")
+    results = {}
+    try:
+        for name, states in paths:
+            results[name] = replay_path(renderer, counter, states, args.warmup, gl_finish)
+            print_path_report(name, results[name])
+    finally:
+        counter.uninstall()
+        renderer.asset_loader.shutdown()
+        game_world.shutdown()
+
+    report = {
+        "metadata": {
+            "commit": get_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "gl_renderer": glGetString(GL_RENDERER).decode(),
+            "gl_version": glGetString(GL_VERSION).decode(),
+            "level": args.level,
+            "tile_count": len(game_world.tiles),
+            "resolution": [args.width, args.height],
+            "warmup": args.warmup,
+            "gl_finish": not args.no_finish,
+            "setup_upload_bytes": setup_upload_bytes,
+        },
+        "paths": results,
+        "subtile_metrics": game_world.subtile_metrics.snapshot(),
+    }
+    pygame.quit()
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote render benchmark results to {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,7 @@
 import pygame
 from pygame.locals import *
 import math
+import os
 import time
 import numpy as np
 import config as cfg
@@ -10,16 +11,37 @@ from render_data import RenderData
 from camera import Camera
 from input_handler import InputHandler
 import picking
-from model import Model
+from model import Model, build_alignment_matrices
+from asset_cache import AssetLoader
+from frame_profiler import profiler
+from battle_field import BattleHexGrid, NO_HEX, build_context_hex_band, pad_polygons
+from overlay_stream import OverlayStream
+
+# Battle field VBO layers in draw order: (name, primitive, line width).
+BATTLE_FIELD_LAYERS = (
+    ("context_polygon_fill", GL_TRIANGLES, None),
+    ("context_polygon_line", GL_LINES, 1.2),
+    ("context_fill", GL_TRIANGLES, None),
+    ("context_line", GL_LINES, 1.0),
+    ("fill", GL_TRIANGLES, None),
+    ("line", GL_LINES, 1.0),
+    ("boundary", GL_LINES, 3.0),
+)
+SELECTION_COLOR = (1.0, 1.0, 0.0, 1.0) # Yellow
+POSSIBLE_MOVE_COLOR = (0.0, 1.0, 0.0, 0.5) # Semi-transparent green
 
 class Renderer:
-    def __init__(self, render_data, game_world):
+    def __init__(self, render_data, game_world, hidden=False):
+        # hidden opens the GL context without showing a window (render_benchmark.py).
         self.render_data = render_data
         self.game_world = game_world
         self.fps = cfg.FPS
         self.models = {}
+        self.asset_loader = AssetLoader()
 
         display_flags = DOUBLEBUF | OPENGL
+        if hidden:
+            display_flags |= HIDDEN
         if cfg.FULLSCREEN:
             display_flags |= FULLSCREEN
             info = pygame.display.Info()
@@ -29,7 +51,13 @@ class Renderer:
 
         pygame.display.gl_set_attribute(pygame.GL_MULTISAMPLEBUFFERS, 1)
         pygame.display.gl_set_attribute(pygame.GL_MULTISAMPLESAMPLES, 8)
-        pygame.display.set_mode((self.width, self.height), display_flags)
+        try:
+            pygame.display.set_mode((self.width, self.height), display_flags)
+        except pygame.error:
+            # Not every driver (e.g. SDL offscreen + EGL) offers multisampled configs.
+            pygame.display.gl_set_attribute(pygame.GL_MULTISAMPLEBUFFERS, 0)
+            pygame.display.gl_set_attribute(pygame.GL_MULTISAMPLESAMPLES, 0)
+            pygame.display.set_mode((self.width, self.height), display_flags)
         pygame.display.set_caption(cfg.CAPTION)
         
         self.clock = pygame.time.Clock()
@@ -41,6 +69,7 @@ class Renderer:
         self.selected_tile = None
         self.selected_subtile = None
         self.selected_unit = None
+        self.unit_instance_key = None
         self.battle_mode = False
         self.active_battle_subtile = None
         self.active_battle_rotation = 0.0
@@ -48,8 +77,13 @@ class Renderer:
         self.battle_pan = np.array([0.0, 0.0], dtype=np.float32)
         self.battle_zoom = 1.0
         self.selected_battle_hex_index = None
+        self.active_battle_hex_grid = None
+        self.battle_field_camera_focus_tiles = []
         self.battle_field_vbos = None
         self.battle_field_vbo_key = None
+        self.battle_transform_key = None
+        self._battle_transform_center = np.array([0.0, 0.0], dtype=np.float32)
+        self._battle_transform_scale = 1.0
 
         self.light_angle = 0
 
@@ -63,6 +97,7 @@ class Renderer:
         self.river_vbo_colors = None
         self.subtile_edge_vbos = {}
         self.subtile_point_vbos = {}
+        self.overlay_stream = OverlayStream()
         
         self.tile_vert_count = 0
         self.tile_edge_count = 0
@@ -74,7 +109,7 @@ class Renderer:
         self.load_model("unit", "assets/textured_primal_warior/textured_primal_warior.obj")
 
     def load_model(self, name, file_path):
-        self.models[name] = Model(file_path)
+        self.models[name] = Model(file_path, self.asset_loader)
 
     def init_gl(self):
         glViewport(0, 0, self.width, self.height)
@@ -154,11 +189,18 @@ class Renderer:
             f"Subtile VBO prebuild complete: {prepared_count} tiles, "
             f"{edge_vertex_count} edge vertices, total time {elapsed:.2f}s."
         )
+        # Cache entries written before edge buffers were stored got theirs
+        # built above; save them so the next start uploads straight away.
+        self.game_world.flush_subtile_cache()
 
     def run_frame(self):
-        running = self.input_handler.handle_events(pygame.event.get())
-        self.update()
+        profiler.begin_frame()
+        with profiler.scope("handle_events"):
+            running = self.input_handler.handle_events(pygame.event.get())
+        with profiler.scope("update"):
+            self.update()
         self.draw()
+        profiler.end_frame()
         return running
 
     def update(self):
@@ -167,6 +209,21 @@ class Renderer:
 
         self.camera.update()
         self.light_angle = (self.light_angle + cfg.LIGHT_ROTATION_SPEED) % (2 * math.pi)
+        if cfg.BATTLE_FIELD_BACKGROUND_PRECOMPUTE:
+            self.game_world.request_battle_fields(self._get_battle_field_focus_tiles())
+
+    def _get_battle_field_focus_tiles(self):
+        # Only tiles close enough to show subtiles are worth building battle
+        # fields for; further out nothing is drawn at subtile level.
+        if not self._should_render_subtiles():
+            return []
+
+        focus_tiles = []
+        if self.selected_tile is not None:
+            focus_tiles.append(self.selected_tile)
+            focus_tiles.extend(self.selected_tile.neighbors)
+        focus_tiles.extend(self.battle_field_camera_focus_tiles)
+        return list(dict.fromkeys(focus_tiles))
 
     def draw(self):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -174,8 +231,7 @@ class Renderer:
 
         if self.battle_mode:
             self.draw_battle_field()
-            pygame.display.flip()
-            self.clock.tick(self.fps)
+            self._present_frame()
             return
 
         self.camera.apply_transformations()
@@ -210,19 +266,19 @@ class Renderer:
             if clicked_subtile is not None:
                 self.selected_tile = clicked_tile
                 self.selected_subtile = clicked_subtile
+                self.game_world.subtile_store.pin([clicked_tile.id])
             elif clicked_tile:
                 self.selected_subtile = None
+                self.game_world.subtile_store.pin([])
+                clicked_unit = self.game_world.get_unit_on_tile(clicked_tile)
                 if self.selected_unit:
                     if self.selected_unit.move_to(clicked_tile):
                         self.selected_unit = None # Deselect after moving
                     else:
                         # If the clicked tile is not a valid move, check if it has a unit to select
-                        if clicked_tile.unit:
-                            self.selected_unit = clicked_tile.unit
-                        else:
-                            self.selected_unit = None # Deselect if clicking on empty tile
-                elif clicked_tile.unit:
-                    self.selected_unit = clicked_tile.unit
+                        self.selected_unit = clicked_unit # Deselects if clicking on empty tile
+                elif clicked_unit:
+                    self.selected_unit = clicked_unit
                 
                 self.selected_tile = clicked_tile
 
@@ -262,7 +318,7 @@ class Renderer:
 
         if self.river_vert_count > 0:
             glDisable(GL_LIGHTING)
-            glLineWidth(4.0)
+            glDisable(GL_CULL_FACE)
             glEnableClientState(GL_VERTEX_ARRAY)
             glEnableClientState(GL_COLOR_ARRAY)
 
@@ -270,28 +326,83 @@ class Renderer:
             glVertexPointer(3, GL_FLOAT, 0, None)
             glBindBuffer(GL_ARRAY_BUFFER, self.river_vbo_colors)
             glColorPointer(3, GL_FLOAT, 0, None)
-            glDrawArrays(GL_LINES, 0, self.river_vert_count)
+            glDrawArrays(GL_TRIANGLE_STRIP, 0, self.river_vert_count)
 
             glDisableClientState(GL_VERTEX_ARRAY)
             glDisableClientState(GL_COLOR_ARRAY)
+            glEnable(GL_CULL_FACE)
             glEnable(GL_LIGHTING)
 
         self.draw_subtiles()
         self.draw_selected_tile()
         self.draw_units()
         self.draw_possible_moves()
+        with profiler.scope("draw_overlays"):
+            self.overlay_stream.draw()
         self.draw_ui()
 
         if self.debug_mode:
             self.draw_debug_info()
 
-        pygame.display.flip()
-        self.clock.tick(self.fps)
+        self._present_frame()
+
+    def _present_frame(self):
+        with profiler.scope("display_flip"):
+            pygame.display.flip()
+        with profiler.scope("frame_cap_wait"):
+            self.clock.tick(self.fps)
+
+    def dump_frame_trace(self):
+        file_path = os.path.join(cfg.PROFILER_TRACE_DIR, time.strftime("frame_trace_%Y%m%d_%H%M%S.json"))
+        event_count = profiler.write_chrome_trace(file_path)
+        print(f"Wrote {event_count} profiler events to {file_path}")
+
+    def capture_camera_state(self):
+        """One recorded frame of the view; replays with apply_camera_state."""
+        state = self.camera.get_state()
+        state["battle"] = bool(self.battle_mode)
+        state["battle_zoom"] = float(self.battle_zoom)
+        return state
+
+    def apply_camera_state(self, state):
+        wants_battle = bool(state.get("battle", False))
+        if wants_battle != self.battle_mode:
+            if wants_battle:
+                self._select_subtile_facing_camera()
+            self.toggle_battle_mode()
+
+        if self.battle_mode:
+            self.battle_zoom = float(np.clip(
+                state.get("battle_zoom", 1.0), cfg.BATTLE_FIELD_MIN_ZOOM, cfg.BATTLE_FIELD_MAX_ZOOM
+            ))
+            return
+
+        self.camera.apply_state(state)
+
+    def _select_subtile_facing_camera(self):
+        # Replayed paths enter battle without a click, so pick the middle
+        # subtile of the tile facing the camera, generating it if needed.
+        tile_index = int(np.argmax(self.game_world.tile_centers @ self.camera.get_view_direction()))
+        tile = self.game_world.tiles[tile_index]
+        if not tile.subtiles:
+            self.game_world.ensure_subtiles_generated([tile])
+        if not tile.subtiles:
+            tile.generate_subtiles(
+                min_distance_factor=cfg.SUBTILE_MIN_DISTANCE_FACTOR,
+                edge_spacing_factor=cfg.SUBTILE_EDGE_POINT_SPACING_FACTOR,
+                max_interior_points=cfg.SUBTILE_MAX_INTERIOR_POINTS,
+                candidate_batch_size=cfg.SUBTILE_CANDIDATE_BATCH_SIZE,
+                max_stagnation=cfg.SUBTILE_MAX_STAGNATION
+            )
+        self.selected_tile = tile
+        self.selected_subtile = tile.subtiles[len(tile.subtiles) // 2]
+        self.game_world.subtile_store.pin([tile.id])
 
     def toggle_battle_mode(self):
         if self.battle_mode:
             self.battle_mode = False
             self.active_battle_subtile = None
+            self.active_battle_hex_grid = None
             self.active_battle_context_polygons = []
             self.battle_field_vbo_key = None
             return
@@ -301,12 +412,10 @@ class Renderer:
 
         self.active_battle_subtile = self.selected_subtile
         self.active_battle_subtile.ensure_battle_field()
+        self.active_battle_hex_grid = BattleHexGrid(self.active_battle_subtile.battle_field)
         self.active_battle_rotation = self._get_screen_aligned_subtile_rotation(self.selected_tile, self.selected_subtile)
         self.active_battle_context_polygons = self._collect_battle_context_polygons(self.selected_tile, self.selected_subtile)
-        battle_polygon = self.active_battle_subtile.battle_field.get("polygon", [])
-        if len(battle_polygon) >= 3:
-            aspect = self.width / self.height if self.height else 1.0
-            self._prepare_battle_field_transform(battle_polygon, aspect)
+        self.battle_transform_key = None
         self.battle_pan = np.array([0.0, 0.0], dtype=np.float32)
         self.battle_zoom = 1.0
         self.selected_battle_hex_index = None
@@ -368,14 +477,13 @@ class Renderer:
             return
 
         world_point = self._screen_to_battle_world(mouse_pos)
-        hexes = battle_field.get("hexes", [])
-        for index, hex_polygon in enumerate(hexes):
-            polygon = self._get_battle_hex_polygon(hex_polygon)
-            if self._battle_point_in_polygon(world_point, polygon):
-                self.selected_battle_hex_index = index
-                return
+        index = self.active_battle_hex_grid.hex_at_point(world_point) if self.active_battle_hex_grid else NO_HEX
+        if index != NO_HEX and self._battle_point_in_polygon(world_point, battle_field["hex_polygons"][index]):
+            self.selected_battle_hex_index = index
+            return
         self.selected_battle_hex_index = None
 
+    @profiler.profiled("draw_battle_field")
     def draw_battle_field(self):
         glDisable(GL_LIGHTING)
         glDisable(GL_DEPTH_TEST)
@@ -414,183 +522,128 @@ class Renderer:
         )
 
     def _draw_battle_field_geometry(self, battle_field, aspect):
-        polygon = [np.asarray(point, dtype=np.float32) for point in battle_field.get("polygon", [])]
-        hexes = battle_field.get("hexes", [])
+        polygon = battle_field["polygon"]
         if len(polygon) < 3:
             return
 
-        self._prepare_battle_field_transform(polygon, aspect)
-        render_data = self._get_battle_field_render_data(battle_field, polygon, hexes)
+        transform_key = (id(battle_field), aspect)
+        if self.battle_transform_key != transform_key:
+            self._prepare_battle_field_transform(polygon, aspect)
+            self.battle_transform_key = transform_key
+        render_data = self._get_battle_field_render_data(battle_field, polygon)
         glPushMatrix()
         self._apply_battle_field_transform()
-        self._draw_battle_context_polygons()
         self._draw_battle_field_render_data(render_data)
-        self._draw_selected_battle_hex(hexes)
+        self._draw_selected_battle_hex(render_data)
         glPopMatrix()
 
-    def _draw_battle_context_polygons(self):
-        if not self.active_battle_context_polygons:
-            return
-
-        fill_color = np.asarray(cfg.BATTLE_FIELD_CONTEXT_FILL_COLOR, dtype=np.float32) / 255.0
-        edge_color = np.asarray(cfg.BATTLE_FIELD_CONTEXT_EDGE_COLOR, dtype=np.float32) / 255.0
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
-        for item in self.active_battle_context_polygons:
-            polygon = item["polygon"]
-            alpha = float(item["alpha"])
-            if len(polygon) < 3:
-                continue
-
-            glColor4f(float(fill_color[0]), float(fill_color[1]), float(fill_color[2]), alpha)
-            glBegin(GL_POLYGON)
-            for point in polygon:
-                glVertex2fv(point)
-            glEnd()
-
-            glColor4f(float(edge_color[0]), float(edge_color[1]), float(edge_color[2]), min(1.0, alpha + 0.12))
-            glLineWidth(1.2)
-            glBegin(GL_LINE_LOOP)
-            for point in polygon:
-                glVertex2fv(point)
-            glEnd()
-
-        glDisable(GL_BLEND)
-
-    def _get_battle_field_render_data(self, battle_field, polygon, hexes):
+    def _get_battle_field_render_data(self, battle_field, polygon):
         key = (
             id(battle_field),
-            len(self.active_battle_context_polygons),
+            id(self.active_battle_context_polygons),
         )
         if self.battle_field_vbos is not None and self.battle_field_vbo_key == key:
             return self.battle_field_vbos
 
-        render_data = self._build_battle_field_render_data(battle_field, polygon, hexes)
+        render_data = self._build_battle_field_render_data(battle_field, polygon)
         self._upload_battle_field_render_data(render_data)
         self.battle_field_vbo_key = key
         return self.battle_field_vbos
 
-    def _build_battle_field_render_data(self, battle_field, polygon, hexes):
+    def _build_battle_field_render_data(self, battle_field, polygon):
         fill_color = self._rgba(cfg.BATTLE_FIELD_HEX_COLOR, 1.0)
         edge_color = self._rgba(cfg.BATTLE_FIELD_HEX_EDGE_COLOR, 1.0)
         boundary_color = self._rgba(cfg.BATTLE_FIELD_BOUNDARY_COLOR, 1.0)
         context_fill_color = np.asarray(cfg.BATTLE_FIELD_CONTEXT_FILL_COLOR, dtype=np.float32) / 255.0
         context_edge_color = np.asarray(cfg.BATTLE_FIELD_CONTEXT_EDGE_COLOR, dtype=np.float32) / 255.0
-        context_fill_vertices = []
-        context_fill_colors = []
-        context_line_vertices = []
-        context_line_colors = []
-        fill_vertices = []
-        fill_colors = []
-        line_vertices = []
-        line_colors = []
-        boundary_vertices = []
-        boundary_colors = []
-
-        context_hexes = self._build_battle_context_hexes(polygon, float(battle_field.get("hex_radius", 0.0)))
-        for hex_polygon, alpha, boundary_fade in context_hexes:
-            if len(hex_polygon) < 3:
-                continue
-            hex_darkening = cfg.BATTLE_FIELD_BOUNDARY_HEX_DARKEN_FACTOR + (
-                1.0 - cfg.BATTLE_FIELD_BOUNDARY_HEX_DARKEN_FACTOR
-            ) * boundary_fade
-            fill_rgba = np.array([
-                context_fill_color[0] * hex_darkening,
-                context_fill_color[1] * hex_darkening,
-                context_fill_color[2] * hex_darkening,
-                alpha,
-            ], dtype=np.float32)
-            line_rgba = np.array([
-                context_edge_color[0],
-                context_edge_color[1],
-                context_edge_color[2],
-                min(1.0, alpha + 0.08),
-            ], dtype=np.float32)
-            for index in range(1, len(hex_polygon) - 1):
-                context_fill_vertices.extend([hex_polygon[0], hex_polygon[index], hex_polygon[index + 1]])
-                context_fill_colors.extend([fill_rgba, fill_rgba, fill_rgba])
-
-            for index in range(len(hex_polygon)):
-                context_line_vertices.extend([hex_polygon[index], hex_polygon[(index + 1) % len(hex_polygon)]])
-                context_line_colors.extend([line_rgba, line_rgba])
-
-        for hex_index, hex_polygon in enumerate(hexes):
-            polygon_points = self._get_battle_hex_polygon(hex_polygon)
-            if len(polygon_points) < 3:
-                continue
-            color = fill_color
-            if self._is_battle_hex_boundary(hex_polygon, polygon):
-                coverage = self._get_battle_hex_coverage(hex_polygon, polygon)
-                color = self._fade_boundary_hex_color(fill_color, coverage)
-            for index in range(1, len(polygon_points) - 1):
-                fill_vertices.extend([polygon_points[0], polygon_points[index], polygon_points[index + 1]])
-                fill_colors.extend([color, color, color])
-        
-            for index in range(len(polygon_points)):
-                line_vertices.extend([polygon_points[index], polygon_points[(index + 1) % len(polygon_points)]])
-                line_colors.extend([edge_color, edge_color])
 
-        for index in range(len(polygon)):
-            boundary_vertices.extend([
-                polygon[index],
-                polygon[(index + 1) % len(polygon)]
-            ])
-            boundary_colors.extend([boundary_color, boundary_color])
+        context_polygons, context_alphas, context_fades = self._build_battle_context_hexes(battle_field, polygon)
+        context_darkening = cfg.BATTLE_FIELD_BOUNDARY_HEX_DARKEN_FACTOR + (
+            1.0 - cfg.BATTLE_FIELD_BOUNDARY_HEX_DARKEN_FACTOR
+        ) * context_fades
+        context_fill_rgba = np.column_stack((context_fill_color[None, :] * context_darkening[:, None], context_alphas))
+        context_line_rgba = np.column_stack((
+            np.repeat(context_edge_color[None, :], len(context_alphas), axis=0),
+            np.minimum(1.0, context_alphas + 0.08),
+        ))
+
+        hex_polygons = battle_field["hex_polygons"]
+        hex_coverage = battle_field["hex_coverage"]
+        hex_fill_rgba = np.repeat(fill_color[None, :], len(hex_polygons), axis=0)
+        boundary_mask = hex_coverage < 0.999
+        hex_fill_rgba[boundary_mask] = self._fade_boundary_hex_colors(fill_color, hex_coverage[boundary_mask])
+        hex_line_rgba = np.repeat(edge_color[None, :], len(hex_polygons), axis=0)
+
+        boundary_polygon = np.asarray(polygon, dtype=np.float32)[None, :, :]
+        boundary_rgba = boundary_color[None, :]
+
+        # Context subtiles have varying corner counts; padding with their first
+        # corner only adds degenerate triangles and zero-length edges.
+        context_items = [item for item in self.active_battle_context_polygons if len(item["polygon"]) >= 3]
+        context_outlines = pad_polygons([item["polygon"] for item in context_items]).astype(np.float32)
+        if not context_items:
+            context_outlines = np.zeros((0, 3, 2), dtype=np.float32)
+        outline_alphas = np.asarray([item["alpha"] for item in context_items], dtype=np.float32)
+        outline_fill_rgba = np.column_stack((np.repeat(context_fill_color[None, :], len(outline_alphas), axis=0), outline_alphas))
+        outline_line_rgba = np.column_stack((
+            np.repeat(context_edge_color[None, :], len(outline_alphas), axis=0),
+            np.minimum(1.0, outline_alphas + 0.12),
+        ))
 
         return {
-            "context_fill_vertices": np.asarray(context_fill_vertices, dtype=np.float32),
-            "context_fill_colors": np.asarray(context_fill_colors, dtype=np.float32),
-            "context_line_vertices": np.asarray(context_line_vertices, dtype=np.float32),
-            "context_line_colors": np.asarray(context_line_colors, dtype=np.float32),
-            "fill_vertices": np.asarray(fill_vertices, dtype=np.float32),
-            "fill_colors": np.asarray(fill_colors, dtype=np.float32),
-            "line_vertices": np.asarray(line_vertices, dtype=np.float32),
-            "line_colors": np.asarray(line_colors, dtype=np.float32),
-            "boundary_vertices": np.asarray(boundary_vertices, dtype=np.float32),
-            "boundary_colors": np.asarray(boundary_colors, dtype=np.float32),
+            "context_polygon_fill_vertices": self._fan_triangle_vertices(context_outlines),
+            "context_polygon_fill_colors": self._repeat_polygon_colors(outline_fill_rgba, 3 * (context_outlines.shape[1] - 2)),
+            "context_polygon_line_vertices": self._polygon_edge_vertices(context_outlines),
+            "context_polygon_line_colors": self._repeat_polygon_colors(outline_line_rgba, 2 * context_outlines.shape[1]),
+            "context_fill_vertices": self._fan_triangle_vertices(context_polygons),
+            "context_fill_colors": self._repeat_polygon_colors(context_fill_rgba, 3 * (context_polygons.shape[1] - 2)),
+            "context_line_vertices": self._polygon_edge_vertices(context_polygons),
+            "context_line_colors": self._repeat_polygon_colors(context_line_rgba, 2 * context_polygons.shape[1]),
+            "fill_vertices": self._fan_triangle_vertices(hex_polygons),
+            "fill_colors": self._repeat_polygon_colors(hex_fill_rgba, 3 * (hex_polygons.shape[1] - 2)),
+            "line_vertices": self._polygon_edge_vertices(hex_polygons),
+            "line_colors": self._repeat_polygon_colors(hex_line_rgba, 2 * hex_polygons.shape[1]),
+            "boundary_vertices": self._polygon_edge_vertices(boundary_polygon),
+            "boundary_colors": self._repeat_polygon_colors(boundary_rgba, 2 * boundary_polygon.shape[1]),
         }
 
+    def _fan_triangle_vertices(self, polygons):
+        # (N, K, 2) convex polygons -> (N * (K - 2) * 3, 2) triangle-list vertices.
+        corner_count = polygons.shape[1]
+        if len(polygons) == 0 or corner_count < 3:
+            return np.zeros((0, 2), dtype=np.float32)
+        second = np.arange(1, corner_count - 1)
+        fan_indices = np.column_stack((np.zeros_like(second), second, second + 1)).ravel()
+        return np.ascontiguousarray(polygons[:, fan_indices, :].reshape(-1, 2), dtype=np.float32)
+
+    def _polygon_edge_vertices(self, polygons):
+        # (N, K, 2) closed polygons -> (N * K * 2, 2) line-list vertices.
+        corner_count = polygons.shape[1]
+        if len(polygons) == 0 or corner_count < 2:
+            return np.zeros((0, 2), dtype=np.float32)
+        starts = np.arange(corner_count)
+        edge_indices = np.column_stack((starts, (starts + 1) % corner_count)).ravel()
+        return np.ascontiguousarray(polygons[:, edge_indices, :].reshape(-1, 2), dtype=np.float32)
+
+    def _repeat_polygon_colors(self, colors, vertices_per_polygon):
+        if len(colors) == 0 or vertices_per_polygon <= 0:
+            return np.zeros((0, 4), dtype=np.float32)
+        return np.ascontiguousarray(np.repeat(colors, vertices_per_polygon, axis=0), dtype=np.float32)
+
     def _upload_battle_field_render_data(self, render_data):
         if self.battle_field_vbos is None:
-            self.battle_field_vbos = {
-                "context_fill_vertices": glGenBuffers(1),
-                "context_fill_colors": glGenBuffers(1),
-                "context_line_vertices": glGenBuffers(1),
-                "context_line_colors": glGenBuffers(1),
-                "fill_vertices": glGenBuffers(1),
-                "fill_colors": glGenBuffers(1),
-                "line_vertices": glGenBuffers(1),
-                "line_colors": glGenBuffers(1),
-                "boundary_vertices": glGenBuffers(1),
-                "boundary_colors": glGenBuffers(1),
-                "context_fill_count": 0,
-                "context_line_count": 0,
-                "fill_count": 0,
-                "line_count": 0,
-                "boundary_count": 0,
-            }
-
-        for key in (
-            "context_fill_vertices",
-            "context_fill_colors",
-            "context_line_vertices",
-            "context_line_colors",
-            "fill_vertices",
-            "fill_colors",
-            "line_vertices",
-            "line_colors",
-            "boundary_vertices",
-            "boundary_colors",
-        ):
-            glBindBuffer(GL_ARRAY_BUFFER, self.battle_field_vbos[key])
-            glBufferData(GL_ARRAY_BUFFER, render_data[key], GL_STATIC_DRAW)
-
-        self.battle_field_vbos["context_fill_count"] = len(render_data["context_fill_vertices"])
-        self.battle_field_vbos["context_line_count"] = len(render_data["context_line_vertices"])
-        self.battle_field_vbos["fill_count"] = len(render_data["fill_vertices"])
-        self.battle_field_vbos["line_count"] = len(render_data["line_vertices"])
-        self.battle_field_vbos["boundary_count"] = len(render_data["boundary_vertices"])
+            self.battle_field_vbos = {}
+            for name, _, _ in BATTLE_FIELD_LAYERS:
+                self.battle_field_vbos[f"{name}_vertices"] = glGenBuffers(1)
+                self.battle_field_vbos[f"{name}_colors"] = glGenBuffers(1)
+
+        for name, _, _ in BATTLE_FIELD_LAYERS:
+            for suffix in ("vertices", "colors"):
+                key = f"{name}_{suffix}"
+                glBindBuffer(GL_ARRAY_BUFFER, self.battle_field_vbos[key])
+                glBufferData(GL_ARRAY_BUFFER, render_data[key], GL_STATIC_DRAW)
+            self.battle_field_vbos[f"{name}_count"] = len(render_data[f"{name}_vertices"])
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
     def _draw_battle_field_render_data(self, render_data):
         glEnableClientState(GL_VERTEX_ARRAY)
@@ -598,276 +651,90 @@ class Renderer:
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-        if render_data.get("context_fill_count", 0) > 0:
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["context_fill_vertices"])
-            glVertexPointer(2, GL_FLOAT, 0, None)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["context_fill_colors"])
-            glColorPointer(4, GL_FLOAT, 0, None)
-            glDrawArrays(GL_TRIANGLES, 0, render_data["context_fill_count"])
-
-        if render_data.get("context_line_count", 0) > 0:
-            glLineWidth(1.0)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["context_line_vertices"])
-            glVertexPointer(2, GL_FLOAT, 0, None)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["context_line_colors"])
-            glColorPointer(4, GL_FLOAT, 0, None)
-            glDrawArrays(GL_LINES, 0, render_data["context_line_count"])
-
-        if render_data["fill_count"] > 0:
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["fill_vertices"])
-            glVertexPointer(2, GL_FLOAT, 0, None)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["fill_colors"])
-            glColorPointer(4, GL_FLOAT, 0, None)
-            glDrawArrays(GL_TRIANGLES, 0, render_data["fill_count"])
-
-        if render_data["line_count"] > 0:
-            glLineWidth(1.0)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["line_vertices"])
-            glVertexPointer(2, GL_FLOAT, 0, None)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["line_colors"])
-            glColorPointer(4, GL_FLOAT, 0, None)
-            glDrawArrays(GL_LINES, 0, render_data["line_count"])
-
-        if render_data["boundary_count"] > 0:
-            glLineWidth(3.0)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["boundary_vertices"])
+        for name, primitive, line_width in BATTLE_FIELD_LAYERS:
+            count = render_data.get(f"{name}_count", 0)
+            if count <= 0:
+                continue
+            if line_width is not None:
+                glLineWidth(line_width)
+            glBindBuffer(GL_ARRAY_BUFFER, render_data[f"{name}_vertices"])
             glVertexPointer(2, GL_FLOAT, 0, None)
-            glBindBuffer(GL_ARRAY_BUFFER, render_data["boundary_colors"])
+            glBindBuffer(GL_ARRAY_BUFFER, render_data[f"{name}_colors"])
             glColorPointer(4, GL_FLOAT, 0, None)
-            glDrawArrays(GL_LINES, 0, render_data["boundary_count"])
+            glDrawArrays(primitive, 0, count)
 
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
         glDisable(GL_BLEND)
         glDisableClientState(GL_COLOR_ARRAY)
         glDisableClientState(GL_VERTEX_ARRAY)
 
-    def _draw_selected_battle_hex(self, hexes):
+    def _draw_selected_battle_hex(self, render_data):
         if self.selected_battle_hex_index is None:
             return
-        if self.selected_battle_hex_index < 0 or self.selected_battle_hex_index >= len(hexes):
-            return
 
-        polygon = self._get_battle_hex_polygon(hexes[self.selected_battle_hex_index])
-        if len(polygon) < 3:
+        # Every hex owns 4 fan triangles and 6 edges, i.e. 12 consecutive
+        # vertices in both the fill and the line buffers.
+        first_vertex = self.selected_battle_hex_index * 12
+        if self.selected_battle_hex_index < 0 or first_vertex + 12 > render_data.get("fill_count", 0):
             return
 
         fill_color = np.asarray(cfg.BATTLE_FIELD_SELECTED_HEX_COLOR, dtype=np.float32) / 255.0
         edge_color = np.asarray(cfg.BATTLE_FIELD_BOUNDARY_COLOR, dtype=np.float32) / 255.0
+        glEnableClientState(GL_VERTEX_ARRAY)
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
         glColor4f(float(fill_color[0]), float(fill_color[1]), float(fill_color[2]), 0.88)
-        glBegin(GL_TRIANGLES)
-        for index in range(1, len(polygon) - 1):
-            glVertex2fv(polygon[0])
-            glVertex2fv(polygon[index])
-            glVertex2fv(polygon[index + 1])
-        glEnd()
+        glBindBuffer(GL_ARRAY_BUFFER, render_data["fill_vertices"])
+        glVertexPointer(2, GL_FLOAT, 0, None)
+        glDrawArrays(GL_TRIANGLES, first_vertex, 12)
 
         glColor4f(float(edge_color[0]), float(edge_color[1]), float(edge_color[2]), 0.95)
         glLineWidth(2.0)
-        glBegin(GL_LINE_LOOP)
-        for point in polygon:
-            glVertex2fv(point)
-        glEnd()
+        glBindBuffer(GL_ARRAY_BUFFER, render_data["line_vertices"])
+        glVertexPointer(2, GL_FLOAT, 0, None)
+        glDrawArrays(GL_LINES, first_vertex, 12)
 
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
         glDisable(GL_BLEND)
+        glDisableClientState(GL_VERTEX_ARRAY)
 
-    def _build_battle_context_hexes(self, active_polygon, radius):
+    def _build_battle_context_hexes(self, battle_field, active_polygon):
+        radius = float(battle_field.get("hex_radius", 0.0))
         if not self.active_battle_context_polygons or radius <= 1e-8:
-            return []
+            return self._empty_battle_context_hexes()
 
         max_alpha = float(np.clip(cfg.BATTLE_FIELD_CONTEXT_HEX_MAX_ALPHA, 0.0, 1.0))
         min_alpha = float(np.clip(cfg.BATTLE_FIELD_CONTEXT_HEX_MIN_ALPHA, 0.0, max_alpha))
         depth = max(radius, radius * float(cfg.BATTLE_FIELD_CONTEXT_HEX_DEPTH_RADIUS))
-        owned_hexes = {}
-        full_area = self._battle_polygon_area_2d(self._make_battle_hex_2d(np.array([0.0, 0.0], dtype=np.float32), radius))
-        for item in self.active_battle_context_polygons:
-            polygon = item["polygon"]
-            if len(polygon) < 3:
-                continue
-
-            for hex_polygon, center_distance, center, clipped_area in self._generate_context_hex_band(active_polygon, polygon, radius, depth):
-                center_key = tuple(np.round(center / max(radius, 1e-8), 3))
-                current_owner = owned_hexes.get(center_key)
-                if current_owner is not None and clipped_area <= current_owner["area"]:
-                    continue
-
-                fade = 1.0 - min(1.0, center_distance / max(depth, 1e-8))
-                alpha = min_alpha + (max_alpha - min_alpha) * fade
-                coverage = float(np.clip(clipped_area / max(full_area, 1e-10), 0.0, 1.0))
-                owned_hexes[center_key] = {
-                    "area": clipped_area,
-                    "hex": hex_polygon,
-                    "alpha": alpha,
-                    "boundary_fade": coverage,
-                }
-
-        return [
-            (item["hex"], item["alpha"], item["boundary_fade"])
-            for item in owned_hexes.values()
-            if item["alpha"] > 0.0
-        ]
-
-    def _generate_context_hex_band(self, active_polygon, context_polygon, radius, depth):
-        active_array = np.asarray(active_polygon, dtype=np.float32)
-        polygon_array = np.asarray(context_polygon, dtype=np.float32)
-        min_x, min_y = polygon_array.min(axis=0) - radius * 2.0
-        max_x, max_y = polygon_array.max(axis=0) + radius * 2.0
-        hex_width = math.sqrt(3.0) * radius
-        row_height = 1.5 * radius
-        grid_origin_x, grid_origin_y = active_array.min(axis=0) - radius * 2.0
-        min_row = int(math.floor((float(min_y) - float(grid_origin_y)) / row_height)) - 1
-        max_row = int(math.ceil((float(max_y) - float(grid_origin_y)) / row_height)) + 1
-        hexes = []
-
-        for row in range(min_row, max_row + 1):
-            y = float(grid_origin_y) + row * row_height
-            x_offset = (row % 2) * hex_width * 0.5
-            row_origin_x = float(grid_origin_x) - x_offset
-            min_col = int(math.floor((float(min_x) - row_origin_x) / hex_width)) - 1
-            max_col = int(math.ceil((float(max_x) - row_origin_x) / hex_width)) + 1
-            for col in range(min_col, max_col + 1):
-                x = row_origin_x + col * hex_width
-                center = np.array([x, y], dtype=np.float32)
-                distance = self._point_to_polygon_edge_distance(center, active_polygon)
-                if distance <= depth and self._battle_point_in_polygon(center, context_polygon):
-                    hex_polygon = self._make_battle_hex_2d(center, radius)
-                    clipped_hex = self._clip_polygon_to_convex_polygon_2d(hex_polygon, context_polygon)
-                    clipped_area = self._battle_polygon_area_2d(clipped_hex)
-                    if clipped_area > 1e-10:
-                        hexes.append((hex_polygon, distance, center, clipped_area))
-        return hexes
-
-    def _make_battle_hex_2d(self, center, radius):
-        return [
-            np.array([
-                center[0] + radius * math.cos(math.radians(60.0 * index + 30.0)),
-                center[1] + radius * math.sin(math.radians(60.0 * index + 30.0)),
-            ], dtype=np.float32)
-            for index in range(6)
-        ]
-
-    def _clip_polygon_to_convex_polygon_2d(self, polygon, boundary):
-        clipped = [np.asarray(point, dtype=np.float32) for point in polygon]
-        orientation = self._battle_polygon_area_signed(boundary)
-        for index in range(len(boundary)):
-            edge_start = boundary[index]
-            edge_end = boundary[(index + 1) % len(boundary)]
-            clipped = self._clip_polygon_to_boundary_edge_2d(clipped, edge_start, edge_end, orientation)
-            if len(clipped) < 3:
-                return []
-        return clipped
-
-    def _clip_polygon_to_boundary_edge_2d(self, polygon, edge_start, edge_end, boundary_orientation):
-        clipped = []
-        previous = polygon[-1]
-        previous_inside = self._is_inside_boundary_edge_2d(previous, edge_start, edge_end, boundary_orientation)
-        for current in polygon:
-            current_inside = self._is_inside_boundary_edge_2d(current, edge_start, edge_end, boundary_orientation)
-            if current_inside != previous_inside:
-                intersection = self._line_boundary_intersection_2d(previous, current, edge_start, edge_end)
-                if intersection is not None:
-                    clipped.append(intersection)
-            if current_inside:
-                clipped.append(current)
-            previous = current
-            previous_inside = current_inside
-        return self._remove_duplicate_polygon_vertices_2d(clipped)
-
-    def _is_inside_boundary_edge_2d(self, point, edge_start, edge_end, boundary_orientation):
-        edge = edge_end - edge_start
-        relative = point - edge_start
-        cross = edge[0] * relative[1] - edge[1] * relative[0]
-        return cross >= -1e-8 if boundary_orientation >= 0 else cross <= 1e-8
-
-    def _line_boundary_intersection_2d(self, start, end, edge_start, edge_end):
-        direction = end - start
-        edge_direction = edge_end - edge_start
-        denominator = direction[0] * edge_direction[1] - direction[1] * edge_direction[0]
-        if abs(denominator) <= 1e-10:
-            return None
-        relative = edge_start - start
-        t = (relative[0] * edge_direction[1] - relative[1] * edge_direction[0]) / denominator
-        return np.asarray(start + direction * np.clip(t, 0.0, 1.0), dtype=np.float32)
-
-    def _battle_polygon_area_2d(self, polygon):
-        return abs(self._battle_polygon_area_signed(polygon)) if len(polygon) >= 3 else 0.0
-
-    def _remove_duplicate_polygon_vertices_2d(self, polygon, distance_epsilon=1e-8):
-        if len(polygon) < 2:
-            return polygon
-
-        cleaned = []
-        for point in polygon:
-            if cleaned and np.sum((point - cleaned[-1]) * (point - cleaned[-1])) <= distance_epsilon * distance_epsilon:
-                continue
-            cleaned.append(point)
-
-        if len(cleaned) > 1 and np.sum((cleaned[0] - cleaned[-1]) * (cleaned[0] - cleaned[-1])) <= distance_epsilon * distance_epsilon:
-            cleaned.pop()
-        return cleaned
-
-    def _point_to_polygon_edge_distance(self, point, polygon):
-        if len(polygon) < 2:
-            return 0.0
-
-        min_distance_sq = float("inf")
-        for index in range(len(polygon)):
-            distance_sq = self._point_segment_distance_sq_2d(point, polygon[index], polygon[(index + 1) % len(polygon)])
-            if distance_sq < min_distance_sq:
-                min_distance_sq = distance_sq
-        return math.sqrt(max(0.0, min_distance_sq))
-
-    def _point_segment_distance_sq_2d(self, point, segment_start, segment_end):
-        segment = segment_end - segment_start
-        segment_length_sq = float(np.dot(segment, segment))
-        if segment_length_sq <= 1e-16:
-            return float(np.sum((point - segment_start) * (point - segment_start)))
-
-        t = float(np.dot(point - segment_start, segment) / segment_length_sq)
-        t = np.clip(t, 0.0, 1.0)
-        closest = segment_start + segment * t
-        return float(np.sum((point - closest) * (point - closest)))
-
-    def _get_battle_hex_polygon(self, hex_entry):
-        if isinstance(hex_entry, dict):
-            return [np.asarray(point, dtype=np.float32) for point in hex_entry.get("polygon", [])]
-        return [np.asarray(point, dtype=np.float32) for point in hex_entry]
-
-    def _is_battle_hex_boundary(self, hex_entry, active_polygon):
-        if isinstance(hex_entry, dict):
-            return float(hex_entry.get("coverage", 1.0)) < 0.999
-
-        hex_polygon = self._get_battle_hex_polygon(hex_entry)
-        if len(hex_polygon) < 3:
-            return False
-        return any(not self._battle_point_in_polygon(point, active_polygon) for point in hex_polygon)
-
-    def _get_battle_hex_coverage(self, hex_entry, active_polygon):
-        if isinstance(hex_entry, dict):
-            return float(np.clip(hex_entry.get("coverage", 1.0), 0.0, 1.0))
+        band = build_context_hex_band(
+            active_polygon,
+            [item["polygon"] for item in self.active_battle_context_polygons],
+            battle_field["hex_origin"],
+            radius,
+            depth
+        )
 
-        hex_polygon = self._get_battle_hex_polygon(hex_entry)
-        full_area = self._battle_polygon_area_2d(hex_polygon)
-        if full_area <= 1e-10:
-            return 1.0
+        fade = 1.0 - np.minimum(1.0, band["distances"] / max(depth, 1e-8))
+        alphas = (min_alpha + (max_alpha - min_alpha) * fade).astype(np.float32)
+        visible_mask = alphas > 0.0
+        return band["hex_polygons"][visible_mask], alphas[visible_mask], band["coverage"][visible_mask]
 
-        clipped_hex = self._clip_polygon_to_convex_polygon_2d(hex_polygon, active_polygon)
-        return float(np.clip(self._battle_polygon_area_2d(clipped_hex) / full_area, 0.0, 1.0))
+    def _empty_battle_context_hexes(self):
+        return (
+            np.zeros((0, 6, 2), dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+        )
 
-    def _fade_boundary_hex_color(self, fill_color, coverage):
-        smooth_coverage = float(np.clip(coverage, 0.0, 1.0))
+    def _fade_boundary_hex_colors(self, fill_color, coverage):
+        smooth_coverage = np.clip(np.asarray(coverage, dtype=np.float32), 0.0, 1.0)
         smooth_coverage = smooth_coverage * smooth_coverage * (3.0 - 2.0 * smooth_coverage)
         min_darken = float(np.clip(cfg.BATTLE_FIELD_BOUNDARY_HEX_DARKEN_FACTOR, 0.0, 1.0))
         min_alpha = float(np.clip(cfg.BATTLE_FIELD_BOUNDARY_HEX_MIN_ALPHA, 0.0, 1.0))
         darken = min_darken + (1.0 - min_darken) * smooth_coverage
         alpha = min_alpha + (1.0 - min_alpha) * smooth_coverage
-        return np.array([
-            fill_color[0] * darken,
-            fill_color[1] * darken,
-            fill_color[2] * darken,
-            alpha,
-        ], dtype=np.float32)
+        return np.column_stack((fill_color[None, :3] * darken[:, None], alpha)).astype(np.float32)
 
     def _rgba(self, color, alpha):
         rgb = np.asarray(color, dtype=np.float32) / 255.0
@@ -885,33 +752,33 @@ class Renderer:
         self._battle_transform_center = center
         self._battle_transform_scale = scale
 
+    def _get_battle_view_matrix(self):
+        # 2D affine map from battle field coordinates to view coordinates:
+        # pan * zoom * rotation * fit scale * recenter.
+        cos_angle = math.cos(self.active_battle_rotation)
+        sin_angle = math.sin(self.active_battle_rotation)
+        linear = float(self.battle_zoom) * self._battle_transform_scale * np.array([
+            [cos_angle, -sin_angle],
+            [sin_angle, cos_angle],
+        ], dtype=np.float64)
+        translation = np.asarray(self.battle_pan, dtype=np.float64) - linear @ np.asarray(self._battle_transform_center, dtype=np.float64)
+        return linear, translation
+
     def _apply_battle_field_transform(self):
-        center = getattr(self, "_battle_transform_center", np.array([0.0, 0.0], dtype=np.float32))
-        scale = getattr(self, "_battle_transform_scale", 1.0)
-        glTranslatef(float(self.battle_pan[0]), float(self.battle_pan[1]), 0.0)
-        glScalef(float(self.battle_zoom), float(self.battle_zoom), 1.0)
-        glRotatef(math.degrees(float(self.active_battle_rotation)), 0.0, 0.0, 1.0)
-        glScalef(float(scale), float(scale), 1.0)
-        glTranslatef(float(-center[0]), float(-center[1]), 0.0)
+        linear, translation = self._get_battle_view_matrix()
+        matrix = np.identity(4, dtype=np.float32)
+        matrix[:2, :2] = linear
+        matrix[:2, 3] = translation
+        glMultMatrixf(matrix.T)
 
     def _screen_to_battle_world(self, mouse_pos):
         aspect = self.width / self.height if self.height else 1.0
         ndc = np.array([
             (mouse_pos[0] / max(self.width, 1)) * 2.0 * aspect - aspect,
             1.0 - (mouse_pos[1] / max(self.height, 1)) * 2.0,
-        ], dtype=np.float32)
-        local = (ndc - self.battle_pan) / max(self.battle_zoom, 1e-8)
-        cos_angle = math.cos(-self.active_battle_rotation)
-        sin_angle = math.sin(-self.active_battle_rotation)
-        unrotated = np.array([
-            local[0] * cos_angle - local[1] * sin_angle,
-            local[0] * sin_angle + local[1] * cos_angle,
-        ], dtype=np.float32)
-        return unrotated / max(getattr(self, "_battle_transform_scale", 1.0), 1e-8) + getattr(
-            self,
-            "_battle_transform_center",
-            np.array([0.0, 0.0], dtype=np.float32)
-        )
+        ], dtype=np.float64)
+        linear, translation = self._get_battle_view_matrix()
+        return np.linalg.solve(linear, ndc - translation).astype(np.float32)
 
     def _battle_point_in_polygon(self, point, polygon):
         if len(polygon) < 3:
@@ -1092,41 +959,29 @@ class Renderer:
 
     def draw_selected_tile(self):
         if self.selected_subtile is not None:
-            glDisable(GL_LIGHTING)
-            glColor3f(1.0, 1.0, 0.0)
-            glLineWidth(3.0)
-
-            glBegin(GL_LINE_LOOP)
-            for vertex in self.selected_subtile.vertices:
-                glVertex3fv(np.asarray(vertex, dtype=np.float32) * 1.0035)
-            glEnd()
-
-            glEnable(GL_LIGHTING)
+            vertices = np.asarray(self.selected_subtile.vertices, dtype=np.float32) * 1.0035
+            self.overlay_stream.add_line_loop(vertices, SELECTION_COLOR, 3.0)
         elif self.selected_tile:
-            glDisable(GL_LIGHTING)
-            glColor3f(1.0, 1.0, 0.0) # Yellow
-            glLineWidth(3.0)
-
-            glBegin(GL_LINE_LOOP)
-            for vertex in self.selected_tile.vertices:
-                v = vertex.to_np() * 1.001
-                glVertex3fv(v)
-            glEnd()
-            
-            glEnable(GL_LIGHTING)
+            vertices = self.game_world.vertex_positions[self.selected_tile.vertex_ids] * 1.001
+            self.overlay_stream.add_line_loop(vertices, SELECTION_COLOR, 3.0)
 
+    @profiler.profiled("draw_subtiles")
     def draw_subtiles(self):
         should_render_subtiles = self._should_render_subtiles()
-        if not should_render_subtiles and not cfg.SUBTILE_DEBUG_DRAW_POINTS:
-            return
+        if not should_render_subtiles:
+            self.battle_field_camera_focus_tiles = []
+            if not cfg.SUBTILE_DEBUG_DRAW_POINTS:
+                return
 
         aspect_ratio = self.width / self.height if self.height else 1.0
         visible_tiles = self.game_world.get_visible_tiles_for_subtiles(self.camera, aspect_ratio)
         if not visible_tiles:
+            self.battle_field_camera_focus_tiles = []
             return
 
         if should_render_subtiles:
             self.game_world.ensure_subtiles_generated(visible_tiles)
+            self.battle_field_camera_focus_tiles = visible_tiles[:cfg.BATTLE_FIELD_PRECOMPUTE_FOCUS_TILES]
 
         visible_subtile_vbos = [
             (tile, prepared_vbo)
@@ -1194,38 +1049,27 @@ class Renderer:
         subtile_version = getattr(tile, "subtile_version", 0)
         if cached_vbo is not None and cached_vbo[2] == subtile_count and cached_vbo[3] == subtile_version:
             return cached_vbo[0], cached_vbo[1]
+        return self._build_subtile_edge_vbo(tile, cached_vbo, subtile_count, subtile_version)
 
-        edge_vertices = []
-        seen_edges = set()
-
-        for subtile in tile.subtiles:
-            if len(subtile.vertices) < 2:
-                continue
-            for index in range(len(subtile.vertices)):
-                raw_start = subtile.vertices[index]
-                raw_end = subtile.vertices[(index + 1) % len(subtile.vertices)]
-                if self._is_tile_boundary_edge(tile, raw_start, raw_end):
-                    continue
-
-                start = raw_start * 1.0025
-                end = raw_end * 1.0025
-                if np.sum((start - end) * (start - end)) <= 1e-12:
-                    continue
-                edge_key = self._subtile_edge_key(start, end)
-                if edge_key in seen_edges:
-                    continue
-                seen_edges.add(edge_key)
-                edge_vertices.extend([start, end])
-
-        edge_array = np.array(edge_vertices, dtype=np.float32)
+    @profiler.profiled("subtile_edge_vbo_upload")
+    def _build_subtile_edge_vbo(self, tile, cached_vbo, subtile_count, subtile_version):
+        # The edge buffer comes straight from the subtile cache entry, already
+        # in GL_LINES layout, and is handed to GL without another copy.
+        edge_array = self.game_world.get_subtile_edge_vertices(tile)
         edge_count = len(edge_array)
         if edge_count == 0:
             return None
 
-        edge_vbo = cached_vbo[0] if cached_vbo is not None else glGenBuffers(1)
-        glBindBuffer(GL_ARRAY_BUFFER, edge_vbo)
-        glBufferData(GL_ARRAY_BUFFER, edge_array, GL_STATIC_DRAW)
-        self.subtile_edge_vbos[tile.id] = (edge_vbo, edge_count, subtile_count, subtile_version)
+        if cached_vbo is not None and cached_vbo[4] >= edge_array.nbytes:
+            edge_vbo, capacity = cached_vbo[0], cached_vbo[4]
+            glBindBuffer(GL_ARRAY_BUFFER, edge_vbo)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, edge_array.nbytes, edge_array)
+        else:
+            edge_vbo = cached_vbo[0] if cached_vbo is not None else glGenBuffers(1)
+            capacity = edge_array.nbytes
+            glBindBuffer(GL_ARRAY_BUFFER, edge_vbo)
+            glBufferData(GL_ARRAY_BUFFER, edge_array, GL_STATIC_DRAW)
+        self.subtile_edge_vbos[tile.id] = (edge_vbo, edge_count, subtile_count, subtile_version, capacity)
         return edge_vbo, edge_count
 
     def _get_subtile_edge_color(self, tile):
@@ -1259,7 +1103,7 @@ class Renderer:
 
         cached_vbo = self.subtile_point_vbos.get(tile.id)
         point_source = getattr(tile, "subtile_seed_points", [])
-        if not point_source:
+        if len(point_source) == 0:
             return None
 
         subtile_count = len(tile.subtiles)
@@ -1294,106 +1138,53 @@ class Renderer:
         self.subtile_point_vbos[tile.id] = (point_vbo, point_count, subtile_count, subtile_version, seed_count)
         return point_vbo, point_count
 
-    def _subtile_edge_key(self, start, end):
-        a = tuple(np.round(start, 6))
-        b = tuple(np.round(end, 6))
-        return (a, b) if a <= b else (b, a)
-
-    def _is_tile_boundary_edge(self, tile, start, end):
-        boundary_epsilon_sq = 1e-8
-        tile_vertices = [vertex.to_np() for vertex in tile.vertices]
-
-        for index in range(len(tile_vertices)):
-            segment_start = tile_vertices[index]
-            segment_end = tile_vertices[(index + 1) % len(tile_vertices)]
-            if (
-                self._point_segment_distance_sq(start, segment_start, segment_end) <= boundary_epsilon_sq and
-                self._point_segment_distance_sq(end, segment_start, segment_end) <= boundary_epsilon_sq
-            ):
-                return True
-
-        return False
-
-    def _point_segment_distance_sq(self, point, segment_start, segment_end):
-        segment = segment_end - segment_start
-        segment_length_sq = float(np.dot(segment, segment))
-        if segment_length_sq <= 1e-16:
-            return float(np.sum((point - segment_start) * (point - segment_start)))
-
-        t = float(np.dot(point - segment_start, segment) / segment_length_sq)
-        t = np.clip(t, 0.0, 1.0)
-        closest = segment_start + segment * t
-        return float(np.sum((point - closest) * (point - closest)))
-
+    @profiler.profiled("draw_units")
     def draw_units(self):
         unit_model = self.models.get("unit")
-        if not unit_model or not unit_model.mesh:
+        if not unit_model or not unit_model.ensure_uploaded():
             return
 
-        glColor3f(1.0, 1.0, 1.0)
-
-        for unit in self.game_world.units:
-            glPushMatrix()
-
-            # -- Align model to tile normal --
-            target_up = unit.tile.normal
-            model_up = np.array([0.0, 1.0, 0.0])
-            
-            target_up_norm = np.linalg.norm(target_up)
-            if target_up_norm > 1e-6:
-                target_up = target_up / target_up_norm
-
-            axis = np.cross(model_up, target_up)
-            axis_norm = np.linalg.norm(axis)
-            
-            angle_rad = np.arccos(np.clip(np.dot(model_up, target_up), -1.0, 1.0))
-            angle_deg = np.degrees(angle_rad)
-
-            # -- Calculate position to place base of the model on the tile --
-            scale = 0.02
-            model_base_y = unit_model.mesh.bounds[0][1]
-            offset_distance = -model_base_y * scale
-            offset_vector = target_up * offset_distance
-            position = unit.tile.center + offset_vector
-
-            # -- Apply transformations --
-            glTranslatef(position[0], position[1], position[2])
+        selected_unit_id = self.selected_unit.id if self.selected_unit is not None else -1
+        instance_key = (self.game_world.units.version, selected_unit_id)
+        if instance_key != self.unit_instance_key:
+            self._update_unit_instances(unit_model, selected_unit_id)
+            self.unit_instance_key = instance_key
 
-            if axis_norm > 1e-6:
-                axis = axis / axis_norm
-                glRotatef(angle_deg, axis[0], axis[1], axis[2])
-
-            glScalef(scale, scale, scale)
+        glColor3f(1.0, 1.0, 1.0)
+        unit_model.draw_instanced(highlight_emission=(0.6, 0.3, 0.0))
 
-            if unit == self.selected_unit:
-                glMaterialfv(GL_FRONT, GL_EMISSION, [0.6, 0.3, 0.0, 1.0])
-            else:
-                glMaterialfv(GL_FRONT, GL_EMISSION, [0.0, 0.0, 0.0, 1.0])
+    def _update_unit_instances(self, unit_model, selected_unit_id):
+        registry = self.game_world.units
+        unit_ids = registry.active_ids()
+        tile_ids = registry.tile_ids[unit_ids]
 
-            unit_model.draw()
-            glPopMatrix()
+        # -- Align model to tile normal and place its base on the tile --
+        scale = 0.02
+        up_vectors = self.game_world.tile_normals[tile_ids].astype(np.float64)
+        up_vectors /= np.maximum(np.linalg.norm(up_vectors, axis=1, keepdims=True), 1e-6)
+        offset_distance = -unit_model.bounds[0][1] * scale
+        positions = self.game_world.tile_centers[tile_ids] + up_vectors * offset_distance
 
-        glMaterialfv(GL_FRONT, GL_EMISSION, [0.0, 0.0, 0.0, 1.0])
+        instance_matrices = build_alignment_matrices(positions, up_vectors, scale)
+        highlights = (unit_ids == selected_unit_id).astype(np.float32)
+        unit_model.set_instances(instance_matrices, highlights)
 
     def draw_possible_moves(self):
         if self.selected_unit:
-            glDisable(GL_LIGHTING)
-            glEnable(GL_BLEND)
-            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-            glColor4f(0.0, 1.0, 0.0, 0.5) # Semi-transparent green
-
-            for neighbor in self.selected_unit.tile.neighbors:
-                if not neighbor.unit:
-                    glBegin(GL_TRIANGLE_FAN)
-                    glVertex3fv(neighbor.center * 1.002)
-                    for vertex in neighbor.vertices:
-                        glVertex3fv(vertex.to_np() * 1.002)
-                    glVertex3fv(neighbor.vertices[0].to_np() * 1.002)
-                    glEnd()
-
-            glDisable(GL_BLEND)
-            glEnable(GL_LIGHTING)
+            neighbors = self.selected_unit.tile.neighbors
+            occupied = self.game_world.units.occupied_mask([neighbor.id for neighbor in neighbors])
+            free_tiles = [neighbor for neighbor, is_occupied in zip(neighbors, occupied) if not is_occupied]
+            if not free_tiles:
+                return
+            ring_vertex_ids = np.concatenate([tile.vertex_ids for tile in free_tiles])
+            self.overlay_stream.add_polygons(
+                np.array([tile.center for tile in free_tiles]) * 1.002,
+                self.game_world.vertex_positions[ring_vertex_ids] * 1.002,
+                [len(tile.vertex_ids) for tile in free_tiles],
+                POSSIBLE_MOVE_COLOR
+            )
 
+    @profiler.profiled("draw_ui")
     def draw_ui(self):
         glMatrixMode(GL_PROJECTION)
         glPushMatrix()
@@ -1473,6 +1264,20 @@ class Renderer:
         y_offset += render(f"Zoom: {self.camera.zoom:.2f}", 0, y_offset)
         y_offset += render(f"Vertices: {self.tile_vert_count}", 0, y_offset)
         y_offset += render(f"Light Angle: {math.degrees(self.light_angle):.2f}", 0, y_offset)
+
+        if profiler.enabled:
+            last_ms, mean_ms, max_ms = profiler.get_frame_stats()
+            y_offset += render(f"Frame ms: {last_ms:6.2f} avg {mean_ms:6.2f} max {max_ms:6.2f}  (F4: dump trace)", 0, y_offset)
+            for name, scope_last, scope_mean, scope_max in profiler.get_scope_stats():
+                y_offset += render(f"  {name:<26} {scope_last:6.2f} avg {scope_mean:6.2f} max {scope_max:6.2f}", 0, y_offset)
+        for line in self.game_world.subtile_metrics.get_overlay_lines():
+            y_offset += render(line, 0, y_offset)
+        store = self.game_world.subtile_store
+        y_offset += render(
+            f"Subtile objects: {len(store.resident)}/{store.capacity} tiles resident, "
+            f"{store.materialized_count} materialized, {store.eviction_count} evicted", 0, y_offset
+        )
+        y_offset += render(self.overlay_stream.get_overlay_line(), 0, y_offset)
         
         glDisable(GL_BLEND)
         glEnable(GL_DEPTH_TEST)
@@ -1,110 +1,180 @@
-import random
-from collections import defaultdict
+import heapq
 import numpy as np
-from geometry import Vertex
 import config as cfg
 
+FILL_EPSILON = 1e-6
+
 class RiverGenerator:
-    def __init__(self, vertices, vert_to_tiles, vert_neighbors):
-        self.world_vertices = vertices
-        self.vert_to_tiles = vert_to_tiles
-        self.vert_neighbors = vert_neighbors
-        
-        self.vertex_terrain = {}
-        self.downstream_map = {}
-        self.vertex_flow = defaultdict(float)
+    """Height-driven drainage over the tile vertex graph.
+
+    Vertex elevations come from the adjacent tile heights. Depressions are
+    filled with a priority flood from the sea so every land vertex drains,
+    each vertex points at its steepest-descent neighbour, and flow is
+    accumulated in one pass from high to low. Rivers are the vertices whose
+    accumulated flow reaches RIVER_MIN_ACCUMULATION_FRACTION of the land
+    vertices (at least RIVER_MIN_ACCUMULATION), kept for the RIVER_COUNT
+    largest river mouths, so river density does not depend on the
+    subdivision level. All state lives in arrays indexed by vertex id; the
+    graph arrays are GameWorld's -1 padded id tables.
+    """
+
+    def __init__(self, vertex_positions, vertex_tile_ids, vertex_neighbor_ids, tiles):
+        self.vertex_positions = np.asarray(vertex_positions, dtype=np.float64).reshape(-1, 3)
+        self.vertex_tile_ids = np.asarray(vertex_tile_ids, dtype=np.int32).reshape(len(self.vertex_positions), -1)
+        self.vertex_neighbor_ids = np.asarray(vertex_neighbor_ids, dtype=np.int32).reshape(len(self.vertex_positions), -1)
+        self.tile_is_water = np.array([tile.is_water() for tile in tiles], dtype=bool)
+        self.tile_heights = np.array([tile.height for tile in tiles], dtype=np.float64)
+
+        vertex_count = len(self.vertex_positions)
+
+        self.vertex_is_sea = np.zeros(vertex_count, dtype=bool)
+        self.vertex_elevation = np.zeros(vertex_count, dtype=np.float64)
+        self.filled_elevation = np.zeros(vertex_count, dtype=np.float64)
+        self.downstream = np.full(vertex_count, -1, dtype=np.int32)
+        self.vertex_flow = np.zeros(vertex_count, dtype=np.float32)
+        self.vertex_outlet = np.full(vertex_count, -1, dtype=np.int32)
+        self.is_river = np.zeros(vertex_count, dtype=bool)
 
     def _classify_vertices(self):
-        for vertex in self.world_vertices:
-            is_sea = any(tile.is_water() for tile in self.vert_to_tiles[vertex])
-            self.vertex_terrain[vertex] = 'sea' if is_sea else 'land'
-
-    def _find_inland_sources(self, num_rivers):
-        candidates = []
-        for vertex in self.world_vertices:
-            if self.vertex_terrain[vertex] == 'land':
-                if all(self.vertex_terrain[n] == 'land' for n in self.vert_neighbors[vertex]):
-                    avg_height = sum(t.height for t in self.vert_to_tiles[vertex]) / len(self.vert_to_tiles[vertex])
-                    if avg_height > 0.6:
-                        candidates.append(vertex)
-        
-        if not candidates:
-            candidates = [v for v in self.world_vertices if self.vertex_terrain[v] == 'land' and all(self.vertex_terrain[n] == 'land' for n in self.vert_neighbors[v])]
-
-        return random.sample(candidates, min(num_rivers, len(candidates)))
-
-    def _build_flow_network(self, sources):
-        river_vertices = set()
-        for source in sources:
-            if source in river_vertices: continue
-            
-            current_vertex = source
-            path = [current_vertex]
-            river_vertices.add(current_vertex)
-
-            for _ in range(200):
-                if current_vertex in self.downstream_map: break
-                neighbors = self.vert_neighbors[current_vertex]
-                valid_neighbors = [n for n in neighbors if n not in path]
-                sea_neighbors = [n for n in valid_neighbors if self.vertex_terrain[n] == 'sea']
-                if sea_neighbors:
-                    next_vertex = random.choice(sea_neighbors)
-                    self.downstream_map[current_vertex] = next_vertex
-                    break
-                if not valid_neighbors: break
-                next_vertex = random.choice(valid_neighbors)
-                self.downstream_map[current_vertex] = next_vertex
-                river_vertices.add(next_vertex)
-                path.append(next_vertex)
-                current_vertex = next_vertex
+        tile_ids = self.vertex_tile_ids
+        valid = tile_ids >= 0
+        safe_ids = np.where(valid, tile_ids, 0)
+        self.vertex_is_sea = (self.tile_is_water[safe_ids] & valid).any(axis=1)
+
+        # Sea vertices sit at sea level; land vertices average their tiles.
+        height_sum = np.where(valid, self.tile_heights[safe_ids], 0.0).sum(axis=1)
+        self.vertex_elevation = height_sum / np.maximum(valid.sum(axis=1), 1)
+        self.vertex_elevation[self.vertex_is_sea] = 0.0
+
+    def _fill_depressions(self):
+        """Priority flood from the sea: raises every pit to just above its spill point."""
+        filled = self.vertex_elevation.copy()
+        neighbor_lists = [[n for n in row if n >= 0] for row in self.vertex_neighbor_ids.tolist()]
+        elevation = filled.tolist()
+        done = self.vertex_is_sea.tolist()
+
+        heap = [(elevation[v], v) for v in np.flatnonzero(self.vertex_is_sea).tolist()]
+        heapq.heapify(heap)
+        while heap:
+            height, vertex = heapq.heappop(heap)
+            for neighbor in neighbor_lists[vertex]:
+                if done[neighbor]: continue
+                done[neighbor] = True
+                neighbor_height = max(elevation[neighbor], height + FILL_EPSILON)
+                elevation[neighbor] = neighbor_height
+                heapq.heappush(heap, (neighbor_height, neighbor))
+
+        filled[:] = elevation
+        # Land cut off from every sea vertex has nowhere to drain.
+        filled[~np.array(done, dtype=bool)] = np.nan
+        self.filled_elevation = filled
+
+    def _compute_downstream(self):
+        neighbor_ids = self.vertex_neighbor_ids
+        valid = neighbor_ids >= 0
+        safe_ids = np.where(valid, neighbor_ids, 0)
+
+        drop = self.filled_elevation[:, None] - self.filled_elevation[safe_ids]
+        distance = np.linalg.norm(self.vertex_positions[:, None, :] - self.vertex_positions[safe_ids], axis=2)
+        slope = np.where(valid & (drop > 0), drop / np.maximum(distance, 1e-12), -np.inf)
+
+        steepest = slope.argmax(axis=1)
+        has_descent = np.isfinite(slope[np.arange(len(slope)), steepest]) & ~self.vertex_is_sea
+        self.downstream = np.where(has_descent, neighbor_ids[np.arange(len(slope)), steepest], -1).astype(np.int32)
 
     def _calculate_flow(self):
-        in_degree = defaultdict(int)
-        all_river_verts = set(self.downstream_map.keys()) | set(self.downstream_map.values())
-        for u, v in self.downstream_map.items():
-            in_degree[v] += 1
-        queue = [v for v in all_river_verts if in_degree[v] == 0]
-        for v in queue:
-            self.vertex_flow[v] = 1.0
-        head = 0
-        while head < len(queue):
-            u = queue[head]; head += 1
-            v = self.downstream_map.get(u)
-            if v:
-                self.vertex_flow[v] += self.vertex_flow[u]
-                in_degree[v] -= 1
-                if in_degree[v] == 0: queue.append(v)
+        """Each land vertex contributes one unit, passed downstream from high to low."""
+        drains = ~np.isnan(self.filled_elevation)
+        order = np.flatnonzero(drains)[np.argsort(-self.filled_elevation[drains], kind="stable")].tolist()
+        downstream = self.downstream.tolist()
+
+        flow = (~self.vertex_is_sea & drains).astype(np.float64).tolist()
+        for vertex in order:
+            target = downstream[vertex]
+            if target >= 0:
+                flow[target] += flow[vertex]
+
+        outlet = list(range(len(downstream)))
+        for vertex in reversed(order):
+            target = downstream[vertex]
+            if target >= 0:
+                outlet[vertex] = outlet[target]
+
+        self.vertex_flow = np.array(flow, dtype=np.float32)
+        self.vertex_outlet = np.array(outlet, dtype=np.int32)
+
+    def get_min_accumulation(self):
+        land_count = int(np.count_nonzero(~self.vertex_is_sea))
+        return max(float(cfg.RIVER_MIN_ACCUMULATION), cfg.RIVER_MIN_ACCUMULATION_FRACTION * land_count)
+
+    def _select_rivers(self, num_rivers):
+        min_accumulation = self.get_min_accumulation()
+        candidates = ~self.vertex_is_sea & (self.downstream >= 0) & (self.vertex_flow >= min_accumulation)
+        if not candidates.any():
+            return
+
+        mouths = np.flatnonzero(self.vertex_is_sea & (self.vertex_flow >= min_accumulation))
+        mouths = mouths[np.argsort(-self.vertex_flow[mouths], kind="stable")][:num_rivers]
+        selected_mouths = np.zeros(len(self.downstream), dtype=bool)
+        selected_mouths[mouths] = True
+        self.is_river = candidates & selected_mouths[self.vertex_outlet]
+        self._extend_river_heads()
+
+    def _extend_river_heads(self):
+        # A river qualifies where its flow first reaches the threshold; its
+        # source is one step further up, along the largest contributing vertex.
+        downstream = self.downstream
+        has_river_upstream = np.zeros(len(downstream), dtype=bool)
+        has_river_upstream[downstream[self.is_river]] = True
+        is_head = self.is_river & ~has_river_upstream
+
+        feeders = np.flatnonzero(~self.is_river & ~self.vertex_is_sea & (downstream >= 0))
+        feeders = feeders[is_head[downstream[feeders]]]
+        feeders = feeders[np.lexsort((-self.vertex_flow[feeders], downstream[feeders]))]
+        _, first_indices = np.unique(downstream[feeders], return_index=True)
+        self.is_river[feeders[first_indices]] = True
 
     def _get_river_paths(self):
         """
-        Reconstructs river paths from the downstream map.
-        Returns a list of paths, where each path is a list of Vertex objects.
+        Follows every river head down to the sea.
+        Returns a list of paths, where each path is a list of vertex indices.
         """
+        downstream = self.downstream
+        starts = np.flatnonzero(self.is_river)
+        has_river_upstream = np.zeros(len(downstream), dtype=bool)
+        has_river_upstream[downstream[starts]] = True
+
         paths = []
-        # Find sources (vertices that are not a destination for any other vertex)
-        sources = {v for v in self.downstream_map if v not in self.downstream_map.values()}
-        
-        for source in sources:
-            path = [source]
-            current_vertex = source
-            # Follow the downstream map to build the path
-            while current_vertex in self.downstream_map:
-                current_vertex = self.downstream_map[current_vertex]
+        for head in starts[~has_river_upstream[starts]].tolist():
+            path = [head]
+            current_vertex = head
+            while downstream[current_vertex] >= 0:
+                current_vertex = int(downstream[current_vertex])
                 path.append(current_vertex)
-            
-            if len(path) > 1:
-                paths.append(path)
+            paths.append(path)
         return paths
 
+    def get_river_segments(self):
+        """Returns every river edge once as (M, 2) vertex indices plus its flow."""
+        starts = np.flatnonzero(self.is_river).astype(np.int32)
+        segments = np.column_stack((starts, self.downstream[starts])).astype(np.int32)
+        return segments, self.vertex_flow[starts]
+
     def generate_rivers(self, num_rivers=cfg.RIVER_COUNT):
         self._classify_vertices()
-        sources = self._find_inland_sources(num_rivers)
-        if not sources:
-            print("No suitable river sources found.")
-            return [], {}
-        print(f"Generating river network from {len(sources)} sources...")
-        self._build_flow_network(sources)
+        if self.vertex_is_sea.all() or not self.vertex_is_sea.any():
+            print("No coastline to drain rivers into.")
+            return [], np.zeros(len(self.vertex_flow), dtype=np.float32)
+        print("Computing drainage network...")
+        self._fill_depressions()
+        self._compute_downstream()
         self._calculate_flow()
+        self._select_rivers(num_rivers)
+        if not self.is_river.any():
+            print(f"No drainage reaches the river accumulation threshold of {self.get_min_accumulation():.1f} land vertices.")
+            return [], np.zeros(len(self.vertex_flow), dtype=np.float32)
         print("Extracting river paths...")
-        paths = self._get_river_paths()
-        return paths, self.vertex_flow
\ No newline at end of file
+        river_vertices = np.concatenate((np.flatnonzero(self.is_river), self.downstream[self.is_river]))
+        flow = np.zeros(len(self.vertex_flow), dtype=np.float32)
+        flow[river_vertices] = self.vertex_flow[river_vertices]
+        return self._get_river_paths(), flow
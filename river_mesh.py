@@ -0,0 +1,112 @@
+import numpy as np
+import config as cfg
+
+
+def build_river_mesh(vertex_positions, segments, segment_flow):
+    """Builds every river as one GL_TRIANGLE_STRIP vertex array.
+
+    The network is split into reaches: a reach follows the largest upstream
+    branch through each confluence, and smaller tributaries stop at the vertex
+    where they join it. Each reach becomes a strip whose width grows with the
+    square root of its flow. Reaches ending at the sea get a flared delta.
+    Degenerate vertices stitch the strips together so the whole network draws
+    in one call.
+
+    Returns (vertices, colors), both float32 (N, 3).
+    """
+    if len(segments) == 0:
+        return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.float32)
+
+    vertex_positions = np.asarray(vertex_positions, dtype=np.float64)
+    reaches, downstream = _trace_river_reaches(len(vertex_positions), segments, segment_flow)
+
+    vertex_flow = np.zeros(len(vertex_positions), dtype=np.float64)
+    np.add.at(vertex_flow, segments[:, 1], segment_flow)
+    vertex_flow[segments[:, 0]] = segment_flow
+
+    lengths = np.array([len(reach) for reach in reaches], dtype=np.int64)
+    point_ids = np.concatenate(reaches)
+    ends = np.cumsum(lengths) - 1
+    starts = ends - lengths + 1
+
+    positions = vertex_positions[point_ids]
+    flows = vertex_flow[point_ids]
+    # A tributary keeps its own width up to the confluence.
+    confluence_ends = ends[downstream[point_ids[ends]] >= 0]
+    flows[confluence_ends] = flows[confluence_ends - 1]
+    widths = cfg.RIVER_BASE_WIDTH + cfg.RIVER_WIDTH_FACTOR * np.sqrt(flows / max(flows.max(), 1e-12))
+
+    reach_of_point = np.repeat(np.arange(len(reaches)), lengths)
+    point_index = np.arange(len(point_ids))
+    previous_index = np.maximum(point_index - 1, starts[reach_of_point])
+    next_index = np.minimum(point_index + 1, ends[reach_of_point])
+    tangents = positions[next_index] - positions[previous_index]
+
+    # Extend every reach that reaches the sea into a widening delta.
+    mouth_ends = ends[downstream[point_ids[ends]] < 0]
+    mouth_directions = _normalize_rows(positions[mouth_ends] - positions[mouth_ends - 1])
+    delta_positions = positions[mouth_ends] + mouth_directions * (cfg.RIVER_DELTA_LENGTH_FACTOR * widths[mouth_ends])[:, None]
+    positions = np.insert(positions, mouth_ends + 1, delta_positions, axis=0)
+    tangents = np.insert(tangents, mouth_ends + 1, mouth_directions, axis=0)
+    widths = np.insert(widths, mouth_ends + 1, widths[mouth_ends] * cfg.RIVER_DELTA_FLARE_FACTOR)
+    is_mouth_reach = np.zeros(len(reaches), dtype=np.int64)
+    is_mouth_reach[reach_of_point[mouth_ends]] = 1
+    lengths = lengths + is_mouth_reach
+
+    surface_normals = _normalize_rows(positions)
+    sides = _normalize_rows(np.cross(surface_normals, tangents)) * (widths * 0.5)[:, None]
+    left = _normalize_rows(positions + sides) * cfg.RIVER_SURFACE_LIFT
+    right = _normalize_rows(positions - sides) * cfg.RIVER_SURFACE_LIFT
+    strip_vertices = np.stack((left, right), axis=1).reshape(-1, 3)
+
+    strip_indices = _stitch_strip_indices(lengths)
+    vertices = strip_vertices[strip_indices].astype(np.float32)
+    colors = np.tile(np.asarray(cfg.RIVER_COLOR, dtype=np.float32) / 255.0, (len(vertices), 1))
+    return vertices, colors
+
+
+def _trace_river_reaches(vertex_count, segments, segment_flow):
+    downstream = np.full(vertex_count, -1, dtype=np.int64)
+    downstream[segments[:, 0]] = segments[:, 1]
+
+    # The main upstream branch of each vertex is the inflowing segment with the most flow.
+    order = np.lexsort((segment_flow, segments[:, 1]))
+    sorted_targets = segments[order, 1]
+    is_last = np.r_[sorted_targets[1:] != sorted_targets[:-1], True]
+    main_upstream = np.full(vertex_count, -1, dtype=np.int64)
+    main_upstream[sorted_targets[is_last]] = segments[order[is_last], 0]
+
+    has_upstream = np.zeros(vertex_count, dtype=bool)
+    has_upstream[segments[:, 1]] = True
+    heads = segments[:, 0][~has_upstream[segments[:, 0]]]
+
+    downstream_list = downstream.tolist()
+    main_upstream_list = main_upstream.tolist()
+    reaches = []
+    for head in np.sort(heads).tolist():
+        reach = [head]
+        current_vertex = head
+        while downstream_list[current_vertex] >= 0:
+            next_vertex = downstream_list[current_vertex]
+            reach.append(next_vertex)
+            if main_upstream_list[next_vertex] != current_vertex:
+                break
+            current_vertex = next_vertex
+        reaches.append(np.array(reach, dtype=np.int64))
+    return reaches, downstream
+
+
+def _stitch_strip_indices(lengths):
+    """Indices into the interleaved left/right array, joined by degenerate triangles.
+
+    Every reach contributes an even number of strip vertices, so repeating the
+    last vertex of one reach and the first of the next keeps the winding.
+    """
+    strip_starts = np.cumsum(lengths * 2)[:-1]
+    joins = np.stack((strip_starts - 1, strip_starts), axis=1).reshape(-1)
+    return np.insert(np.arange(lengths.sum() * 2), np.repeat(strip_starts, 2), joins)
+
+
+def _normalize_rows(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(lengths, 1e-12)
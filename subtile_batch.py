@@ -0,0 +1,246 @@
+import numpy as np
+
+EDGE_LIFT = 1.0025 # Subtile edges are drawn just above the tile surface
+BOUNDARY_EPSILON_SQ = 1e-8
+
+
+def _offsets_from_sizes(sizes):
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int32)
+    np.cumsum(sizes, out=offsets[1:])
+    return offsets
+
+
+def _concatenate(arrays, empty):
+    return np.concatenate(arrays) if arrays else empty
+
+
+class SubtileBatch:
+    """All subtiles of one tile stored column-wise.
+
+    Polygon i is vertices[offsets[i]:offsets[i + 1]] and colors[i] its colour.
+    battle_field_ids[i] is the index of its packed battle field in the
+    field_* columns, or -1 when it has none. This is the subtile cache entry,
+    so saving the cache writes a handful of arrays per tile, and drawing or
+    picking reads them without building SubTile objects.
+
+    edge_vertices is the GL_LINES buffer of the interior subtile edges, ready
+    to upload as is. It needs the tile's vertex ring, so it stays None until
+    build_edge_vertices is called.
+    """
+    edge_vertices = None
+
+    def __init__(
+        self,
+        vertices,
+        offsets,
+        colors,
+        battle_field_ids,
+        field_polygon_offsets,
+        field_polygons,
+        field_hex_offsets,
+        field_hex_axial,
+        field_hex_coverage,
+        field_hex_radius,
+        field_hex_origin,
+        seed_points
+    ):
+        self.vertices = vertices
+        self.offsets = offsets
+        self.colors = colors
+        self.battle_field_ids = battle_field_ids
+        self.field_polygon_offsets = field_polygon_offsets
+        self.field_polygons = field_polygons
+        self.field_hex_offsets = field_hex_offsets
+        self.field_hex_axial = field_hex_axial
+        self.field_hex_coverage = field_hex_coverage
+        self.field_hex_radius = field_hex_radius
+        self.field_hex_origin = field_hex_origin
+        self.seed_points = seed_points
+
+    @classmethod
+    def from_subtiles(cls, subtiles, seed_points=(), tile_ring=None):
+        batch = cls.from_parts(
+            [subtile.vertices for subtile in subtiles],
+            [subtile.color for subtile in subtiles],
+            [subtile.get_packed_battle_field() for subtile in subtiles],
+            seed_points
+        )
+        if tile_ring is not None:
+            batch.build_edge_vertices(tile_ring)
+        return batch
+
+    @classmethod
+    def from_serialized(cls, serialized_subtiles):
+        """Converts a cache entry written before batches: a dict of per-subtile dicts, or a bare polygon list."""
+        if isinstance(serialized_subtiles, cls):
+            return serialized_subtiles
+
+        seed_points = ()
+        if isinstance(serialized_subtiles, dict):
+            seed_points = serialized_subtiles.get("seed_points", ())
+            serialized_subtiles = serialized_subtiles.get("subtiles", [])
+
+        polygons = []
+        packed_battle_fields = []
+        for serialized_subtile in serialized_subtiles:
+            if isinstance(serialized_subtile, dict):
+                polygons.append(serialized_subtile.get("vertices", []))
+                packed_battle_fields.append(serialized_subtile.get("battle_field"))
+            else:
+                polygons.append(serialized_subtile)
+                packed_battle_fields.append(None)
+        return cls.from_parts(polygons, [None] * len(polygons), packed_battle_fields, seed_points)
+
+    @classmethod
+    def from_parts(cls, polygons, colors, packed_battle_fields, seed_points=()):
+        polygons = [np.asarray(polygon, dtype=np.float32).reshape(-1, 3) for polygon in polygons]
+        color_array = np.zeros((len(polygons), 3), dtype=np.uint8)
+        for index, color in enumerate(colors):
+            if color is not None:
+                color_array[index] = np.clip(np.rint(np.asarray(color, dtype=np.float32)), 0, 255)
+
+        battle_field_ids = np.full(len(polygons), -1, dtype=np.int32)
+        fields = []
+        for index, packed in enumerate(packed_battle_fields):
+            if packed is not None:
+                battle_field_ids[index] = len(fields)
+                fields.append(packed)
+
+        field_polygons = [np.asarray(field["polygon"], dtype=np.float32).reshape(-1, 2) for field in fields]
+        field_axial = [np.asarray(field["hex_axial"]).reshape(-1, 2) for field in fields]
+        return cls(
+            vertices=_concatenate(polygons, np.zeros((0, 3), dtype=np.float32)),
+            offsets=_offsets_from_sizes([len(polygon) for polygon in polygons]),
+            colors=color_array,
+            battle_field_ids=battle_field_ids,
+            field_polygon_offsets=_offsets_from_sizes([len(polygon) for polygon in field_polygons]),
+            field_polygons=_concatenate(field_polygons, np.zeros((0, 2), dtype=np.float32)),
+            field_hex_offsets=_offsets_from_sizes([len(axial) for axial in field_axial]),
+            field_hex_axial=_concatenate(field_axial, np.zeros((0, 2), dtype=np.int16)),
+            field_hex_coverage=_concatenate(
+                [np.asarray(field["hex_coverage"], dtype=np.float16).reshape(-1) for field in fields],
+                np.zeros(0, dtype=np.float16)
+            ),
+            field_hex_radius=np.array([float(field["hex_radius"]) for field in fields], dtype=np.float64),
+            field_hex_origin=np.asarray(
+                [np.asarray(field["hex_origin"], dtype=np.float32).reshape(2) for field in fields],
+                dtype=np.float32
+            ).reshape(-1, 2),
+            seed_points=np.asarray(seed_points, dtype=np.float32).reshape(-1, 3)
+        )
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_polygon(self, index):
+        return self.vertices[self.offsets[index]:self.offsets[index + 1]]
+
+    def get_polygons(self):
+        return np.split(self.vertices, self.offsets[1:-1])
+
+    def get_polygon_sizes(self):
+        return np.diff(self.offsets)
+
+    def get_polygon_ids(self):
+        """Index of the owning polygon for every row of vertices."""
+        return np.repeat(np.arange(len(self), dtype=np.int32), self.get_polygon_sizes())
+
+    def get_next_vertex_indices(self):
+        """Row of the following vertex around each polygon, wrapping to its first vertex."""
+        next_indices = np.arange(1, len(self.vertices) + 1, dtype=np.int32)
+        sizes = self.get_polygon_sizes()
+        ends = self.offsets[1:][sizes > 0]
+        next_indices[ends - 1] = self.offsets[:-1][sizes > 0]
+        return next_indices
+
+    def get_centers(self):
+        """Mean vertex of each polygon; NaN for empty polygons."""
+        sizes = self.get_polygon_sizes()
+        sums = np.zeros((len(self), 3), dtype=np.float64)
+        np.add.at(sums, self.get_polygon_ids(), self.vertices)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (sums / sizes[:, None]).astype(np.float32)
+
+    def has_battle_field(self, index):
+        return self.battle_field_ids[index] >= 0
+
+    def get_packed_battle_field(self, index):
+        """The packed battle field of polygon `index` as views into the field columns."""
+        field_id = int(self.battle_field_ids[index])
+        if field_id < 0:
+            return None
+        polygon_start, polygon_end = self.field_polygon_offsets[field_id:field_id + 2]
+        hex_start, hex_end = self.field_hex_offsets[field_id:field_id + 2]
+        return {
+            "polygon": self.field_polygons[polygon_start:polygon_end],
+            "hex_axial": self.field_hex_axial[hex_start:hex_end],
+            "hex_coverage": self.field_hex_coverage[hex_start:hex_end],
+            "hex_radius": float(self.field_hex_radius[field_id]),
+            "hex_origin": self.field_hex_origin[field_id],
+        }
+
+    def build_edge_vertices(self, tile_ring):
+        """Builds edge_vertices: each interior edge once, lifted off the surface, as (start, end) rows.
+
+        Edges lying on the tile's own boundary are left out; the tile edge
+        VBO already draws them.
+        """
+        sizes = self.get_polygon_sizes()
+        edge_rows = np.repeat(sizes >= 2, sizes)
+        raw_starts = self.vertices[edge_rows]
+        raw_ends = self.vertices[self.get_next_vertex_indices()[edge_rows]]
+        interior = ~_get_boundary_edge_mask(np.asarray(tile_ring, dtype=np.float64), raw_starts, raw_ends)
+
+        starts = raw_starts[interior] * EDGE_LIFT
+        ends = raw_ends[interior] * EDGE_LIFT
+        non_degenerate = np.sum((starts - ends) * (starts - ends), axis=1) > 1e-12
+        starts = starts[non_degenerate]
+        ends = ends[non_degenerate]
+        first_edges = _get_unique_edge_indices(starts, ends)
+
+        edge_vertices = np.empty((len(first_edges) * 2, 3), dtype=np.float32)
+        edge_vertices[0::2] = starts[first_edges]
+        edge_vertices[1::2] = ends[first_edges]
+        self.edge_vertices = edge_vertices
+        return edge_vertices
+
+    def get_nbytes(self):
+        return sum(value.nbytes for value in vars(self).values() if value is not None)
+
+
+def _get_unique_edge_indices(starts, ends):
+    # Edges match regardless of direction once rounded to 6 decimals; the
+    # first occurrence of each is kept, in its original order.
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    a = np.round(starts, 6) + 0.0
+    b = np.round(ends, 6) + 0.0
+    swap = (b[:, 0] < a[:, 0]) | (b[:, 0] == a[:, 0]) & (
+        (b[:, 1] < a[:, 1]) | (b[:, 1] == a[:, 1]) & (b[:, 2] < a[:, 2])
+    )
+    keys = np.where(swap[:, None], np.hstack((b, a)), np.hstack((a, b)))
+    _, first_indices = np.unique(keys, axis=0, return_index=True)
+    return np.sort(first_indices)
+
+
+def _get_boundary_edge_mask(tile_ring, starts, ends):
+    mask = np.zeros(len(starts), dtype=bool)
+    for index in range(len(tile_ring)):
+        segment_start = tile_ring[index]
+        segment_end = tile_ring[(index + 1) % len(tile_ring)]
+        mask |= (
+            (_points_segment_distance_sq(starts, segment_start, segment_end) <= BOUNDARY_EPSILON_SQ) &
+            (_points_segment_distance_sq(ends, segment_start, segment_end) <= BOUNDARY_EPSILON_SQ)
+        )
+    return mask
+
+
+def _points_segment_distance_sq(points, segment_start, segment_end):
+    segment = segment_end - segment_start
+    segment_length_sq = float(np.dot(segment, segment))
+    if segment_length_sq <= 1e-16:
+        return np.sum((points - segment_start) * (points - segment_start), axis=1)
+
+    t = np.clip((points - segment_start) @ segment / segment_length_sq, 0.0, 1.0)
+    closest = segment_start + segment * t[:, None]
+    return np.sum((points - closest) * (points - closest), axis=1)
@@ -0,0 +1,204 @@
+import json
+import os
+import time
+import numpy as np
+import config as cfg
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+PAYLOAD_BUCKETS_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 12, 16, 24, 32, 64)
+
+
+def run_timed_subtile_task(function, *args):
+    """Runs a subtile task in a worker and reports how long it took and how big its result is.
+
+    Returns (result, start_time, compute_seconds, payload_bytes), where
+    payload_bytes is estimated from the result's arrays rather than pickled.
+    """
+    start_time = time.time()
+    compute_start = time.perf_counter()
+    result = function(*args)
+    compute_seconds = time.perf_counter() - compute_start
+    return result, start_time, compute_seconds, estimate_payload_bytes(result)
+
+
+def estimate_payload_bytes(value):
+    # Array data dominates a pickled SubtileBatch, so summing it lands close
+    # to the pickled size without serializing the result a second time.
+    if hasattr(value, "get_nbytes"):
+        return value.get_nbytes()
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_payload_bytes(item) for item in value.values())
+    return 0
+
+
+class Histogram:
+    """Fixed-bucket histogram; the last bucket collects everything above the largest bound."""
+
+    def __init__(self, bounds):
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[np.searchsorted(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def mean(self):
+        count = self.count
+        return self.total / count if count else 0.0
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples."""
+        count = self.count
+        if count == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(self.counts), fraction * count))
+        if bucket >= len(self.bounds):
+            return self.max
+        return float(min(self.bounds[bucket], self.max))
+
+    def to_dict(self):
+        return {
+            "bounds": self.bounds.tolist(),
+            "counts": self.counts.tolist(),
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+
+class SubtileMetrics:
+    """Counters and histograms for the background subtile worker pool.
+
+    Histograms and counters cover the whole session. Worker utilization is the
+    worker compute time reported by finished tasks divided by the wall time and
+    worker count of the current log window.
+    """
+
+    def __init__(self, worker_count=0, log_interval=cfg.SUBTILE_METRICS_LOG_INTERVAL, log_file=cfg.SUBTILE_METRICS_LOG_FILE):
+        self.worker_count = worker_count
+        self.log_interval = log_interval
+        self.log_file = log_file
+        self.counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "throttled": 0,
+            "deferred_for_neighbors": 0,
+            "regenerations": 0,
+        }
+        self.queue_depth = Histogram(QUEUE_DEPTH_BUCKETS)
+        self.task_latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.compute_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.payload_bytes = Histogram(PAYLOAD_BUCKETS_BYTES)
+        self.regeneration_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.submit_times = {}
+        self.window_start = time.perf_counter()
+        self.window_busy_seconds = 0.0
+        self.last_utilization = 0.0
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_queue_depth(self, depth):
+        self.queue_depth.record(depth)
+
+    def record_submit(self, tile_id):
+        self.counters["submitted"] += 1
+        self.submit_times[tile_id] = (time.perf_counter(), time.time())
+
+    def record_complete(self, tile_id, start_time, compute_seconds, payload_bytes):
+        submit_perf, submit_wall = self.submit_times.pop(tile_id, (None, None))
+        self.counters["completed"] += 1
+        if submit_perf is not None:
+            self.task_latency_ms.record((time.perf_counter() - submit_perf) * 1000.0)
+            self.queue_wait_ms.record(max(0.0, start_time - submit_wall) * 1000.0)
+        self.compute_ms.record(compute_seconds * 1000.0)
+        self.payload_bytes.record(payload_bytes)
+        self.window_busy_seconds += compute_seconds
+
+    def record_failure(self, tile_id):
+        self.submit_times.pop(tile_id, None)
+        self.counters["failed"] += 1
+
+    def record_regeneration(self, elapsed_seconds):
+        self.counters["regenerations"] += 1
+        self.regeneration_ms.record(elapsed_seconds * 1000.0)
+
+    def get_cache_hit_rate(self):
+        lookups = self.counters["cache_hits"] + self.counters["cache_misses"]
+        return self.counters["cache_hits"] / lookups if lookups else 0.0
+
+    def get_utilization(self):
+        elapsed = time.perf_counter() - self.window_start
+        if self.worker_count <= 0 or elapsed <= 0.0:
+            return 0.0
+        return min(1.0, self.window_busy_seconds / (elapsed * self.worker_count))
+
+    def snapshot(self):
+        return {
+            "timestamp": time.time(),
+            "workers": self.worker_count,
+            "max_in_flight": cfg.SUBTILE_MAX_IN_FLIGHT_TASKS,
+            "in_flight": len(self.submit_times),
+            "counters": dict(self.counters),
+            "cache_hit_rate": self.get_cache_hit_rate(),
+            "worker_utilization": self.get_utilization(),
+            "queue_depth": self.queue_depth.to_dict(),
+            "task_latency_ms": self.task_latency_ms.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+            "compute_ms": self.compute_ms.to_dict(),
+            "payload_bytes": self.payload_bytes.to_dict(),
+            "regeneration_ms": self.regeneration_ms.to_dict(),
+        }
+
+    def log_if_due(self):
+        """Writes one JSON line per log interval and starts a new utilization window."""
+        if self.log_interval <= 0:
+            return
+        now = time.perf_counter()
+        if now - self.window_start < self.log_interval:
+            return
+
+        line = json.dumps(self.snapshot())
+        self.last_utilization = self.get_utilization()
+        self.window_start = now
+        self.window_busy_seconds = 0.0
+        if self.log_file:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_file, 'a') as f:
+                f.write(line + "\n")
+        else:
+            print(f"Subtile metrics: {line}")
+
+    def get_overlay_lines(self):
+        latency = self.task_latency_ms
+        return [
+            f"Subtile workers: {self.worker_count}  in flight {len(self.submit_times)}/{cfg.SUBTILE_MAX_IN_FLIGHT_TASKS}"
+            f"  util {self.get_utilization() * 100:5.1f}% (last {self.last_utilization * 100:5.1f}%)",
+            f"  tasks {self.counters['completed']}/{self.counters['submitted']} done, {self.counters['failed']} failed,"
+            f" {self.counters['throttled']} throttled, {self.counters['deferred_for_neighbors']} deferred",
+            f"  latency p50 {latency.percentile(0.5):7.1f} p95 {latency.percentile(0.95):7.1f} max {latency.max:7.1f} ms"
+            f"  wait p50 {self.queue_wait_ms.percentile(0.5):7.1f} ms",
+            f"  payload avg {self.payload_bytes.mean() / 1024.0:7.1f} KiB  queue p95 {self.queue_depth.percentile(0.95):4.0f}"
+            f"  cache hit {self.get_cache_hit_rate() * 100:5.1f}%  regen {self.counters['regenerations']}"
+            f" ({self.regeneration_ms.mean():.1f} ms avg)",
+        ]
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+import config as cfg
+
+MIN_MATERIALIZED_TILES = 64 # Edge polishing touches a tile and all its neighbours at once
+
+
+class LazySubtiles:
+    """Stands in for tile.subtiles until something needs the SubTile objects.
+
+    len() and truth tests use the serialized cache entry. Iterating or
+    indexing materializes the tile through its SubtileStore.
+    """
+    __slots__ = ("store", "tile_id", "source", "count")
+
+    def __init__(self, store, tile_id, source, count):
+        self.store = store
+        self.tile_id = tile_id
+        self.source = source
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        return iter(self.store.materialize(self))
+
+    def __getitem__(self, index):
+        return self.store.materialize(self)[index]
+
+    def is_materialized(self):
+        return self.store.is_resident(self)
+
+
+class SubtileStore:
+    """LRU of tiles whose subtiles exist as SubTile objects.
+
+    Every other tile keeps only its serialized cache entry. Evicting a tile is
+    safe because every change to a tile's subtiles is serialized back into the
+    cache before it can be evicted, and the tile's LazySubtiles is rewrapped
+    around the new entry. Pinned tiles (the renderer's selection) are never
+    evicted, so SubTile references held outside the store stay the live ones.
+    """
+
+    def __init__(self, deserialize, capacity=cfg.SUBTILE_MATERIALIZED_TILE_LIMIT):
+        self.deserialize = deserialize
+        self.capacity = max(MIN_MATERIALIZED_TILES, int(capacity))
+        self.resident = OrderedDict()
+        self.pinned_tile_ids = set()
+        self.materialized_count = 0
+        self.eviction_count = 0
+
+    def wrap(self, tile_id, source, count, subtiles=None):
+        """Returns tile_id's proxy for `source`, optionally keeping already built subtiles resident."""
+        proxy = LazySubtiles(self, tile_id, source, count)
+        if subtiles is None:
+            self.resident.pop(tile_id, None)
+        else:
+            self._insert(proxy, subtiles)
+        return proxy
+
+    def pin(self, tile_ids):
+        self.pinned_tile_ids = set(tile_ids)
+
+    def is_resident(self, proxy):
+        entry = self.resident.get(proxy.tile_id)
+        return entry is not None and entry[0] is proxy.source
+
+    def materialize(self, proxy):
+        entry = self.resident.get(proxy.tile_id)
+        if entry is not None and entry[0] is proxy.source:
+            self.resident.move_to_end(proxy.tile_id)
+            return entry[1]
+
+        subtiles = self.deserialize(proxy.source)
+        self.materialized_count += 1
+        self._insert(proxy, subtiles)
+        return subtiles
+
+    def _insert(self, proxy, subtiles):
+        self.resident[proxy.tile_id] = (proxy.source, subtiles)
+        self.resident.move_to_end(proxy.tile_id)
+        while len(self.resident) > self.capacity:
+            tile_id, entry = self.resident.popitem(last=False)
+            if tile_id in self.pinned_tile_ids:
+                self.resident[tile_id] = entry
+                continue
+            self.eviction_count += 1
@@ -5,6 +5,8 @@ from collections import defaultdict
 import config as cfg
 from config import TerrainType
 from geometry import Vertex
+from battle_field import build_battle_field, pack_battle_field, unpack_battle_field
+from subtile_batch import SubtileBatch
 
 try:
     from scipy.spatial import Voronoi
@@ -16,31 +18,28 @@ class SubTile:
     vertices: list
     color: np.ndarray
     battle_field: dict | None = None
+    packed_battle_field: dict | None = None
+
+    def has_battle_field(self):
+        return self.battle_field is not None or self.packed_battle_field is not None
 
     def ensure_battle_field(self):
         if self.battle_field is not None:
             return self.battle_field
 
-        self.battle_field = self._build_battle_field()
+        if self.packed_battle_field is not None:
+            self.battle_field = unpack_battle_field(self.packed_battle_field)
+        else:
+            self.battle_field = self._build_battle_field()
         return self.battle_field
 
+    def get_packed_battle_field(self):
+        if self.packed_battle_field is None and self.battle_field is not None:
+            self.packed_battle_field = pack_battle_field(self.battle_field)
+        return self.packed_battle_field
+
     def _build_battle_field(self):
-        polygon_2d = self._project_vertices_to_local_2d()
-        area = self._polygon_area_2d(polygon_2d)
-        if area <= 1e-12:
-            return {"polygon": polygon_2d, "hexes": [], "hex_radius": 0.0}
-
-        radius = max(cfg.BATTLE_FIELD_MIN_HEX_RADIUS, math.sqrt(area) * cfg.BATTLE_FIELD_HEX_RADIUS_FACTOR)
-        hexes = self._generate_battle_hexes(polygon_2d, radius)
-        while len(hexes) > cfg.BATTLE_FIELD_MAX_HEXES and radius > cfg.BATTLE_FIELD_MIN_HEX_RADIUS:
-            radius *= 1.15
-            hexes = self._generate_battle_hexes(polygon_2d, radius)
-
-        return {
-            "polygon": [np.asarray(point, dtype=np.float32) for point in polygon_2d],
-            "hexes": hexes,
-            "hex_radius": float(radius),
-        }
+        return build_battle_field(self._project_vertices_to_local_2d())
 
     def _project_vertices_to_local_2d(self):
         vertices = [np.asarray(vertex, dtype=np.float32) for vertex in self.vertices]
@@ -72,92 +71,6 @@ class SubTile:
             polygon.reverse()
         return polygon
 
-    def _generate_battle_hexes(self, polygon, radius):
-        polygon_array = np.asarray(polygon, dtype=np.float32)
-        min_x, min_y = polygon_array.min(axis=0) - radius * 2.0
-        max_x, max_y = polygon_array.max(axis=0) + radius * 2.0
-        hex_width = math.sqrt(3.0) * radius
-        row_height = 1.5 * radius
-        hexes = []
-        row = 0
-        y = float(min_y)
-        while y <= max_y:
-            x_offset = (row % 2) * hex_width * 0.5
-            x = float(min_x) - x_offset
-            while x <= max_x:
-                center = np.array([x, y], dtype=np.float32)
-                if self._point_in_polygon(center, polygon):
-                    hex_polygon = self._make_battle_hex(center, radius)
-                    clipped_hex = self._clip_polygon_to_convex_polygon(hex_polygon, polygon)
-                    clipped_area = self._polygon_area_2d(clipped_hex)
-                    full_area = self._polygon_area_2d(hex_polygon)
-                    if clipped_area > 1e-10 and full_area > 1e-10:
-                        hexes.append({
-                            "polygon": [np.asarray(point, dtype=np.float32) for point in hex_polygon],
-                            "clipped_polygon": [np.asarray(point, dtype=np.float32) for point in clipped_hex],
-                            "center": np.asarray(center, dtype=np.float32),
-                            "coverage": float(np.clip(clipped_area / full_area, 0.0, 1.0)),
-                        })
-                x += hex_width
-            y += row_height
-            row += 1
-        return hexes
-
-    def _make_battle_hex(self, center, radius):
-        return [
-            np.array([
-                center[0] + radius * math.cos(math.radians(60.0 * index + 30.0)),
-                center[1] + radius * math.sin(math.radians(60.0 * index + 30.0)),
-            ], dtype=np.float32)
-            for index in range(6)
-        ]
-
-    def _clip_polygon_to_convex_polygon(self, polygon, boundary):
-        clipped = [np.asarray(point, dtype=np.float32) for point in polygon]
-        orientation = self._polygon_area_signed_2d(boundary)
-        for index in range(len(boundary)):
-            edge_start = boundary[index]
-            edge_end = boundary[(index + 1) % len(boundary)]
-            clipped = self._clip_polygon_to_boundary_edge(clipped, edge_start, edge_end, orientation)
-            if len(clipped) < 3:
-                return []
-        return clipped
-
-    def _clip_polygon_to_boundary_edge(self, polygon, edge_start, edge_end, boundary_orientation):
-        clipped = []
-        previous = polygon[-1]
-        previous_inside = self._is_inside_boundary_edge(previous, edge_start, edge_end, boundary_orientation)
-        for current in polygon:
-            current_inside = self._is_inside_boundary_edge(current, edge_start, edge_end, boundary_orientation)
-            if current_inside != previous_inside:
-                intersection = self._line_boundary_intersection(previous, current, edge_start, edge_end)
-                if intersection is not None:
-                    clipped.append(intersection)
-            if current_inside:
-                clipped.append(current)
-            previous = current
-            previous_inside = current_inside
-        return self._remove_duplicate_polygon_vertices(clipped)
-
-    def _is_inside_boundary_edge(self, point, edge_start, edge_end, boundary_orientation):
-        edge = edge_end - edge_start
-        relative = point - edge_start
-        cross = edge[0] * relative[1] - edge[1] * relative[0]
-        return cross >= -1e-8 if boundary_orientation >= 0 else cross <= 1e-8
-
-    def _line_boundary_intersection(self, start, end, edge_start, edge_end):
-        direction = end - start
-        edge_direction = edge_end - edge_start
-        denominator = direction[0] * edge_direction[1] - direction[1] * edge_direction[0]
-        if abs(denominator) <= 1e-10:
-            return None
-        relative = edge_start - start
-        t = (relative[0] * edge_direction[1] - relative[1] * edge_direction[0]) / denominator
-        return np.asarray(start + direction * np.clip(t, 0.0, 1.0), dtype=np.float32)
-
-    def _polygon_area_2d(self, polygon):
-        return abs(self._polygon_area_signed_2d(polygon))
-
     def _polygon_area_signed_2d(self, polygon):
         area = 0.0
         for index, point in enumerate(polygon):
@@ -165,34 +78,13 @@ class SubTile:
             area += float(point[0] * next_point[1] - next_point[0] * point[1])
         return area * 0.5
 
-    def _point_in_polygon(self, point, polygon):
-        inside = False
-        j = len(polygon) - 1
-        for i in range(len(polygon)):
-            pi = polygon[i]
-            pj = polygon[j]
-            intersects = ((pi[1] > point[1]) != (pj[1] > point[1])) and (
-                point[0] < (pj[0] - pi[0]) * (point[1] - pi[1]) / ((pj[1] - pi[1]) + 1e-12) + pi[0]
-            )
-            if intersects:
-                inside = not inside
-            j = i
-        return inside
-
-    def _remove_duplicate_polygon_vertices(self, polygon, distance_epsilon=1e-8):
-        if len(polygon) < 2:
-            return polygon
-
-        cleaned = []
-        for point in polygon:
-            if cleaned and np.sum((point - cleaned[-1]) * (point - cleaned[-1])) <= distance_epsilon * distance_epsilon:
-                continue
-            cleaned.append(point)
-
-        if len(cleaned) > 1 and np.sum((cleaned[0] - cleaned[-1]) * (cleaned[0] - cleaned[-1])) <= distance_epsilon * distance_epsilon:
-            cleaned.pop()
-
-        return cleaned
+def generate_packed_battle_fields_for_tile(tile_id, subtile_vertex_coords):
+    return tile_id, [
+        pack_battle_field(
+            SubTile(vertices=list(vertex_coords), color=None)._build_battle_field()
+        )
+        for vertex_coords in subtile_vertex_coords
+    ]
 
 def generate_serialized_subtiles_for_tile(
     tile_id,
@@ -215,39 +107,31 @@ def generate_serialized_subtiles_for_tile(
         max_stagnation=max_stagnation,
         forced_edge_points=forced_edge_points
     )
-    return tile_id, {
-        "subtiles": [
-            {
-                "vertices": [np.asarray(vertex, dtype=np.float32) for vertex in subtile.vertices],
-                "battle_field": subtile.battle_field,
-            }
-            for subtile in tile.subtiles
-        ],
-        "seed_points": [
-            np.asarray(point, dtype=np.float32)
-            for point in tile.subtile_seed_points
-        ],
-    }
+    return tile_id, SubtileBatch.from_subtiles(tile.subtiles, tile.subtile_seed_points, vertex_coords)
 
 class Tile:
     def __init__(self, id, vertices, normal):
         self.id = id
         self.vertices = vertices
+        self.vertex_ids = np.array([v.id for v in vertices], dtype=np.int32)
         self.normal = normal
         self._center = np.mean([v.to_np() for v in self.vertices], axis=0).astype(np.float32)
         self.terrain_type = None
         self.height = 0.0
-        self.neighbors = []
+        self.graph = None # World TileGraph, attached by GameWorld
+        self._neighbors = None
         self.is_selected = False
-        self.unit = None
         self.subtiles = []
         self.subtile_seed_points = []
 
     def __getstate__(self):
         state = self.__dict__.copy()
-        # Don't pickle neighbors, it's rebuilt
-        if 'neighbors' in state:
-            del state['neighbors']
+        # Don't pickle neighbors, they come from the world's TileGraph
+        state.pop('graph', None)
+        state.pop('_neighbors', None)
+        state.pop('neighbors', None)
+        # Vertex ids are reassigned by GameWorld._index_vertices after loading
+        state.pop('vertex_ids', None)
         if 'subtiles' in state:
             del state['subtiles']
         if 'subtile_seed_points' in state:
@@ -255,14 +139,23 @@ class Tile:
         return state
 
     def __setstate__(self, state):
+        state.pop('unit', None)
         self.__dict__.update(state)
-        self.neighbors = []
-        self.unit = None
+        self.graph = None
+        self._neighbors = None
         self.is_selected = False
         self.subtiles = []
         self.subtile_seed_points = []
         self._center = np.mean([v.to_np() for v in self.vertices], axis=0).astype(np.float32)
 
+    @property
+    def neighbors(self):
+        if self._neighbors is None:
+            if self.graph is None:
+                return []
+            self._neighbors = self.graph.get_neighbors(self.id)
+        return self._neighbors
+
     def is_water(self):
         return self.terrain_type in [TerrainType.OCEAN, TerrainType.COAST, TerrainType.ICE]
 
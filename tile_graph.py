@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class TileGraph:
+    """Tile adjacency in CSR form.
+
+    The neighbours of tile i are indices[offsets[i]:offsets[i + 1]], listed
+    around the tile's vertex ring. Tile.neighbors reads from here on first
+    access, so loading a world builds no per-tile neighbour lists.
+    """
+
+    def __init__(self, offsets, indices, tiles=()):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.tiles = tiles
+
+    @classmethod
+    def from_tile_rings(cls, ring_tile_ids, ring_vertex_ids, vertex_tile_ids, tile_count):
+        """Builds the graph from (tile, vertex) incidence pairs.
+
+        ring_tile_ids/ring_vertex_ids are every tile's vertex ring concatenated
+        in tile order; vertex_tile_ids is the -1 padded table of tiles around
+        each vertex. Tiles sharing a vertex are neighbours, kept in order of
+        first appearance around the ring.
+        """
+        candidates = vertex_tile_ids[ring_vertex_ids]
+        owners = np.broadcast_to(ring_tile_ids[:, None], candidates.shape)
+        valid = (candidates >= 0) & (candidates != owners)
+        owners = owners[valid].astype(np.int64)
+        candidates = candidates[valid].astype(np.int64)
+
+        _, first_positions = np.unique(owners * tile_count + candidates, return_index=True)
+        first_positions.sort()
+        owners = owners[first_positions]
+        offsets = np.zeros(tile_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owners, minlength=tile_count), out=offsets[1:])
+        return cls(offsets, candidates[first_positions])
+
+    def get_neighbor_ids(self, tile_id):
+        return self.indices[self.offsets[tile_id]:self.offsets[tile_id + 1]]
+
+    def get_neighbors(self, tile_id):
+        tiles = self.tiles
+        return [tiles[neighbor_id] for neighbor_id in self.get_neighbor_ids(tile_id).tolist()]
+
+    def get_degrees(self):
+        return np.diff(self.offsets)
+
+    def to_padded(self, min_width=6):
+        """Returns the neighbour ids as a (tile_count, width) array padded with -1."""
+        degrees = self.get_degrees()
+        width = max(min_width, int(degrees.max(initial=0)))
+        padded = np.full((len(degrees), width), -1, dtype=np.int32)
+        rows = np.repeat(np.arange(len(degrees)), degrees)
+        columns = np.arange(len(self.indices)) - np.repeat(self.offsets[:-1], degrees)
+        padded[rows, columns] = self.indices
+        return padded
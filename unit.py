@@ -1,13 +1,44 @@
+from enum import IntEnum
+
+
+class UnitState(IntEnum):
+    IDLE = 0
+    MOVED = 1
+
+
 class Unit:
-    def __init__(self, tile, owner):
-        self.tile = tile
-        self.owner = owner
-        self.tile.unit = self
+    # Lightweight handle onto a row of the UnitRegistry columns.
+    __slots__ = ("registry", "id")
+
+    def __init__(self, registry, unit_id):
+        self.registry = registry
+        self.id = int(unit_id)
+
+    @property
+    def tile(self):
+        return self.registry.tiles[int(self.registry.tile_ids[self.id])]
+
+    @property
+    def owner(self):
+        owner = int(self.registry.owners[self.id])
+        return None if owner < 0 else owner
+
+    @property
+    def state(self):
+        return UnitState(int(self.registry.states[self.id]))
+
+    @property
+    def is_alive(self):
+        return bool(self.registry.alive[self.id])
 
     def move_to(self, new_tile):
-        if new_tile in self.tile.neighbors and not new_tile.unit:
-            self.tile.unit = None
-            self.tile = new_tile
-            new_tile.unit = self
-            return True
-        return False
+        return bool(self.registry.move_units([self.id], [new_tile.id])[0])
+
+    def __eq__(self, other):
+        return isinstance(other, Unit) and self.registry is other.registry and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Unit({self.id}, tile={int(self.registry.tile_ids[self.id])}, owner={self.owner})"
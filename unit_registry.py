@@ -0,0 +1,187 @@
+import numpy as np
+from unit import Unit, UnitState
+
+NO_UNIT = -1
+NO_OWNER = -1
+
+
+class UnitRegistry:
+    def __init__(self, tiles, tile_neighbor_ids, tile_centers, initial_capacity=64):
+        self.tiles = tiles
+        self.tile_neighbor_ids = np.asarray(tile_neighbor_ids, dtype=np.int32)
+        tile_centers = np.asarray(tile_centers, dtype=np.float32)
+        lengths = np.linalg.norm(tile_centers, axis=1, keepdims=True) if len(tile_centers) else np.ones((0, 1))
+        self.tile_directions = (tile_centers / np.maximum(lengths, 1e-12)).astype(np.float32)
+
+        capacity = max(1, int(initial_capacity))
+        self.tile_ids = np.full(capacity, NO_UNIT, dtype=np.int32)
+        self.owners = np.full(capacity, NO_OWNER, dtype=np.int32)
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.occupancy = np.full(len(tiles), NO_UNIT, dtype=np.int32)
+        self.count = 0
+        self.version = 0
+        self._free_ids = []
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def __iter__(self):
+        return (Unit(self, unit_id) for unit_id in self.active_ids())
+
+    def get(self, unit_id):
+        unit_id = int(unit_id)
+        if unit_id < 0 or unit_id >= self.count or not self.alive[unit_id]:
+            return None
+        return Unit(self, unit_id)
+
+    def active_ids(self):
+        return np.flatnonzero(self.alive[:self.count]).astype(np.int32)
+
+    def add_unit(self, tile_id, owner=None):
+        unit_ids = self.add_units([tile_id], [NO_OWNER if owner is None else owner])
+        return self.get(unit_ids[0])
+
+    def add_units(self, tile_ids, owners=None, states=None):
+        tile_ids = np.asarray(tile_ids, dtype=np.int32).reshape(-1)
+        owners = np.full(len(tile_ids), NO_OWNER, dtype=np.int32) if owners is None else np.asarray(owners, dtype=np.int32)
+        states = np.full(len(tile_ids), UnitState.IDLE, dtype=np.int8) if states is None else np.asarray(states, dtype=np.int8)
+        unit_ids = np.full(len(tile_ids), NO_UNIT, dtype=np.int32)
+        if len(tile_ids) == 0:
+            return unit_ids
+
+        valid_mask = (tile_ids >= 0) & (tile_ids < len(self.occupancy))
+        valid_mask[valid_mask] = self.occupancy[tile_ids[valid_mask]] == NO_UNIT
+        valid_mask &= self._first_occurrence_mask(tile_ids)
+        spawn_count = int(np.count_nonzero(valid_mask))
+        if spawn_count == 0:
+            return unit_ids
+
+        new_ids = self._allocate_ids(spawn_count)
+        spawn_tiles = tile_ids[valid_mask]
+        self.tile_ids[new_ids] = spawn_tiles
+        self.owners[new_ids] = owners[valid_mask]
+        self.states[new_ids] = states[valid_mask]
+        self.alive[new_ids] = True
+        self.occupancy[spawn_tiles] = new_ids
+        unit_ids[valid_mask] = new_ids
+        self.version += 1
+        return unit_ids
+
+    def remove_units(self, unit_ids):
+        unit_ids = self._alive_ids(unit_ids)
+        if len(unit_ids) == 0:
+            return
+        self.occupancy[self.tile_ids[unit_ids]] = NO_UNIT
+        self.tile_ids[unit_ids] = NO_UNIT
+        self.owners[unit_ids] = NO_OWNER
+        self.states[unit_ids] = UnitState.IDLE
+        self.alive[unit_ids] = False
+        self._free_ids.extend(int(unit_id) for unit_id in unit_ids)
+        self.version += 1
+
+    def move_units(self, unit_ids, target_tile_ids):
+        # A move is valid when the unit is alive, the target is adjacent to its
+        # current tile and the target was empty before the batch started. When
+        # several units target the same tile, the first one in the batch wins.
+        unit_ids = np.asarray(unit_ids, dtype=np.int32).reshape(-1)
+        target_tile_ids = np.asarray(target_tile_ids, dtype=np.int32).reshape(-1)
+        moved_mask = np.zeros(len(unit_ids), dtype=bool)
+        if len(unit_ids) == 0:
+            return moved_mask
+
+        valid_mask = (
+            (unit_ids >= 0) & (unit_ids < self.count) &
+            (target_tile_ids >= 0) & (target_tile_ids < len(self.occupancy))
+        )
+        valid_mask[valid_mask] = self.alive[unit_ids[valid_mask]]
+        candidate_ids = unit_ids[valid_mask]
+        candidate_targets = target_tile_ids[valid_mask]
+        current_tiles = self.tile_ids[candidate_ids]
+
+        adjacent_mask = np.any(self.tile_neighbor_ids[current_tiles] == candidate_targets[:, None], axis=1)
+        free_mask = self.occupancy[candidate_targets] == NO_UNIT
+        candidate_mask = adjacent_mask & free_mask
+        candidate_mask &= self._first_occurrence_mask(np.where(candidate_mask, candidate_targets, -1)) | ~candidate_mask
+        candidate_mask &= self._first_occurrence_mask(candidate_ids)
+        valid_mask[valid_mask] = candidate_mask
+        if not np.any(valid_mask):
+            return moved_mask
+
+        moving_ids = unit_ids[valid_mask]
+        moving_targets = target_tile_ids[valid_mask]
+        self.occupancy[self.tile_ids[moving_ids]] = NO_UNIT
+        self.occupancy[moving_targets] = moving_ids
+        self.tile_ids[moving_ids] = moving_targets
+        self.states[moving_ids] = UnitState.MOVED
+        self.version += 1
+        return valid_mask
+
+    def set_states(self, unit_ids, state):
+        unit_ids = self._alive_ids(unit_ids)
+        self.states[unit_ids] = state
+        self.version += 1
+
+    def reset_states(self, state=UnitState.IDLE):
+        self.states[:self.count][self.alive[:self.count]] = state
+        self.version += 1
+
+    def unit_at(self, tile_id):
+        unit_id = int(self.occupancy[tile_id])
+        return None if unit_id == NO_UNIT else Unit(self, unit_id)
+
+    def unit_ids_on_tiles(self, tile_ids):
+        unit_ids = self.occupancy[np.asarray(tile_ids, dtype=np.int32)]
+        return unit_ids[unit_ids != NO_UNIT]
+
+    def unit_ids_in_region(self, center, angular_radius):
+        unit_ids = self.active_ids()
+        if len(unit_ids) == 0:
+            return unit_ids
+
+        direction = np.asarray(center, dtype=np.float32)
+        direction = direction / max(float(np.linalg.norm(direction)), 1e-12)
+        dots = self.tile_directions[self.tile_ids[unit_ids]] @ direction
+        return unit_ids[dots >= np.cos(angular_radius)]
+
+    def unit_ids_for_owner(self, owner):
+        unit_ids = self.active_ids()
+        return unit_ids[self.owners[unit_ids] == (NO_OWNER if owner is None else owner)]
+
+    def occupied_mask(self, tile_ids):
+        return self.occupancy[np.asarray(tile_ids, dtype=np.int32)] != NO_UNIT
+
+    def _alive_ids(self, unit_ids):
+        unit_ids = np.unique(np.asarray(unit_ids, dtype=np.int32).reshape(-1))
+        unit_ids = unit_ids[(unit_ids >= 0) & (unit_ids < self.count)]
+        return unit_ids[self.alive[unit_ids]]
+
+    def _first_occurrence_mask(self, values):
+        mask = np.zeros(len(values), dtype=bool)
+        _, first_indices = np.unique(values, return_index=True)
+        mask[first_indices] = True
+        return mask
+
+    def _allocate_ids(self, spawn_count):
+        reused_count = min(spawn_count, len(self._free_ids))
+        reused_ids = [self._free_ids.pop() for _ in range(reused_count)]
+        fresh_count = spawn_count - reused_count
+        if self.count + fresh_count > len(self.tile_ids):
+            self._grow(self.count + fresh_count)
+        fresh_ids = list(range(self.count, self.count + fresh_count))
+        self.count += fresh_count
+        return np.asarray(reused_ids + fresh_ids, dtype=np.int32)
+
+    def _grow(self, required_capacity):
+        capacity = len(self.tile_ids)
+        while capacity < required_capacity:
+            capacity *= 2
+        self.tile_ids = self._resized(self.tile_ids, capacity, NO_UNIT)
+        self.owners = self._resized(self.owners, capacity, NO_OWNER)
+        self.states = self._resized(self.states, capacity, UnitState.IDLE)
+        self.alive = self._resized(self.alive, capacity, False)
+
+    def _resized(self, column, capacity, fill_value):
+        resized = np.full(capacity, fill_value, dtype=column.dtype)
+        resized[:len(column)] = column
+        return resized
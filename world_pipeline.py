@@ -0,0 +1,228 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+import config as cfg
+from tile_graph import TileGraph
+
+# Bump a stage's version when its code changes what it produces.
+STAGE_VERSIONS = {
+    "geometry": 1,
+    "adjacency": 3,
+    "terrain": 1,
+    "rivers": 5,
+    "subtiles": cfg.SUBTILE_CACHE_VERSION,
+    "pathfinding": 1,
+}
+
+STAGE_DEPENDENCIES = {
+    "geometry": (),
+    "adjacency": ("geometry",),
+    "terrain": ("geometry", "adjacency"),
+    "rivers": ("adjacency", "terrain"),
+    "subtiles": ("geometry",),
+    "pathfinding": ("geometry", "adjacency"),
+}
+
+SUBTILE_STAGE_PARAMETERS = (
+    "SUBTILE_MIN_DISTANCE_FACTOR",
+    "SUBTILE_EDGE_POINT_SPACING_FACTOR",
+    "SUBTILE_MAX_INTERIOR_POINTS",
+    "SUBTILE_CANDIDATE_BATCH_SIZE",
+    "SUBTILE_MAX_STAGNATION",
+    "SUBTILE_POLISH_MERGE_DISTANCE_FACTOR",
+    "SUBTILE_EDGE_POLISH_MERGE_SPACING_FACTOR",
+    "SUBTILE_REGENERATE_MISMATCHED_EDGES",
+    "BATTLE_FIELD_HEX_RADIUS_FACTOR",
+    "BATTLE_FIELD_MIN_HEX_RADIUS",
+    "BATTLE_FIELD_MAX_HEXES",
+)
+
+TERRAIN_STAGE_PARAMETERS = (
+    "TERRAIN_LAND_NOISE_OCTAVES",
+    "TERRAIN_HEIGHT_NOISE_OCTAVES",
+    "TERRAIN_LAND_NOISE_SCALE",
+    "TERRAIN_HEIGHT_NOISE_SCALE",
+    "TERRAIN_LAND_THRESHOLD",
+    "TERRAIN_MOUNTAIN_HEIGHT",
+    "TERRAIN_HILL_HEIGHT",
+)
+
+
+class WorldPipeline:
+    """Runs geometry -> adjacency -> terrain -> rivers on a GameWorld.
+
+    Every stage's output is cached under a key hashed from its version, its
+    parameters and the keys of the stages it depends on, so changing e.g.
+    RIVER_COUNT only re-runs the river stage. Subtiles and the pathfinding
+    graph are built lazily by GameWorld; the pipeline only keys their cache
+    files.
+    """
+
+    def __init__(self, world, cache_dir=cfg.WORLD_CACHE_DIR):
+        self.world = world
+        self.cache_dir = cache_dir
+        self.stage_keys = {}
+
+    def run(self):
+        for stage in ("geometry", "adjacency", "terrain", "rivers"):
+            self._run_stage(stage)
+        for stage in ("subtiles", "pathfinding"):
+            self.stage_keys[stage] = self._compute_stage_key(stage)
+        self._prune_stale_stage_caches()
+        return self.stage_keys
+
+    def get_stage_cache_filename(self, stage):
+        return os.path.join(
+            self.cache_dir,
+            f"{stage}_level_{self.world.subdivision_level}_{self.stage_keys[stage]}.pkl"
+        )
+
+    def _prune_stale_stage_caches(self):
+        # Every version or parameter change leaves a file under the old key
+        # behind; only the current key of each stage and level is kept.
+        for stage in self.stage_keys:
+            current_filename = self.get_stage_cache_filename(stage)
+            pattern = os.path.join(self.cache_dir, f"{stage}_level_{self.world.subdivision_level}_*.pkl")
+            for cache_filename in glob.glob(pattern):
+                if os.path.normpath(cache_filename) == os.path.normpath(current_filename):
+                    continue
+                try:
+                    os.remove(cache_filename)
+                    print(f"Removed stale world stage cache {cache_filename}.")
+                except OSError as exc:
+                    print(f"Could not remove stale world stage cache {cache_filename}: {exc}")
+
+    def _run_stage(self, stage):
+        self.stage_keys[stage] = self._compute_stage_key(stage)
+        cache_filename = self.get_stage_cache_filename(stage)
+        start_time = time.perf_counter()
+
+        payload = self._load_stage_payload(cache_filename)
+        if payload is not None:
+            getattr(self, f"_restore_{stage}")(payload)
+            self._record_timing(stage, start_time, "loaded from cache")
+            return
+
+        getattr(self, f"_generate_{stage}")()
+        self._save_stage_payload(cache_filename, getattr(self, f"_export_{stage}")())
+        self._record_timing(stage, start_time, "generated")
+
+    def _compute_stage_key(self, stage):
+        key_data = {
+            "stage": stage,
+            "version": STAGE_VERSIONS[stage],
+            "parameters": self._get_stage_parameters(stage),
+            "dependencies": [self.stage_keys[dependency] for dependency in STAGE_DEPENDENCIES[stage]],
+        }
+        encoded = json.dumps(key_data, sort_keys=True, default=str).encode()
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    def _get_stage_parameters(self, stage):
+        if stage == "geometry":
+            return {"subdivision_level": self.world.subdivision_level}
+        if stage == "terrain":
+            parameters = {name: getattr(cfg, name) for name in TERRAIN_STAGE_PARAMETERS}
+            parameters["seed"] = self.world.seed
+            return parameters
+        if stage == "rivers":
+            return {
+                "river_count": cfg.RIVER_COUNT,
+                "min_accumulation": cfg.RIVER_MIN_ACCUMULATION,
+                "min_accumulation_fraction": cfg.RIVER_MIN_ACCUMULATION_FRACTION,
+            }
+        if stage == "subtiles":
+            return {name: getattr(cfg, name) for name in SUBTILE_STAGE_PARAMETERS}
+        if stage == "pathfinding":
+            return {"cluster_level_offset": cfg.PATHFINDING_CLUSTER_LEVEL_OFFSET}
+        return {}
+
+    def _record_timing(self, stage, start_time, action):
+        elapsed = time.perf_counter() - start_time
+        self.world.stage_timings[stage] = self.world.stage_timings.get(stage, 0.0) + elapsed
+        print(f"World stage {stage}: {action} in {elapsed:.2f}s.")
+
+    def _load_stage_payload(self, cache_filename):
+        if not os.path.exists(cache_filename):
+            return None
+        try:
+            with open(cache_filename, 'rb') as f:
+                return pickle.load(f)
+        except Exception as exc:
+            print(f"Could not load world stage cache {cache_filename}: {exc}")
+            return None
+
+    def _save_stage_payload(self, cache_filename, payload):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_filename = f"{cache_filename}.{os.getpid()}.tmp"
+        try:
+            with open(temp_filename, 'wb') as f:
+                pickle.dump(payload, f)
+            os.replace(temp_filename, cache_filename)
+        except Exception as exc:
+            print(f"Could not save world stage cache {cache_filename}: {exc}")
+
+    # --- geometry ---
+    def _generate_geometry(self):
+        self.world._create_geometry()
+
+    def _export_geometry(self):
+        return {"vertices": self.world.vertices, "tiles": self.world.tiles}
+
+    def _restore_geometry(self, payload):
+        self.world.vertices = payload["vertices"]
+        self.world.tiles = payload["tiles"]
+        self.world._index_vertices()
+
+    # --- adjacency ---
+    def _generate_adjacency(self):
+        self.world._build_neighbor_graph()
+        self.world._build_vertex_neighbors()
+
+    def _export_adjacency(self):
+        return {
+            "tile_neighbor_offsets": self.world.tile_graph.offsets,
+            "tile_neighbor_indices": self.world.tile_graph.indices,
+            "vertex_tile_ids": self.world.vertex_tile_ids,
+            "vertex_neighbor_ids": self.world.vertex_neighbor_ids,
+        }
+
+    def _restore_adjacency(self, payload):
+        self.world._attach_tile_graph(TileGraph(payload["tile_neighbor_offsets"], payload["tile_neighbor_indices"]))
+        self.world.vertex_tile_ids = payload["vertex_tile_ids"]
+        self.world.vertex_neighbor_ids = payload["vertex_neighbor_ids"]
+
+    # --- terrain ---
+    def _generate_terrain(self):
+        self.world._assign_terrain_and_heights()
+
+    def _export_terrain(self):
+        return {
+            "heights": [tile.height for tile in self.world.tiles],
+            "terrain_types": [tile.terrain_type for tile in self.world.tiles],
+        }
+
+    def _restore_terrain(self, payload):
+        for tile, height, terrain_type in zip(self.world.tiles, payload["heights"], payload["terrain_types"]):
+            tile.height = height
+            tile.terrain_type = terrain_type
+
+    # --- rivers ---
+    def _generate_rivers(self):
+        self.world._generate_rivers()
+
+    def _export_rivers(self):
+        return {
+            "paths": self.world.river_paths,
+            "flow": self.world.river_flow,
+            "segments": self.world.river_segments,
+            "segment_flow": self.world.river_segment_flow,
+        }
+
+    def _restore_rivers(self, payload):
+        self.world.river_paths = payload["paths"]
+        self.world.river_flow = payload["flow"]
+        self.world.river_segments = payload["segments"]
+        self.world.river_segment_flow = payload["segment_flow"]
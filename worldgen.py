@@ -0,0 +1,107 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import config as cfg
+
+
+def build_world(subdivision_level, seed, precompute_subtiles=True, precompute_battle_fields=True, subtile_workers=0):
+    # Imported here so spawned job processes only pay for it once they run.
+    from game_world import GameWorld
+
+    if subtile_workers > 0:
+        cfg.SUBTILE_PRECOMPUTE_WORKERS = subtile_workers
+
+    start_time = time.perf_counter()
+    world = GameWorld(subdivision_level=subdivision_level, seed=seed, headless=True)
+    if precompute_subtiles or precompute_battle_fields:
+        with world._timed_stage("subtiles"):
+            world.precompute_all_subtiles()
+    if precompute_battle_fields:
+        with world._timed_stage("battle_fields"):
+            world.precompute_all_battle_fields()
+    with world._timed_stage("cache_flush"):
+        world.shutdown()
+
+    return {
+        "subdivision_level": subdivision_level,
+        "seed": seed,
+        "tile_count": len(world.tiles),
+        "stage_keys": dict(world.stage_keys),
+        "subtile_cache": world.subtile_cache_filename,
+        "stage_timings": dict(world.stage_timings),
+        "total_time": time.perf_counter() - start_time,
+    }
+
+
+def print_world_report(result):
+    print(
+        f"Level {result['subdivision_level']} seed {result['seed']}: "
+        f"{result['tile_count']} tiles in {result['total_time']:.2f}s "
+        f"-> {result['subtile_cache']}"
+    )
+    for stage, elapsed in result["stage_timings"].items():
+        print(f"    {stage:<18} {elapsed:8.2f}s  {result['stage_keys'].get(stage, '')}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate world caches without opening a window.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[cfg.SUBDIVISION_LEVEL], help="Subdivision levels to build.")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[cfg.WORLD_SEED], help="World seeds to build for every level.")
+    parser.add_argument("--jobs", type=int, default=1, help="Worlds built in parallel, each in its own process.")
+    parser.add_argument("--subtile-workers", type=int, default=0, help="Subtile worker processes per world (0 splits the CPUs across jobs).")
+    parser.add_argument("--skip-subtiles", action="store_true", help="Only build world geometry, terrain and rivers.")
+    parser.add_argument("--skip-battle-fields", action="store_true", help="Do not precompute battle fields.")
+    parser.add_argument("--output-dir", default=".", help="Directory the cache files are written to.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.chdir(args.output_dir)
+
+    jobs = [(level, seed) for level in args.levels for seed in args.seeds]
+    job_count = max(1, min(args.jobs, len(jobs)))
+    subtile_workers = args.subtile_workers
+    if subtile_workers <= 0 and job_count > 1:
+        subtile_workers = max(1, (os.cpu_count() or 1) // job_count)
+    options = {
+        "precompute_subtiles": not args.skip_subtiles,
+        "precompute_battle_fields": not args.skip_subtiles and not args.skip_battle_fields,
+        "subtile_workers": subtile_workers,
+    }
+
+    start_time = time.perf_counter()
+    print(f"Building {len(jobs)} world(s) with {job_count} job(s).")
+    results = []
+    failed_count = 0
+    if job_count == 1:
+        for level, seed in jobs:
+            result = build_world(level, seed, **options)
+            print_world_report(result)
+            results.append(result)
+    else:
+        with ProcessPoolExecutor(max_workers=job_count) as executor:
+            futures = {
+                executor.submit(build_world, level, seed, **options): (level, seed)
+                for level, seed in jobs
+            }
+            for future in as_completed(futures):
+                level, seed = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    failed_count += 1
+                    print(f"Could not build level {level} seed {seed}: {exc}")
+                    continue
+                print_world_report(result)
+                results.append(result)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Built {len(results)} world(s), {failed_count} failed, total time {elapsed:.2f}s.")
+    return 1 if failed_count else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())